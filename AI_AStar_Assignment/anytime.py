@@ -0,0 +1,231 @@
+import click
+from time import perf_counter
+from typing import Iterator, Optional
+from events import log, log_enqueue_state, log_visit_state, logging_enabled, set_sink, NullSink
+from maps import Location, Map
+from parsing import validate_location, validate_map
+
+from methods import getFtotalCost, getNeighbours, getParents
+from heuristics import HEURISTICS, Heuristic, manhattanHeuristic
+from grid import getGrid
+from openset import CostTable, OpenSet
+from nodepool import NodePool
+
+
+# Anytime search for question 1, for callers with a fixed time budget (such as a game loop with a budget per tick).
+# This is ARA* (Likhachev, Gordon and Thrun): weighted A* (see bounded.py) with a high weight finds a first path
+# quickly, then the weight is lowered step by step and the search carries on with the nodes it already has,
+# each time finding a path at least as cheap with a tighter bound, until the weight reaches 1 and the path
+# is the cheapest. Locations are never explored twice within one weight; a cheaper path found to one
+# that already was is kept aside (inconsistent) and explored again at the next weight instead.
+#
+# The search is kept between calls, so a caller out of time simply stops and asks for more on the next tick:
+#
+#   search = AnytimeSearch(start, goal, terrain_map, terrain_threshold)
+#   for cost, path, bound in search.solutions(deadline_ms= 5):
+#       ...                                  # the newest path, at most bound times the cheapest cost
+#   search.best                              # the best path so far, or None if none was found yet
+
+# The weight of the first search, and how much it is lowered by for each following one.
+FIRST_WEIGHT = 3.0
+WEIGHT_STEP = 0.5
+
+# How many locations are expanded between checks of the deadline.
+DEADLINE_CHECK = 64
+
+
+class AnytimeSearch:
+
+    def __init__(self, start: Location, goal: Location, terrain_map: Map, terrain_threshold: int,
+                 heuristic: Heuristic = manhattanHeuristic, weight: float = FIRST_WEIGHT, step: float = WEIGHT_STEP):
+        if not weight >= 1:
+            raise ValueError(f"The weight must be at least 1, not {weight}")
+        if not step > 0:
+            raise ValueError(f"The step must be more than 0, not {step}")
+
+        self.start = tuple(start)
+        self.goal = tuple(goal)
+        self.weight = weight
+        self.step = step
+
+        self.grid = getGrid(terrain_map, terrain_threshold)
+        self.estimate = heuristic(self.grid, self.goal)
+
+        # As in find_shortest_path: every node in a pool, and the best known cost and node of every location.
+        self.pool = NodePool()
+        self.bestCost = CostTable(terrain_map)
+        self.bestNode = CostTable(terrain_map, NodePool.NO_PARENT)
+        self.explored = CostTable(terrain_map, False)
+        self.frontier = OpenSet()
+        self.inconsistent = {}
+        self.tieBreak = 0
+
+        # The newest (cost, path, bound) found, and whether the search at the current weight has finished.
+        self.best = None
+        self.finished = False
+        self.done = False
+
+        # Total number of locations expanded, over every weight.
+        self.expansions = 0
+
+        startNode = self.pool.add(self.start, g= 0, h= self.estimate(self.start))
+        self.place(self.start, startNode)
+
+
+    def solutions(self, deadline_ms: Optional[float] = None) -> Iterator[tuple[int, list[Location], float]]:
+        """Yields (cost,list(locations),bound) for a first path and then for each better one,
+           where bound is how many times the cheapest cost the path may cost at most (1.0 once it is the cheapest).
+           Stops once the cheapest path has been found or no path exists, when deadline_ms milliseconds
+           have passed since the call (time spent by the caller between paths included), or when the caller stops.
+           Calling it again carries on from where the search stopped."""
+
+        deadline = None if deadline_ms is None else perf_counter() + deadline_ms / 1000
+
+        while not self.done:
+            if self.finished:
+                self.lowerWeight()
+
+            if not self.improvePath(deadline):
+                return
+            self.finished = True
+
+            if self.bestCost[self.goal] == float("inf"):
+                self.done = True
+                return
+
+            cost = self.bestCost[self.goal]
+            bound = self.getBound(cost)
+            if self.best is not None and cost >= self.best[0] and bound >= self.best[2]:
+                continue
+
+            path = getParents(self.pool, self.bestNode[self.goal], [])
+            path.reverse()
+            self.best = (cost, path, bound)
+            self.done = bound <= 1
+            yield cost, list(path), bound
+
+
+    # Places a node in the frontier with its priority at the current weight.
+    def place(self, location: Location, node: int) -> None:
+        self.tieBreak += 1
+        self.frontier.push(location, (getFtotalCost(g= self.pool.g[node], h= self.weight * self.pool.h[node]),
+                                      self.tieBreak), node)
+        self.bestCost[location] = self.pool.g[node]
+        self.bestNode[location] = node
+
+
+    # Expands nodes until no node in the frontier could lead to a cheaper path to the goal at the current weight.
+    # Returns False if the deadline passed first, leaving the search to carry on later.
+    def improvePath(self, deadline: Optional[float]) -> bool:
+
+        pool = self.pool
+        frontier = self.frontier
+        bestCost = self.bestCost
+        explored = self.explored
+        logEvents = logging_enabled()
+        checked = 0
+
+        while len(frontier) > 0 and frontier.heap[0][0][0] < bestCost[self.goal]:
+
+            checked += 1
+            if deadline is not None and checked % DEADLINE_CHECK == 0 and perf_counter() >= deadline:
+                return False
+
+            location, _, currentNode = frontier.pop()
+            explored[location] = True
+            self.expansions += 1
+            if logEvents:
+                log_visit_state(location, pool.g[currentNode])
+
+            for childLocation, g, h in getNeighbours(pool, currentNode, self.estimate, self.grid):
+                if g >= bestCost[childLocation]:
+                    continue
+
+                child = pool.add(childLocation, g, h, parent= currentNode)
+                if explored[childLocation]:
+                    # Explored again at the next weight
+                    self.inconsistent[childLocation] = child
+                    bestCost[childLocation] = g
+                    self.bestNode[childLocation] = child
+                else:
+                    self.place(childLocation, child)
+                if logEvents:
+                    log_enqueue_state(childLocation, g)
+
+        return True
+
+
+    # The bound achieved by a path of cost: the cost over the lowest g + h of any node that could still
+    # lead to a cheaper path, or the weight if that is lower (see bounded.getAchievedBound).
+    def getBound(self, cost: int) -> float:
+
+        g = self.pool.g
+        h = self.pool.h
+        nodes = [entry[2] for entry in self.frontier.heap] + list(self.inconsistent.values())
+        lowest = min(min((g[node] + h[node] for node in nodes), default=cost), cost)
+
+        if cost == 0 or self.weight <= 1:
+            return 1.0
+        return min(cost / lowest, self.weight) if lowest > 0 else self.weight
+
+
+    # Lowers the weight for the next search, no further than the bound already achieved, and places the
+    # inconsistent nodes back in the frontier, which is ordered again with the new weight.
+    def lowerWeight(self) -> None:
+
+        self.weight = max(1.0, min(self.weight - self.step, self.best[2] if self.best is not None else self.weight))
+        nodes = [(entry[1], entry[2]) for entry in self.frontier.heap] + list(self.inconsistent.items())
+
+        self.frontier = OpenSet()
+        self.inconsistent = {}
+        self.explored = CostTable(self.grid.values, False)
+        for location, node in nodes:
+            self.place(location, node)
+
+        self.finished = False
+
+
+
+def find_paths_anytime(start: Location, goal: Location, terrain_map: Map, terrain_threshold: int,
+                       heuristic: Heuristic = manhattanHeuristic, deadline_ms: Optional[float] = None,
+                       weight: float = FIRST_WEIGHT, step: float = WEIGHT_STEP) \
+                   -> Iterator[tuple[int, list[Location], float]]:
+    """Finds ever cheaper paths for Task 1 within a time budget, see AnytimeSearch.solutions.
+       Yields (cost,list(locations),bound) for each path, the last one the cheapest unless the deadline
+       (in milliseconds from this call) passed first. Yields nothing if no path is found in time or none exists.
+       The first search multiplies the heuristic by weight, and each following one by step less."""
+
+    return AnytimeSearch(start, goal, terrain_map, terrain_threshold, heuristic, weight, step).solutions(deadline_ms)
+
+
+
+@click.command(no_args_is_help=True)
+@click.argument('start', required=True, callback=validate_location)
+@click.argument('goal', required=True, callback=validate_location)
+@click.argument("terrain_map", required=True, type=click.Path(exists=True), callback=validate_map)
+@click.argument("terrain_threshold", required=True, type=click.IntRange(min=0,max=1000))
+@click.option("--heuristic", type=click.Choice(list(HEURISTICS)), default="manhattan", show_default=True)
+@click.option("--deadline", type=click.FloatRange(min=0.0), help="Stop after this many milliseconds.")
+@click.option("--weight", type=click.FloatRange(min=1.0), default=FIRST_WEIGHT, show_default=True)
+@click.option("--step", type=click.FloatRange(min=0.0, min_open=True), default=WEIGHT_STEP, show_default=True)
+def main(start: Location, goal: Location, terrain_map: Map, terrain_threshold: int, heuristic: str,
+         deadline: Optional[float], weight: float, step: float) -> None:
+    """Reports each path found by the anytime search as it is found, with the time taken.
+
+    \b
+    python anytime.py 20,80 80,40 resources/terrain04.txt 500 --deadline 50
+    """
+    set_sink(NullSink())
+
+    began = perf_counter()
+    found = False
+    for cost, path, bound in find_paths_anytime(start, goal, terrain_map, terrain_threshold, HEURISTICS[heuristic],
+                                                deadline, weight, step):
+        found = True
+        log(f"{(perf_counter() - began) * 1000:8.1f}ms cost {cost}, at most {bound:.4f} times the lowest.")
+
+    if not found:
+        log('No path found')
+
+if __name__ == '__main__':
+    main()
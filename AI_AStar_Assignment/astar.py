@@ -0,0 +1,106 @@
+import importlib
+import sys
+from typing import Optional
+from events import log, set_sink, NullSink
+from maps import parse_location
+
+from tiny import find_tiny_path, find_tiny_safe_path, read_tiny_map
+
+
+# A single entry point for the command line tools, for scripts that run them many times:
+#
+#   python -m astar task1 START GOAL TERRAIN_MAP TERRAIN_THRESHOLD [OPTIONS]                  (pathfinding_task1.py)
+#   python -m astar task2 START GOAL TERRAIN_MAP TERRAIN_THRESHOLD SUCCESS_MAP SUCCESS_THRESHOLD [OPTIONS]
+#                                                                                       (safe_pathfinding_task2.py)
+#   python -m astar batch QUERIES TERRAIN_MAP TERRAIN_THRESHOLD [OPTIONS]                     (batch.py)
+#
+# Each command takes exactly the arguments and options of the script it names, which is only imported
+# (with click and NumPy) once it is needed, so nothing imported here may import either. A task1 or task2 query on tiny text maps with no options
+# other than --quiet is answered by the pure-Python searches in tiny.py instead, which print the same
+# events and result without importing either, in a fraction of the time. --full turns this off.
+
+COMMANDS = {"task1": "pathfinding_task1", "task2": "safe_pathfinding_task2", "batch": "batch"}
+
+USAGE = """Usage: python -m astar [--full] COMMAND [ARGS]...
+
+  Finds paths on terrain maps. Run a command with --help for its arguments and options.
+
+Options:
+  --full  Always use the NumPy searches, even for tiny maps.
+
+Commands:
+  task1  Finds the path with lowest total cost (pathfinding_task1.py).
+  task2  Finds the path with lowest total cost meeting a success probability (safe_pathfinding_task2.py).
+  batch  Answers every query in a JSONL or CSV file (batch.py)."""
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Runs a command, returning the exit status of the pure-Python searches or the script's own."""
+
+    arguments = sys.argv[1:] if argv is None else list(argv)
+    full = arguments[:1] == ["--full"]
+    if full:
+        arguments = arguments[1:]
+
+    if not arguments or arguments[0] in ("-h", "--help"):
+        print(USAGE)
+        return 0
+    command, arguments = arguments[0], arguments[1:]
+    if command not in COMMANDS:
+        print(USAGE, file=sys.stderr)
+        print(f"\nError: No such command '{command}'.", file=sys.stderr)
+        return 2
+
+    if not full and command != "batch" and runTiny(command, arguments):
+        return 0
+
+    script = importlib.import_module(COMMANDS[command])
+    try:
+        script.main(args=arguments, prog_name=f"python -m astar {command}")
+    except SystemExit as exit:
+        return exit.code if isinstance(exit.code, int) else 0 if exit.code is None else 1
+    return 0
+
+
+
+# Answers a task1 or task2 query with the pure-Python searches if it can, returning whether it did.
+# Anything they don't handle the same way (other options, larger maps, arguments the script would
+# reject or might read differently) is left to the script, which reports errors as usual.
+def runTiny(command: str, arguments: list[str]) -> bool:
+
+    quiet = "--quiet" in arguments
+    positional = [argument for argument in arguments if argument != "--quiet"]
+    if len(positional) != (4 if command == "task1" else 6) or any(item.startswith("-") for item in positional):
+        return False
+
+    try:
+        start, goal = parse_location(positional[0]), parse_location(positional[1])
+        terrainThreshold = int(positional[3])
+        successThreshold = float(positional[5]) if command == "task2" else 0.0
+    except (AssertionError, ValueError):
+        return False
+    if not (0 <= terrainThreshold <= 1000 and 0 <= successThreshold <= 1):
+        return False
+
+    maps = [read_tiny_map(positional[index]) for index in ((2,) if command == "task1" else (2, 4))]
+    if any(map is None for map in maps) or any(len(map) != len(maps[0]) or len(map[0]) != len(maps[0][0])
+                                               for map in maps):
+        return False
+    if not all(0 <= location[0] < len(maps[0]) and 0 <= location[1] < len(maps[0][0]) for location in (start, goal)):
+        return False
+
+    if quiet:
+        set_sink(NullSink())
+
+    # Printed as the scripts print it, which is also how they report that no path was found
+    if command == "task1":
+        path = find_tiny_path(start, goal, maps[0], terrainThreshold)
+        log(f"The path is {path[1]} with cost {path[0]}.")
+    else:
+        path = find_tiny_safe_path(start, goal, maps[0], terrainThreshold, maps[1], successThreshold)
+        log(f"The path is {path[2]} with cost {path[0]} and success probability {path[1]}")
+
+    return True
+
+if __name__ == '__main__':
+    sys.exit(main())
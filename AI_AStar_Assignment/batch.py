@@ -0,0 +1,186 @@
+import csv
+import json
+import click
+from collections import Counter
+from typing import Iterable, Iterator, Optional
+from events import log, set_sink, NullSink
+from maps import Location, Map
+from parsing import validate_map, validate_optional_map
+
+from distancefield import build_distance_field
+from grid import frozenMap, getGrid, getSafetyTable
+from pathfinding_task1 import find_shortest_path
+from resultcache import ResultCache
+from safe_pathfinding_task2 import find_shortest_safe_path
+
+
+# Goals shared by at least this many queries are answered from one reverse search instead of one A* search per query.
+SHARED_GOAL_QUERIES = 4
+
+
+Query = tuple[Location, Location]
+
+
+def find_shortest_paths_batch(queries: Iterable[Query], terrain_map: Map, terrain_threshold: int,
+                              shared_goal_queries: int = SHARED_GOAL_QUERIES,
+                              cache: Optional[ResultCache] = None) \
+                              -> list[tuple[Optional[int],Optional[list[Location]]]]:
+    """Finds the path with lowest total cost (Task 1) for many (start, goal) queries on one map.
+       Returns a list holding (cost,list(locations)) or (None,None) for each query, in order.
+       When at least shared_goal_queries queries share a goal they reuse one reverse search,
+       their costs are the same but among equally cheap paths a different one may be returned.
+       The other queries are looked up in the cache first when one is given (see resultcache.py)."""
+
+    return list(iter_shortest_paths_batch(queries, terrain_map, terrain_threshold, shared_goal_queries, cache))
+
+
+def find_shortest_safe_paths_batch(queries: Iterable[Query], terrain_map: Map, terrain_threshold: int,
+                                   success_map: Map, success_threshold: float,
+                                   cache: Optional[ResultCache] = None) \
+                                   -> list[tuple[Optional[int],Optional[float],Optional[list[Location]]]]:
+    """Finds the path with lowest total cost that also satisfies the minimum success
+       probability threshold (Task 2) for many (start, goal) queries on one map.
+       Returns a list holding (cost,prob_success,list(locations)) or (None,None,None) for each query, in order.
+       The queries are looked up in the cache first when one is given (see resultcache.py)."""
+
+    return list(iter_shortest_safe_paths_batch(queries, terrain_map, terrain_threshold, success_map, success_threshold,
+                                               cache))
+
+
+
+# Yields the Task 1 result of each query in order, as soon as it is found.
+# The grid is precomputed once for all the queries, and the map is read-only until the last one is answered
+# so that it is only hashed once (see grid.frozenMap). Goals shared by enough queries get a distance field
+# the first time they are needed, every later query with that goal is a lookup along the path.
+def iter_shortest_paths_batch(queries: Iterable[Query], terrain_map: Map, terrain_threshold: int,
+                              shared_goal_queries: int = SHARED_GOAL_QUERIES,
+                              cache: Optional[ResultCache] = None) -> Iterator:
+
+    queries = list(queries)
+    search = find_shortest_path if cache is None else cache.find_shortest_path
+
+    goalCounts = Counter(goal for _, goal in queries)
+    distanceFields = {}
+
+    with frozenMap(terrain_map):
+        getGrid(terrain_map, terrain_threshold)
+
+        for start, goal in queries:
+
+            if goalCounts[goal] < shared_goal_queries:
+                yield search(start, goal, terrain_map, terrain_threshold)
+                continue
+
+            if goal not in distanceFields:
+                distanceFields[goal] = build_distance_field(terrain_map, terrain_threshold, goal)
+
+            yield distanceFields[goal].pathFrom(start)
+
+
+
+# Yields the Task 2 result of each query in order, as soon as it is found.
+# The success probability depends on the whole path, so each query needs its own search,
+# but the grid and safety table are precomputed once for all of them, and the maps hashed once.
+def iter_shortest_safe_paths_batch(queries: Iterable[Query], terrain_map: Map, terrain_threshold: int,
+                                   success_map: Map, success_threshold: float,
+                                   cache: Optional[ResultCache] = None) -> Iterator:
+
+    search = find_shortest_safe_path if cache is None else cache.find_shortest_safe_path
+
+    with frozenMap(terrain_map), frozenMap(success_map):
+        getGrid(terrain_map, terrain_threshold)
+        getSafetyTable(success_map)
+
+        for start, goal in queries:
+            yield search(start, goal, terrain_map, terrain_threshold, success_map, success_threshold)
+
+
+
+# Reads (start, goal) queries from a file.
+# JSONL files hold one object per line: {"start": [3, 2], "goal": [0, 3]}
+# CSV files have a header and the columns start_row,start_col,goal_row,goal_col
+def read_queries(file_name: str) -> list[Query]:
+
+    queries = []
+
+    with open(file_name, newline="") as file:
+
+        if file_name.endswith(".csv"):
+            for row in csv.DictReader(file):
+                queries.append(((int(row["start_row"]), int(row["start_col"])),
+                                (int(row["goal_row"]), int(row["goal_col"]))))
+        else:
+            for line in file:
+                if line.strip():
+                    query = json.loads(line)
+                    queries.append((tuple(query["start"]), tuple(query["goal"])))
+
+    return queries
+
+
+# Writes the result of one query as a line of JSON, returns whether a path was found.
+# Task 2 results (cost, prob_success, path) also record the success probability.
+def write_result(output, query: Query, result: tuple) -> bool:
+
+    start, goal = query
+    record = {"start": start, "goal": goal, "cost": None if result[0] is None else int(result[0]), "path": result[-1]}
+    if len(result) == 3:
+        record["success"] = result[1]
+
+    output.write(json.dumps(record) + "\n")
+    output.flush()
+
+    return result[-1] is not None
+
+
+def validate_queries(_ctx, _param, file_path) -> list[Query]:
+    try:
+        return read_queries(file_path)
+    except (KeyError, ValueError, TypeError) as error:
+        raise click.BadParameter(f"Query file '{file_path}' is invalid: {error}")
+
+
+
+@click.command(no_args_is_help=True)
+@click.argument("queries", required=True, type=click.Path(exists=True), callback=validate_queries)
+@click.argument("terrain_map", required=True, type=click.Path(exists=True), callback=validate_map)
+@click.argument("terrain_threshold", required=True, type=click.IntRange(min=0,max=1000))
+@click.option("--success-map", type=click.Path(exists=True), callback=validate_optional_map,
+              help="Enemy presence map, answers the queries for Task 2 instead of Task 1.")
+@click.option("--success-threshold", type=click.FloatRange(min=0.0,max=1.0), default=0.0, show_default=True)
+@click.option("--output", type=click.File("w"), default="-", help="Where to write the JSONL results (default stdout).")
+@click.option("--events", is_flag=True, help="Also log the states visited, enqueued and ignored by every search.")
+@click.option("--cache", "cache_file", type=click.Path(dir_okay=False),
+              help="Keep results in this SQLite file, reusing them for repeated queries in later runs.")
+def main(queries: list[Query], terrain_map: Map, terrain_threshold: int,
+         success_map: Optional[Map], success_threshold: float, output, events: bool, cache_file: Optional[str]) -> None:
+    """Answers every query in a JSONL or CSV file, writing one JSON result per line as it is found.
+
+    \b
+    python batch.py queries.jsonl resources/terrain04.txt 500 --output results.jsonl
+    python batch.py queries.csv resources/terrain04.txt 200 --success-map resources/enemy04.txt --success-threshold 0.5
+    """
+    if not events:
+        set_sink(NullSink())
+
+    cache = None if cache_file is None else ResultCache(file_name= cache_file)
+
+    if success_map is None:
+        results = iter_shortest_paths_batch(queries, terrain_map, terrain_threshold, cache= cache)
+    else:
+        results = iter_shortest_safe_paths_batch(queries, terrain_map, terrain_threshold, success_map, success_threshold,
+                                                 cache)
+
+    found = 0
+    for query, result in zip(queries, results):
+        found += write_result(output, query, result)
+
+    log(f"Found {found} of {len(queries)} paths.")
+    if cache is not None:
+        info = cache.cache_info()
+        log(f"Cache: {info['hits']} hits ({info['subpath_hits']} from subpaths, {info['disk_hits']} from disk), "
+            f"{info['misses']} misses.")
+        cache.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,817 @@
+import asyncio
+import json
+import platform
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import click
+import numpy as np
+from datetime import datetime, timezone
+from events import log, using_sink, ENQUEUED, VISITED, NullSink
+from maps import read_map
+
+from grid import getGrid, getSafetyTable
+from heuristics import HEURISTICS
+from synthetic import TERRAIN_GENERATORS, makeEnemyHotspots, makeQueries, writeMap
+from methods import TIE_BREAKS
+from incremental import IncrementalPlanner, IncrementalSafePlanner
+from anytime import find_paths_anytime
+from parallel import CHUNK_SIZE, find_shortest_paths_parallel
+from pathfinding_task1 import MODES, find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+from server import PathService, send_request
+from tiles import TiledMap, write_tiled_map
+import kernels
+
+
+# The queries from the tests, as (name, start, goal, terrain file, terrain threshold, enemy file, success threshold).
+# Queries without an enemy file are Task 1 queries.
+QUERIES = [
+    ("world_01", (3, 2), (0, 3), "resources/terrain01.txt", 50, None, None),
+    ("world_03", (4, 1), (0, 3), "resources/terrain03.txt", 50, None, None),
+    ("world_04_large", (20, 80), (80, 40), "resources/terrain04.txt", 500, None, None),
+    ("world_05", (9, 3), (0, 8), "resources/terrain05.txt", 40, None, None),
+    ("world_02_enemy", (3, 3), (0, 3), "resources/terrain02.txt", 50, "resources/enemy02.txt", 0.6),
+    ("world_03_enemy", (4, 1), (0, 3), "resources/terrain03.txt", 50, "resources/enemy03.txt", 0.5),
+    ("world_04_enemy", (20, 80), (80, 40), "resources/terrain04.txt", 200, "resources/enemy04.txt", 0.5),
+]
+
+
+# An event sink that counts the search events by kind, instead of logging them.
+class EventCounter:
+
+    def __init__(self):
+        self.visited = 0
+        self.enqueued = 0
+
+    def record(self, kind: int, location, cost, p_success) -> None:
+        if kind == VISITED:
+            self.visited += 1
+        elif kind == ENQUEUED:
+            self.enqueued += 1
+
+
+
+# The synthetic benchmark suite. Each kind of terrain is generated at each size with the same seed,
+# a fixed set of queries is picked on it, and both searches answer every query.
+SIZES = (64, 128)
+QUERY_COUNT = 5
+TERRAIN_THRESHOLDS = {"hills": 400, "walls": 500, "maze": 500, "terraces": 400}
+SUCCESS_THRESHOLD = 0.3
+
+# The tiled map benchmark: the size of the synthetic map, and the tile sizes and cache sizes (in tiles) compared.
+TILED_MAP_SIZE = 512
+TILE_SIZES = (32, 128)
+CACHE_SIZES = (4, 16, 64)
+
+# The tie-breaking benchmark: the plateau maps it runs on, flat maps of a single value and terraces,
+# with the threshold of each.
+PLATEAU_THRESHOLDS = {"flat": 400, "terraces": TERRAIN_THRESHOLDS["terraces"]}
+
+# How many times each query is answered by each backend, the fastest time is reported.
+BACKEND_RUNS = 3
+
+# The startup benchmark: how many times each command is run, and the most importing astar.py may take.
+STARTUP_RUNS = 5
+IMPORT_BUDGET_MS = 50.0
+
+# The incremental benchmark: how many locations change between queries, and how many times.
+EDIT_BATCHES = (1, 5, 20)
+EDIT_ROUNDS = 20
+
+# The parallel benchmark: the worker counts compared, and how many queries on world_04_large's map each answers.
+PARALLEL_WORKERS = (1, 2, 4)
+PARALLEL_QUERIES = 256
+
+
+
+# Runs one search, returning its result, the number of nodes expanded and enqueued, and the time taken.
+# The mode and pruning only apply to Task 1 queries. Given a weight or epsilon the result also holds the bound achieved.
+def runQuery(start, goal, terrainMap, terrainThreshold, successMap, successThreshold, heuristic, mode="unidirectional",
+             pruning=False, weight=None, epsilon=None, tie_break="default"):
+
+    counter = EventCounter()
+    began = time.perf_counter()
+
+    with using_sink(counter):
+        if successMap is None:
+            result = find_shortest_path(start, goal, terrainMap, terrainThreshold, heuristic, mode= mode, pruning= pruning,
+                                        weight= weight, epsilon= epsilon, tie_break= tie_break)
+        else:
+            result = find_shortest_safe_path(start, goal, terrainMap, terrainThreshold, successMap, successThreshold, heuristic,
+                                             weight= weight, epsilon= epsilon, tie_break= tie_break)
+
+    return result, counter.visited, counter.enqueued, time.perf_counter() - began
+
+
+# Runs one search again under tracemalloc, returning the peak memory allocated during it in bytes.
+# Kept apart from the timed run since tracing slows the search down several times over.
+def measurePeakMemory(*arguments) -> int:
+
+    tracemalloc.start()
+    try:
+        runQuery(*arguments)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# The commit being benchmarked, if this is a git checkout.
+def getCommit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+
+@click.group()
+def main() -> None:
+    """Benchmarks for the Task 1 and Task 2 searches.
+
+    \b
+    python benchmark.py heuristics
+    python benchmark.py incremental --batch 1 --batch 5
+    python benchmark.py parallel --workers 1 --workers 2 --workers 4
+    python benchmark.py run --size 64 --size 256 --output results.json
+    python benchmark.py compare baseline.json results.json
+    """
+
+
+@main.command()
+@click.option("--heuristic", "heuristics", type=click.Choice(list(HEURISTICS)), multiple=True,
+              help="Heuristics to compare (default all).")
+def heuristics(heuristics) -> None:
+    """Compares the heuristics on the test queries, reporting path cost, nodes expanded and time."""
+
+    log(f"{'query':<16} {'heuristic':<10} {'cost':>7} {'expanded':>9} {'enqueued':>9} {'time (s)':>9}")
+
+    for name, start, goal, terrainFile, terrainThreshold, successFile, successThreshold in QUERIES:
+        terrainMap = read_map(terrainFile)
+        successMap = None if successFile is None else read_map(successFile)
+
+        for heuristicName in heuristics or HEURISTICS:
+            result, expanded, enqueued, elapsed = runQuery(start, goal, terrainMap, terrainThreshold,
+                                                           successMap, successThreshold, HEURISTICS[heuristicName])
+            log(f"{name:<16} {heuristicName:<10} {str(result[0]):>7} {expanded:>9} {enqueued:>9} {elapsed:>9.3f}")
+
+
+@main.command()
+@click.option("--size", "sizes", type=click.IntRange(min=4, max=4096), multiple=True,
+              help=f"Synthetic map sizes to include, up to 4096 (default {', '.join(map(str, SIZES))}).")
+@click.option("--queries", "queryCount", type=click.IntRange(min=1), default=QUERY_COUNT, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option("--heuristic", type=click.Choice(list(HEURISTICS)), default="manhattan", show_default=True)
+def modes(sizes, queryCount: int, seed: int, heuristic: str) -> None:
+    """Compares unidirectional and bidirectional Task 1 searches on the test queries and synthetic maps,
+    reporting the nodes expanded by each and the reduction."""
+
+    cases = getTask1Cases(sizes or SIZES, queryCount, seed)
+    log(f"{'query':<16} {'cost':>7} " + " ".join(f"{mode + ' expanded':>24} {'time (s)':>9}" for mode in MODES) + f" {'ratio':>6}")
+    totals = {mode: 0 for mode in MODES}
+
+    for name, start, goal, terrainMap, terrainThreshold in cases:
+        columns = []
+        expansions = {}
+        for mode in MODES:
+            result, expansions[mode], _, elapsed = runQuery(start, goal, terrainMap, terrainThreshold, None, None,
+                                                            HEURISTICS[heuristic], mode)
+            totals[mode] += expansions[mode]
+            columns.append(f"{expansions[mode]:>24} {elapsed:>9.3f}")
+
+        ratio = expansions["bidirectional"] / max(expansions["unidirectional"], 1)
+        log(f"{name:<16} {str(result[0]):>7} " + " ".join(columns) + f" {ratio:>6.2f}")
+
+    log(f"Bidirectional search expanded {totals['bidirectional'] / max(totals['unidirectional'], 1):.0%} "
+        f"of the nodes unidirectional search did.")
+
+
+@main.command()
+@click.option("--size", "sizes", type=click.IntRange(min=4, max=4096), multiple=True,
+              help=f"Synthetic map sizes to include, up to 4096 (default {', '.join(map(str, SIZES))}).")
+@click.option("--queries", "queryCount", type=click.IntRange(min=1), default=QUERY_COUNT, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option("--heuristic", type=click.Choice(list(HEURISTICS)), default="manhattan", show_default=True)
+def pruning(sizes, queryCount: int, seed: int, heuristic: str) -> None:
+    """Compares plain A* with A* jumping across uniform areas (see regions.py) on the test queries and synthetic maps,
+    reporting the nodes expanded by each and the reduction. Exits with status 1 if a cost ever differs."""
+
+    log(f"{'query':<16} {'cost':>7} {'plain expanded':>15} {'time (s)':>9} {'pruned expanded':>16} {'time (s)':>9} {'ratio':>6}")
+    totals = {False: 0, True: 0}
+    mismatches = 0
+
+    for name, start, goal, terrainMap, terrainThreshold in getTask1Cases(sizes or SIZES, queryCount, seed):
+        columns = []
+        costs = {}
+        expansions = {}
+        for pruned in (False, True):
+            result, expansions[pruned], _, elapsed = runQuery(start, goal, terrainMap, terrainThreshold, None, None,
+                                                              HEURISTICS[heuristic], pruning= pruned)
+            costs[pruned] = result[0]
+            totals[pruned] += expansions[pruned]
+            columns.append(f"{expansions[pruned]:>{15 + pruned}} {elapsed:>9.3f}")
+
+        mismatches += costs[False] != costs[True]
+        ratio = expansions[True] / max(expansions[False], 1)
+        log(f"{name:<16} {str(costs[False]):>7} " + " ".join(columns) + f" {ratio:>6.2f}"
+            + ("" if costs[False] == costs[True] else f"  <- cost {costs[True]}"))
+
+    log(f"Pruning expanded {totals[True] / max(totals[False], 1):.0%} of the nodes plain A* did.")
+    if mismatches:
+        raise SystemExit(1)
+
+
+@main.command()
+@click.option("--size", "sizes", type=click.IntRange(min=4, max=4096), multiple=True,
+              help=f"Synthetic map sizes to include, up to 4096 (default {', '.join(map(str, SIZES))}).")
+@click.option("--queries", "queryCount", type=click.IntRange(min=1), default=QUERY_COUNT, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option("--heuristic", type=click.Choice(list(HEURISTICS)), default="alt", show_default=True)
+@click.option("--bound", type=click.FloatRange(min=1.0), default=1.5, show_default=True,
+              help="The weight of weighted A*, and 1 + epsilon for focal search.")
+def bounded(sizes, queryCount: int, seed: int, heuristic: str, bound: float) -> None:
+    """Compares the lowest cost searches with weighted A* and focal search (see bounded.py) on the test queries
+    and synthetic maps, reporting the nodes expanded, the cost over the lowest cost and the bound each reported.
+    Exits with status 1 if a path ever costs more than the bound allows."""
+
+    cases = [(name, start, goal, terrainMap, terrainThreshold, None, None)
+             for name, start, goal, terrainMap, terrainThreshold in getTask1Cases(sizes or SIZES, queryCount, seed)]
+    cases += [(name, start, goal, read_map(terrainFile), terrainThreshold, read_map(successFile), successThreshold)
+              for name, start, goal, terrainFile, terrainThreshold, successFile, successThreshold in QUERIES
+              if successFile is not None]
+
+    searches = {"weighted": {"weight": bound}, "focal": {"epsilon": bound - 1}}
+    log(f"{'query':<16} {'cost':>7} {'expanded':>9} {'time (s)':>9} "
+        + " ".join(f"{name + ' expanded':>17} {'time (s)':>9} {'cost':>6} {'bound':>6}" for name in searches))
+    totals = {name: 0 for name in ("exact", *searches)}
+    violations = 0
+
+    for name, start, goal, terrainMap, terrainThreshold, successMap, successThreshold in cases:
+        arguments = (start, goal, terrainMap, terrainThreshold, successMap, successThreshold, HEURISTICS[heuristic])
+        result, expanded, _, elapsed = runQuery(*arguments)
+        totals["exact"] += expanded
+        line = f"{name:<16} {str(result[0]):>7} {expanded:>9} {elapsed:>9.3f}"
+
+        for search, options in searches.items():
+            found, expanded, _, elapsed = runQuery(*arguments, **options)
+            totals[search] += expanded
+            if result[0] is None or found[0] is None:
+                line += f" {expanded:>17} {elapsed:>9.3f} {'-':>6} {'-':>6}"
+                continue
+
+            ratio = found[0] / result[0] if result[0] else 1.0
+            violations += ratio > bound * (1 + 1e-9) or ratio > found[-1] * (1 + 1e-9)
+            line += f" {expanded:>17} {elapsed:>9.3f} {ratio:>6.3f} {found[-1]:>6.3f}"
+
+        log(line)
+
+    for search in searches:
+        log(f"{search.capitalize()} search expanded {totals[search] / max(totals['exact'], 1):.0%} of the nodes "
+            f"the lowest cost search did.")
+    if violations:
+        log(f"{violations} paths cost more than their bound")
+        raise SystemExit(1)
+
+
+
+@main.command()
+@click.option("--size", "sizes", type=click.IntRange(min=4, max=4096), multiple=True,
+              help=f"Synthetic map sizes to include, up to 4096 (default {', '.join(map(str, SIZES))}).")
+@click.option("--queries", "queryCount", type=click.IntRange(min=1), default=QUERY_COUNT, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option("--heuristic", type=click.Choice(list(HEURISTICS)), default="alt", show_default=True)
+@click.option("--deadline", type=click.FloatRange(min=0.0), help="Stop each anytime search after this many milliseconds.")
+def anytime(sizes, queryCount: int, seed: int, heuristic: str, deadline) -> None:
+    """Compares the anytime search (see anytime.py) with the lowest cost search on the Task 1 test queries and
+    synthetic maps, reporting when its first and last paths were found, how many times the lowest cost they cost
+    and how many paths it found in between. Exits with status 1 if a path ever costs more than its bound allows."""
+
+    log(f"{'query':<16} {'cost':>7} {'time (ms)':>10} {'first (ms)':>11} {'cost':>6} {'last (ms)':>10} {'cost':>6} "
+        f"{'bound':>6} {'paths':>6}")
+    totals = {"exact": 0.0, "first": 0.0}
+    violations = 0
+
+    for name, start, goal, terrainMap, terrainThreshold in getTask1Cases(sizes or SIZES, queryCount, seed):
+        # The heuristic is prepared once beforehand, so neither search is charged for it
+        runQuery(start, goal, terrainMap, terrainThreshold, None, None, HEURISTICS[heuristic])
+        result, _, _, elapsed = runQuery(start, goal, terrainMap, terrainThreshold, None, None, HEURISTICS[heuristic])
+        if result[0] is None:
+            continue
+
+        times = []
+        began = time.perf_counter()
+        with using_sink(EventCounter()):
+            for cost, _, bound in find_paths_anytime(start, goal, terrainMap, terrainThreshold, HEURISTICS[heuristic],
+                                                     deadline):
+                times.append((time.perf_counter() - began, cost / result[0] if result[0] else 1.0, bound))
+                violations += times[-1][1] > bound * (1 + 1e-9)
+
+        if not times:
+            log(f"{name:<16} {result[0]:>7} {elapsed * 1000:>10.1f} {'-':>11} {'-':>6} {'-':>10} {'-':>6} {'-':>6} {0:>6}")
+            continue
+
+        totals["exact"] += elapsed
+        totals["first"] += times[0][0]
+        log(f"{name:<16} {result[0]:>7} {elapsed * 1000:>10.1f} {times[0][0] * 1000:>11.1f} {times[0][1]:>6.3f} "
+            f"{times[-1][0] * 1000:>10.1f} {times[-1][1]:>6.3f} {times[-1][2]:>6.3f} {len(times):>6}")
+
+    log(f"The first paths took {totals['first'] / max(totals['exact'], 1e-9):.0%} of the time of the lowest cost search.")
+    if violations:
+        log(f"{violations} paths cost more than their bound")
+        raise SystemExit(1)
+
+
+# The Task 1 test queries and queries on every kind of synthetic map at each size,
+# as (name, start, goal, terrain map, terrain threshold).
+def getTask1Cases(sizes, queryCount: int, seed: int) -> list:
+
+    cases = [(name, start, goal, read_map(terrainFile), terrainThreshold)
+             for name, start, goal, terrainFile, terrainThreshold, successFile, _ in QUERIES if successFile is None]
+
+    for kind in TERRAIN_GENERATORS:
+        for size in sizes:
+            terrainMap = TERRAIN_GENERATORS[kind](size, seed)
+            queries = makeQueries(terrainMap, TERRAIN_THRESHOLDS[kind], queryCount, seed)
+            cases += [(f"{kind}-{size}/{index}", start, goal, terrainMap, TERRAIN_THRESHOLDS[kind])
+                      for index, (start, goal) in enumerate(queries)]
+
+    return cases
+
+
+@main.command()
+@click.option("--batch", "batches", type=click.IntRange(min=1), multiple=True,
+              help=f"Numbers of locations changed between queries (default {', '.join(map(str, EDIT_BATCHES))}).")
+@click.option("--rounds", type=click.IntRange(min=1), default=EDIT_ROUNDS, show_default=True,
+              help="How many batches of changes to make for each batch size.")
+@click.option("--seed", type=int, default=0, show_default=True)
+def incremental(batches, rounds: int, seed: int) -> None:
+    """Compares repairing a search after small batches of changes to terrain04 and enemy04 (see incremental.py)
+    with searching again from scratch, reporting the average time of each and the speedup.
+    Exits with status 1 if a repaired result ever differs from the search from scratch."""
+
+    rng = np.random.default_rng(seed)
+    mismatches = 0
+    log(f"{'query':<16} {'batch':>5} {'repaired (s)':>13} {'scratch (s)':>12} {'speedup':>8} {'expanded':>9} {'searched':>9}")
+
+    for name, start, goal, terrainFile, terrainThreshold, successFile, successThreshold in QUERIES:
+        if not name.startswith("world_04"):
+            continue
+
+        for batch in batches or EDIT_BATCHES:
+            terrainMap = read_map(terrainFile).astype(np.int64)
+            successMap = None if successFile is None else read_map(successFile).astype(np.int64)
+            arguments = (start, goal, terrainMap, terrainThreshold, successMap, successThreshold, HEURISTICS["manhattan"])
+
+            if successMap is None:
+                planner = IncrementalPlanner(start, goal, terrainMap, terrainThreshold)
+            else:
+                planner = IncrementalSafePlanner(start, goal, terrainMap, terrainThreshold, successMap, successThreshold)
+            with using_sink(EventCounter()):
+                planner.find_path()
+
+            # Only the repairs are counted, not the first search
+            counter = EventCounter()
+            repaired = scratch = 0.0
+            for _ in range(rounds):
+                changes = makeChanges(rng, terrainMap, batch, 1, 500)
+                successChanges = None if successMap is None else makeChanges(rng, successMap, batch, 0, 100)
+
+                began = time.perf_counter()
+                with using_sink(counter):
+                    planner.update_terrain(changes)
+                    if successChanges is not None:
+                        planner.update_success(successChanges)
+                    result = planner.find_path()
+                repaired += time.perf_counter() - began
+
+                expected, _, _, elapsed = runQuery(*arguments)
+                scratch += elapsed
+                mismatches += result[:-1] != expected[:-1]
+
+            searched = "-" if successMap is None else f"{planner.searches - 1}/{rounds}"
+            log(f"{name:<16} {batch:>5} {repaired / rounds:>13.4f} {scratch / rounds:>12.4f} "
+                f"{scratch / max(repaired, 1e-9):>7.1f}x {counter.visited / rounds:>9.0f} {searched:>9}")
+
+    if mismatches:
+        log(f"{mismatches} repaired results differed from the search from scratch")
+        raise SystemExit(1)
+
+
+# Picks count random locations of a map and gives each a random value from low to high, writing them into the map too.
+# Returns the changes as (location, value) pairs.
+def makeChanges(rng, map, count: int, low: int, high: int) -> list:
+
+    rows = rng.integers(0, map.shape[0], count)
+    cols = rng.integers(0, map.shape[1], count)
+    values = rng.integers(low, high + 1, count)
+    map[rows, cols] = values
+
+    return [((int(row), int(col)), int(value)) for row, col, value in zip(rows, cols, values)]
+
+
+@main.command()
+@click.option("--size", "sizes", type=click.IntRange(min=4, max=4096), multiple=True,
+              help=f"Map sizes to run, up to 4096 (default {', '.join(map(str, SIZES))}).")
+@click.option("--kind", "kinds", type=click.Choice(list(TERRAIN_GENERATORS)), multiple=True, help="Terrain kinds (default all).")
+@click.option("--queries", "queryCount", type=click.IntRange(min=1), default=QUERY_COUNT, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option("--task", "tasks", type=click.Choice(["1", "2"]), multiple=True, help="Tasks to run (default both).")
+@click.option("--heuristic", type=click.Choice(list(HEURISTICS)), default="manhattan", show_default=True)
+@click.option("--mode", type=click.Choice(MODES), default="unidirectional", show_default=True, help="The Task 1 search mode.")
+@click.option("--memory/--no-memory", default=True, show_default=True, help="Also measure the peak memory of each search.")
+@click.option("--output", type=click.Path(dir_okay=False, writable=True), help="Save the results as JSON.")
+def run(sizes, kinds, queryCount: int, seed: int, tasks, heuristic: str, mode: str, memory: bool, output) -> None:
+    """Runs the searches over synthetic maps, reporting time, nodes expanded and enqueued and peak memory."""
+
+    results = []
+    log(f"{'map':<12} {'task':>4} {'query':>5} {'cost':>9} {'expanded':>9} {'enqueued':>9} {'time (s)':>9} {'peak (KB)':>10}")
+
+    for kind in kinds or TERRAIN_GENERATORS:
+        for size in sizes or SIZES:
+            terrainMap = TERRAIN_GENERATORS[kind](size, seed)
+            successMap = makeEnemyHotspots(size, seed)
+            terrainThreshold = TERRAIN_THRESHOLDS[kind]
+            queries = makeQueries(terrainMap, terrainThreshold, queryCount, seed)
+
+            # The precomputed grid is shared by every query on a map, so it is built (and timed) once up front
+            began = time.perf_counter()
+            getGrid(terrainMap, terrainThreshold)
+            getSafetyTable(successMap)
+            log(f"{kind}-{size}: precomputed in {time.perf_counter() - began:.3f}s")
+
+            for task in tasks or ("1", "2"):
+                taskSuccessMap = successMap if task == "2" else None
+
+                for index, (start, goal) in enumerate(queries):
+                    arguments = (start, goal, terrainMap, terrainThreshold, taskSuccessMap, SUCCESS_THRESHOLD, HEURISTICS[heuristic], mode)
+                    result, expanded, enqueued, elapsed = runQuery(*arguments)
+                    peak = measurePeakMemory(*arguments) if memory else None
+
+                    results.append({"kind": kind, "size": size, "seed": seed, "task": int(task), "query": index,
+                                    "start": start, "goal": goal, "heuristic": heuristic, "mode": mode,
+                                    "cost": None if result[0] is None else int(result[0]),
+                                    "expanded": expanded, "enqueued": enqueued, "time": elapsed, "peak_bytes": peak})
+                    log(f"{kind + '-' + str(size):<12} {task:>4} {index:>5} {str(results[-1]['cost']):>9} {expanded:>9} "
+                        f"{enqueued:>9} {elapsed:>9.3f} {'-' if peak is None else peak // 1024:>10}")
+
+    if output:
+        with open(output, "w") as file:
+            json.dump({"created": datetime.now(timezone.utc).isoformat(), "commit": getCommit(),
+                       "python": platform.python_version(), "results": results}, file, indent=1)
+        log(f"Saved {len(results)} results to {output}")
+
+
+@main.command()
+@click.argument("baseline", type=click.File())
+@click.argument("current", type=click.File())
+@click.option("--tolerance", type=click.FloatRange(min=0.0), default=0.2, show_default=True,
+              help="Flag queries that got slower, or expanded more nodes, by more than this fraction.")
+def compare(baseline, current, tolerance: float) -> None:
+    """Compares two saved benchmark runs query by query. Exits with status 1 if anything regressed."""
+
+    key = lambda record: (record["kind"], record["size"], record["seed"], record["task"], record["query"])
+    before = {key(record): record for record in json.load(baseline)["results"]}
+
+    regressions = 0
+    log(f"{'map':<12} {'task':>4} {'query':>5} {'time':>15} {'expanded':>19} {'cost':>5}")
+
+    for record in json.load(current)["results"]:
+        old = before.get(key(record))
+        if old is None:
+            continue
+
+        timeRatio = record["time"] / max(old["time"], 1e-9)
+        expandedRatio = record["expanded"] / max(old["expanded"], 1)
+        costChanged = record["cost"] != old["cost"]
+        flagged = costChanged or timeRatio > 1 + tolerance or expandedRatio > 1 + tolerance
+        regressions += flagged
+
+        log(f"{record['kind'] + '-' + str(record['size']):<12} {record['task']:>4} {record['query']:>5} "
+            f"{old['time']:>6.3f}->{record['time']:<6.3f} {old['expanded']:>8}->{record['expanded']:<8} "
+            f"{'CHANGED' if costChanged else 'same':>5}{'  <- regression' if flagged else ''}")
+
+    log(f"{regressions} regressions")
+    if regressions:
+        raise SystemExit(1)
+
+
+@main.command()
+@click.option("--requests", "requestCount", type=click.IntRange(min=1), default=200, show_default=True)
+@click.option("--concurrency", type=click.IntRange(min=1), default=16, show_default=True,
+              help="How many requests are sent at once.")
+@click.option("--workers", type=click.IntRange(min=1), default=None, help="Worker processes (default one per core).")
+@click.option("--cli-runs", type=click.IntRange(min=0), default=5, show_default=True,
+              help="How many times to run the Task 1 CLI on world_04_large for comparison.")
+def service(requestCount: int, concurrency: int, workers, cli_runs: int) -> None:
+    """Sends the test queries to a local query service (see server.py) over HTTP, reporting its throughput and
+    latency percentiles, and compares them with answering the same Task 1 query by running the CLI each time."""
+
+    maps = {}
+    bodies = []
+    for name, start, goal, terrainFile, terrainThreshold, successFile, successThreshold in QUERIES:
+        maps[terrainFile] = read_map(terrainFile)
+        body = {"map": terrainFile, "start": start, "goal": goal, "threshold": terrainThreshold}
+        if successFile is not None:
+            maps[successFile] = read_map(successFile)
+            body.update(success_map=successFile, success_threshold=successThreshold)
+        bodies.append(("/task1" if successFile is None else "/task2", body))
+
+    async def run() -> tuple[float, dict]:
+        server = await pathService.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        waiting = asyncio.Semaphore(concurrency)
+
+        async def send(index: int) -> int:
+            target, body = bodies[index % len(bodies)]
+            async with waiting:
+                status, _ = await send_request("POST", target, body, port=port)
+            return status
+
+        async with server:
+            began = time.perf_counter()
+            statuses = await asyncio.gather(*(send(index) for index in range(requestCount)))
+            elapsed = time.perf_counter() - began
+
+        failures = sum(status != 200 for status in statuses)
+        return elapsed, failures
+
+    pathService = PathService(maps, [(body["map"], body["threshold"]) for _, body in bodies], workers)
+    try:
+        elapsed, failures = asyncio.run(run())
+        metrics = pathService.metrics()
+    finally:
+        pathService.close()
+
+    log(f"{requestCount} requests in {elapsed:.2f}s ({requestCount / elapsed:.1f} requests/s) "
+        f"with {pathService.workers} workers, {failures} failed.")
+    for endpoint in ("/task1", "/task2"):
+        latency = metrics["endpoints"][endpoint]["latency_ms"]
+        log(f"{endpoint}: " + ", ".join(f"{name} {value:.1f}ms" for name, value in latency.items()))
+
+    if cli_runs:
+        name, start, goal, terrainFile, terrainThreshold, _, _ = QUERIES[2]
+        command = [sys.executable, "pathfinding_task1.py", ",".join(map(str, start)), ",".join(map(str, goal)),
+                   terrainFile, str(terrainThreshold), "--quiet"]
+        began = time.perf_counter()
+        for _ in range(cli_runs):
+            subprocess.run(command, capture_output=True, check=True)
+        log(f"The Task 1 CLI took {(time.perf_counter() - began) / cli_runs * 1000:.1f}ms per run on {name}.")
+
+    if failures:
+        raise SystemExit(1)
+
+
+@main.command()
+@click.option("--workers", "workerCounts", type=click.IntRange(min=1), multiple=True,
+              help=f"Worker counts to compare (default {', '.join(map(str, PARALLEL_WORKERS))}).")
+@click.option("--queries", "queryCount", type=click.IntRange(min=1), default=PARALLEL_QUERIES, show_default=True)
+@click.option("--chunk-size", type=click.IntRange(min=1), default=CHUNK_SIZE, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+def parallel(workerCounts, queryCount: int, chunk_size: int, seed: int) -> None:
+    """Answers random Task 1 queries on world_04_large's map in one process, then across pools of each number of
+    worker processes (see parallel.py), reporting the throughput and the speedup over the single process."""
+
+    name, _, _, terrainFile, terrainThreshold, _, _ = QUERIES[2]
+    terrainMap = read_map(terrainFile)
+    queries = makeQueries(terrainMap, terrainThreshold, queryCount, seed)
+
+    began = time.perf_counter()
+    with using_sink(NullSink()):
+        expected = [find_shortest_path(start, goal, terrainMap, terrainThreshold) for start, goal in queries]
+    serial = time.perf_counter() - began
+
+    log(f"{queryCount} queries on {name}")
+    log(f"{'workers':>8} {'time (s)':>9} {'queries/s':>10} {'speedup':>8}")
+    log(f"{'serial':>8} {serial:>9.3f} {queryCount / serial:>10.1f} {1.0:>8.2f}")
+
+    mismatches = 0
+    for workers in workerCounts or PARALLEL_WORKERS:
+        began = time.perf_counter()
+        results = find_shortest_paths_parallel(queries, terrainMap, terrainThreshold, workers= workers, chunk_size= chunk_size)
+        elapsed = time.perf_counter() - began
+
+        mismatches += sum(result[0] != answer[0] for result, answer in zip(results, expected))
+        log(f"{workers:>8} {elapsed:>9.3f} {queryCount / elapsed:>10.1f} {serial / elapsed:>8.2f}")
+
+    if mismatches:
+        log(f"{mismatches} parallel results differ in cost from the single process.")
+        raise SystemExit(1)
+
+@main.command()
+@click.option("--size", "sizes", type=click.IntRange(min=4, max=4096), multiple=True,
+              help=f"Synthetic map sizes to include, up to 4096 (default {', '.join(map(str, SIZES))}).")
+@click.option("--queries", "queryCount", type=click.IntRange(min=1), default=QUERY_COUNT, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option("--heuristic", type=click.Choice(list(HEURISTICS)), default="alt", show_default=True)
+def tiebreaks(sizes, queryCount: int, seed: int, heuristic: str) -> None:
+    """Answers Task 1 and Task 2 queries on plateau maps (flat maps and terraces) with each tie-breaking policy
+    (see methods.TIE_BREAKS), reporting the nodes expanded by each policy per map. Ties on f are common only when
+    the heuristic is close to the true cost, as alt and scaled are on these maps. Exits with status 1 if a policy
+    ever finds a different cost, or a different path when run twice."""
+
+    log(f"{'map':<16} {'task':<5} " + " ".join(f"{policy:>9}" for policy in TIE_BREAKS))
+    totals = {policy: 0 for policy in TIE_BREAKS}
+    mismatches = 0
+
+    for size in sizes or SIZES:
+        maps = {"flat": np.ones((size, size), dtype=np.int64), "terraces": TERRAIN_GENERATORS["terraces"](size, seed)}
+        successMap = makeEnemyHotspots(size, seed)
+
+        for kind, terrainMap in maps.items():
+            queries = makeQueries(terrainMap, PLATEAU_THRESHOLDS[kind], queryCount, seed)
+            for task, success in (("1", None), ("2", successMap)):
+                expanded = {policy: 0 for policy in TIE_BREAKS}
+
+                for start, goal in queries:
+                    arguments = (start, goal, terrainMap, PLATEAU_THRESHOLDS[kind], success,
+                                 None if success is None else SUCCESS_THRESHOLD, HEURISTICS[heuristic])
+                    expected = runQuery(*arguments)[0]
+                    for policy in TIE_BREAKS:
+                        result, visited, _, _ = runQuery(*arguments, tie_break= policy)
+                        mismatches += result[0] != expected[0] or runQuery(*arguments, tie_break= policy)[0] != result
+                        expanded[policy] += visited
+
+                for policy in TIE_BREAKS:
+                    totals[policy] += expanded[policy]
+                log(f"{f'{kind}-{size}':<16} {task:<5} " + " ".join(f"{expanded[policy]:>9}" for policy in TIE_BREAKS))
+
+    log(", ".join(f"{policy} expanded {totals[policy] / max(totals['default'], 1):.0%}" for policy in TIE_BREAKS)
+        + " of the nodes default did.")
+    if mismatches:
+        log(f"{mismatches} results differed")
+        raise SystemExit(1)
+
+
+@main.command()
+@click.option("--runs", type=click.IntRange(min=1), default=BACKEND_RUNS, show_default=True)
+def backends(runs: int) -> None:
+    """Answers the test queries with each backend (see kernels.py), reporting the fastest time of each
+    and the expansions per second. The first numba run of each task includes compiling it, and is left out.
+    Exits with status 1 if the backends ever find different paths."""
+
+    if not kernels.NUMBA_AVAILABLE:
+        log("Numba is not installed, so the numba backend falls back to the python backend.")
+
+    log(f"{'query':<16} {'expansions':>11} " + " ".join(f"{backend + ' (ms)':>12}" for backend in kernels.BACKENDS)
+        + f" {'speedup':>8} {'M/s':>6}")
+    mismatches = 0
+
+    for name, start, goal, terrainFile, terrainThreshold, successFile, successThreshold in QUERIES:
+        terrainMap = read_map(terrainFile)
+        successMap = None if successFile is None else read_map(successFile)
+        results = {}
+        times = {}
+
+        for backend in kernels.BACKENDS:
+            elapsed = []
+            for _ in range(runs + 1):
+                began = time.perf_counter()
+                with using_sink(NullSink()):
+                    if successMap is None:
+                        results[backend] = find_shortest_path(start, goal, terrainMap, terrainThreshold, backend= backend)
+                    else:
+                        results[backend] = find_shortest_safe_path(start, goal, terrainMap, terrainThreshold, successMap,
+                                                                   successThreshold, backend= backend)
+                elapsed.append(time.perf_counter() - began)
+            times[backend] = min(elapsed[1:])
+
+        mismatches += results["numba"] != results["python"]
+        expansions = runQuery(start, goal, terrainMap, terrainThreshold, successMap, successThreshold,
+                              HEURISTICS["manhattan"])[1]
+        log(f"{name:<16} {expansions:>11} " + " ".join(f"{times[backend] * 1000:>12.2f}" for backend in kernels.BACKENDS)
+            + f" {times['python'] / times['numba']:>8.2f} {expansions / times['numba'] / 1e6:>6.2f}")
+
+    if mismatches:
+        log(f"{mismatches} queries found different paths")
+        raise SystemExit(1)
+
+
+@main.command()
+@click.option("--size", type=click.IntRange(min=4, max=16384), default=TILED_MAP_SIZE, show_default=True)
+@click.option("--queries", "queryCount", type=click.IntRange(min=1), default=QUERY_COUNT, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+def tiles(size: int, queryCount: int, seed: int) -> None:
+    """Answers Task 1 queries on a synthetic walls map held in memory, then read from tiled files (see tiles.py)
+    with each tile size and cache size, reporting the time taken, the peak memory of the first query,
+    the tile hit rate and the bytes read. Exits with status 1 if a tiled map ever gives a different cost."""
+
+    terrainThreshold = TERRAIN_THRESHOLDS["walls"]
+    terrainMap = TERRAIN_GENERATORS["walls"](size, seed)
+    queries = makeQueries(terrainMap, terrainThreshold, queryCount, seed)
+    mismatches = 0
+
+    # The peak memory of the first query is measured first, so the in-memory grid is built within it
+    def measure(map) -> tuple[list, float, int]:
+        tracemalloc.start()
+        try:
+            runQuery(*queries[0], map, terrainThreshold, None, None, HEURISTICS["manhattan"])
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        if getattr(map, "tiled", False):
+            map.resetStats()
+        began = time.perf_counter()
+        costs = [runQuery(start, goal, map, terrainThreshold, None, None, HEURISTICS["manhattan"])[0][0]
+                 for start, goal in queries]
+        return costs, time.perf_counter() - began, peak
+
+    log(f"{'map':<24} {'time (ms)':>10} {'peak (MB)':>10} {'hit rate':>9} {'misses':>8} {'read (MB)':>10}")
+    expected, elapsed, peak = measure(terrainMap)
+    log(f"{f'in memory {size}x{size}':<24} {elapsed * 1000:>10.1f} {peak / 2**20:>10.1f} {'-':>9} {'-':>8} {'-':>10}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        for tileSize in TILE_SIZES:
+            fileName = os.path.join(folder, f"walls-{tileSize}.tiles")
+            write_tiled_map(terrainMap, fileName, tileSize)
+
+            for cacheTiles in CACHE_SIZES:
+                tiledMap = TiledMap(fileName, cache_tiles=cacheTiles)
+                costs, elapsed, peak = measure(tiledMap)
+                mismatches += costs != expected
+
+                stats = tiledMap.tileStats()
+                hitRate = stats["hits"] / max(stats["hits"] + stats["misses"], 1)
+                log(f"{f'tiles {tileSize}, cache {cacheTiles}':<24} {elapsed * 1000:>10.1f} {peak / 2**20:>10.1f} "
+                    f"{hitRate:>9.2%} {stats['misses']:>8} {stats['bytes_read'] / 2**20:>10.1f}")
+
+    if mismatches:
+        log(f"{mismatches} tiled maps gave different costs")
+        raise SystemExit(1)
+
+
+@main.command()
+@click.option("--runs", type=click.IntRange(min=1), default=STARTUP_RUNS, show_default=True,
+              help="How many times each command is run, the median time is reported.")
+@click.option("--budget", type=click.FloatRange(min=0.0), default=IMPORT_BUDGET_MS, show_default=True,
+              help="The most milliseconds importing astar.py (and so tiny.py) may take.")
+def startup(runs: int, budget: float) -> None:
+    """Measures how long the command line tools take to start: the import time of each entry point, and the
+    time of whole runs of the scripts and of astar.py on a tiny map (answered without NumPy) and on a large one.
+    Exits with status 1 if importing astar.py imports NumPy or click, or takes longer than the budget."""
+
+    failures = 0
+    log(f"{'module':<24} {'import (ms)':>12} {'imports numpy/click':>20}")
+    for module in ("astar", "pathfinding_task1", "safe_pathfinding_task2", "batch"):
+        milliseconds, heavy = measureImport(module, runs)
+        log(f"{module:<24} {milliseconds:>12.1f} {', '.join(heavy) or '-':>20}")
+        if module == "astar" and (heavy or milliseconds > budget):
+            failures += 1
+
+    task1 = ["3,2", "0,3", "resources/terrain01.txt", "50", "--quiet"]
+    task2 = ["4,1", "0,3", "resources/terrain03.txt", "50", "resources/enemy03.txt", "0.5", "--quiet"]
+    commands = [("pathfinding_task1.py", ["pathfinding_task1.py"] + task1),
+                ("astar task1", ["-m", "astar", "task1"] + task1),
+                ("safe_pathfinding_task2.py", ["safe_pathfinding_task2.py"] + task2),
+                ("astar task2", ["-m", "astar", "task2"] + task2),
+                ("astar task1 (world 04)", ["-m", "astar", "task1", "20,80", "80,40", "resources/terrain04.txt", "500",
+                                            "--quiet"]),
+                ("pathfinding_task1.py --help", ["pathfinding_task1.py", "--help"]),
+                ("astar --help", ["-m", "astar", "--help"])]
+
+    log(f"{'command':<28} {'run (ms)':>9}")
+    for name, arguments in commands:
+        times = []
+        for _ in range(runs):
+            began = time.perf_counter()
+            subprocess.run([sys.executable] + arguments, capture_output=True, check=True)
+            times.append(time.perf_counter() - began)
+        log(f"{name:<28} {np.median(times) * 1000:>9.1f}")
+
+    if failures:
+        log(f"Importing astar.py took more than {budget}ms or imported NumPy or click")
+        raise SystemExit(1)
+
+
+# Imports a module in a new interpreter, runs times, returning the median of its cumulative import time
+# in ms (as reported by -X importtime) and which of NumPy and click it imported.
+def measureImport(module: str, runs: int) -> tuple[float, list[str]]:
+
+    check = f"import sys, {module}; print(' '.join(name for name in ('numpy', 'click') if name in sys.modules))"
+    times = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", check], capture_output=True, text=True,
+                                check=True)
+        line = [line for line in result.stderr.splitlines() if line.rstrip().endswith(f"| {module}")][-1]
+        times.append(int(line.split("|")[1]) / 1000)
+
+    return float(np.median(times)), result.stdout.split()
+
+@main.command()
+@click.argument("kind", type=click.Choice(list(TERRAIN_GENERATORS)))
+@click.argument("size", type=click.IntRange(min=4, max=4096))
+@click.argument("terrain_file", type=click.Path(dir_okay=False, writable=True))
+@click.option("--enemy-file", type=click.Path(dir_okay=False, writable=True), help="Also write an enemy presence map.")
+@click.option("--seed", type=int, default=0, show_default=True)
+def generate(kind: str, size: int, terrain_file: str, enemy_file, seed: int) -> None:
+    """Writes a synthetic map in the same text format as resources/terrain04.txt."""
+
+    writeMap(terrain_file, TERRAIN_GENERATORS[kind](size, seed), f"{kind} {size}x{size} seed {seed}")
+    if enemy_file:
+        writeMap(enemy_file, makeEnemyHotspots(size, seed), f"enemy {size}x{size} seed {seed}")
+
+if __name__ == '__main__':
+    main()
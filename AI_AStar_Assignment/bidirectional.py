@@ -0,0 +1,163 @@
+import sys
+from array import array
+from typing import Optional
+from events import log_enqueue_state, log_ignore_state, log_visit_state
+from grid import Grid
+from maps import Location
+from stats import SearchStats, make_frontier
+
+
+# Cost recorded for locations a search has not reached.
+UNREACHED = -1
+
+
+# One direction of the bidirectional search: its frontier, and the cheapest known cost and previous
+# location on the way from its origin (the start or the goal) to every location.
+# estimate is the heuristic towards the far end, reverseEstimate the heuristic back towards the origin.
+class SearchSide:
+
+    __slots__ = ("frontier", "cost", "parent", "estimate", "reverseEstimate", "tieBreak")
+
+    def __init__(self, grid: Grid, origin: Location, estimate, reverseEstimate, stats: Optional[SearchStats]):
+        size = grid.rowSize * grid.colSize
+        self.frontier = make_frontier(stats)
+        self.cost = array("q", [UNREACHED]) * size
+        self.parent = array("i", [-1]) * size
+        self.estimate = estimate
+        self.reverseEstimate = reverseEstimate
+        self.tieBreak = 0
+
+        originCell = grid.cell(origin)
+        self.cost[originCell] = 0
+        self.frontier.push(originCell, (self.key(origin, 0), 0), None)
+
+
+    # The frontier priority of reaching location at cost g, twice g plus the balanced potential (see searchBidirectional).
+    def key(self, location: Location, g: int) -> int:
+        return 2 * g + self.estimate(location) - self.reverseEstimate(location)
+
+
+    # The lowest priority in the frontier.
+    def lowestKey(self) -> int:
+        return self.frontier.heap[0][0][0]
+
+
+    # Approximate memory held by this side, in bytes.
+    def nbytes(self) -> int:
+        heap = self.frontier.heap
+        return (self.cost.itemsize * len(self.cost) + self.parent.itemsize * len(self.parent) + sys.getsizeof(heap)
+                + sys.getsizeof(self.frontier.position) + len(heap) * sys.getsizeof([None, None, None]))
+
+
+    # The locations from the origin of this side to cell, starting at the origin.
+    def pathTo(self, grid: Grid, cell: int) -> list[Location]:
+        path = []
+        while cell >= 0:
+            path.append(grid.location(cell))
+            cell = self.parent[cell]
+
+        path.reverse()
+        return path
+
+
+
+# Bidirectional A* for question 1.
+# Move costs are symmetric (both cell values added together) and so is passability, so the cheapest path
+# from the goal back to the start is the cheapest path reversed. One A* search runs forwards from the start
+# towards the goal and another backwards from the goal towards the start, each step expanding the side with
+# the smaller frontier. Every time a location is reached more cheaply from one side and the other side has
+# also reached it, the two halves make a complete path, and the cheapest of these is kept.
+#
+# Each side is ordered by the balanced potential p(n) = (hGoal(n) - hStart(n)) / 2 rather than its own heuristic,
+# the forward side by g + p(n) and the backward side by g - p(n) (both doubled to stay in whole numbers).
+# With consistent heuristics this is Dijkstra's algorithm on move costs adjusted by p, which are never negative
+# in either direction, so the classic bidirectional Dijkstra stopping rule holds: once the lowest priorities of the
+# two frontiers add up to twice the cost of the best path found, no cheaper path remains. Locations whose
+# g + h already reaches that cost are not placed in the frontier at all.
+# The two searches meet roughly halfway, so on long queries they expand two small balls of nodes
+# rather than one large one. Ordering each side by its own f instead would only allow stopping once
+# either f reaches the best cost, by which time the two searches have usually passed through each other.
+def searchBidirectional(start: Location, goal: Location, grid: Grid, heuristic,
+                        logEvents: bool, stats: Optional[SearchStats]) -> tuple[Optional[int],Optional[list[Location]]]:
+
+    toGoal = heuristic(grid, goal)
+    toStart = heuristic(grid, start)
+    forward = SearchSide(grid, start, toGoal, toStart, stats)
+    backward = SearchSide(grid, goal, toStart, toGoal, stats)
+    if stats is not None:
+        stats.track(None, None)
+    if logEvents:
+        log_enqueue_state(start, 0)
+        log_enqueue_state(goal, 0)
+
+    neighbour = grid.neighbour
+    moveCost = grid.moveCost
+
+    # The cheapest complete path found so far, and the location where its two halves meet.
+    bestCost = None
+    meeting = -1
+    if start == goal:
+        bestCost, meeting = 0, grid.cell(start)
+
+    while len(forward.frontier) > 0 and len(backward.frontier) > 0:
+
+        if bestCost is not None and forward.lowestKey() + backward.lowestKey() >= 2 * bestCost:
+            break
+
+        side, other = (forward, backward) if len(forward.frontier) <= len(backward.frontier) else (backward, forward)
+
+        cell, _, _ = side.frontier.pop()
+        cost = side.cost[cell]
+        if logEvents:
+            log_visit_state(grid.location(cell), cost)
+        if stats is not None:
+            stats.expansions += 1
+
+        for index in range(cell * 4, cell * 4 + 4):
+            target = neighbour[index]
+            if target < 0:
+                continue
+
+            g = cost + moveCost[index]
+            if stats is not None:
+                stats.generated += 1
+
+            # Only a cheaper way to a location, that could still lead to a cheaper complete path, is worth placing.
+            known = side.cost[target]
+            if known != UNREACHED and g >= known:
+                if logEvents:
+                    log_ignore_state(grid.location(target), g)
+                if stats is not None:
+                    stats.ignored += 1
+                continue
+
+            location = grid.location(target)
+            if bestCost is not None and g + side.estimate(location) >= bestCost:
+                if logEvents:
+                    log_ignore_state(location, g)
+                if stats is not None:
+                    stats.ignored += 1
+                continue
+
+            side.cost[target] = g
+            side.parent[target] = cell
+            side.tieBreak += 1
+            side.frontier.push(target, (side.key(location, g), side.tieBreak), None)
+            if logEvents:
+                log_enqueue_state(location, g)
+
+            # The other side has reached this location too, so together they make a complete path.
+            otherCost = other.cost[target]
+            if otherCost != UNREACHED and (bestCost is None or g + otherCost < bestCost):
+                bestCost = g + otherCost
+                meeting = target
+
+    if stats is not None:
+        stats.bytesAllocated = sum(side.nbytes() for side in (forward, backward))
+
+    if bestCost is None:
+        return None, None
+
+    # The forward half ends at the meeting location and the backward half starts there.
+    path = forward.pathTo(grid, meeting) + backward.pathTo(grid, meeting)[-2::-1]
+    return bestCost, path
@@ -0,0 +1,69 @@
+from itertools import chain
+from typing import Iterable, Optional
+from nodepool import NodePool
+from openset import FocalSet
+from stats import SearchStats, make_frontier
+
+
+# Bounded suboptimal search for both tasks: a path that may cost more than the cheapest, but by at most a known factor,
+# found by expanding far fewer nodes. find_shortest_path and find_shortest_safe_path take one of
+#
+#   weight   weighted A*: the heuristic is multiplied by weight (at least 1) in the frontier priority,
+#            so the search heads for the goal more greedily. The path costs at most weight times the cheapest.
+#            For Task 1 no location is explored twice, as a cheaper path found to an explored location would
+#            explore everything after it again, often many times over, and the bound holds without it.
+#            Task 2 keeps every label that is not dominated, and taking them out of order of f leaves far more
+#            of them undominated, so with a good heuristic (such as "alt") it can expand more than the lowest cost
+#            search. Focal search suits Task 2 better.
+#   epsilon  focal search (see openset.FocalSet): among the nodes whose f is within 1 + epsilon times the lowest f,
+#            the one the search prefers is expanded: for Task 1 the one with the lowest heuristic, for Task 2 the
+#            safest, which dominates the most other labels (equally safe ones in order of f, as heading
+#            greedily for the goal multiplies the labels as weighted A* does).
+#            The path costs at most 1 + epsilon times the cheapest.
+#
+# Both guarantees need an admissible and consistent heuristic, which all of those in heuristics.py are.
+# A search finishing with a path also reports the bound it actually achieved: its cost divided by the lowest f
+# left in the frontier, which no path to the goal can cost less than, or the bound asked for if that is lower.
+
+
+# Checks the weight and epsilon given to a search, returning the weight to multiply the heuristic by (1 unless
+# weighted A* is asked for). Raises ValueError for values that give no guarantee or if both are given.
+def getWeight(weight: Optional[float], epsilon: Optional[float]) -> float:
+
+    if weight is not None and epsilon is not None:
+        raise ValueError("Give either a weight (weighted A*) or an epsilon (focal search), not both")
+    if weight is not None and not weight >= 1:
+        raise ValueError(f"The weight must be at least 1, not {weight}")
+    if epsilon is not None and not epsilon >= 0:
+        raise ValueError(f"Epsilon must be at least 0, not {epsilon}")
+
+    return 1 if weight is None else weight
+
+
+# The frontier of a search: a focal list when epsilon is given, otherwise the usual one (see stats.make_frontier).
+# Within the focal list the node with the lowest secondary value (a function of the node) is expanded first.
+def makeBoundedFrontier(epsilon: Optional[float], secondary, stats: Optional[SearchStats]):
+
+    if epsilon is None:
+        return make_frontier(stats)
+
+    return FocalSet(1 + epsilon, secondary, make_frontier(stats))
+
+
+# The bound achieved by a path of cost found by a bounded search: cost over the lowest g + h left in the frontier
+# (or the cost itself if lower), which is a lower bound on the cost of the cheapest path.
+# Weighted A* does not explore a location twice, so the nodes of cheaper paths it found to explored locations
+# (reached) are counted too, as in ARA* (Likhachev, Gordon and Thrun).
+def getAchievedBound(pool: NodePool, frontier, cost: int, weight: Optional[float], epsilon: Optional[float],
+                     reached: Iterable[int] = ()) -> float:
+
+    g = pool.g
+    h = pool.h
+    nodes = chain((entry[2] for entry in frontier.heap), reached)
+    lowest = min((g[node] + h[node] for node in nodes), default=cost)
+    lowest = min(lowest, cost)
+
+    guaranteed = 1 + epsilon if weight is None else weight
+    if cost == 0:
+        return 1.0
+    return min(cost / lowest, guaranteed) if lowest > 0 else guaranteed
@@ -0,0 +1,204 @@
+import os
+import click
+import numpy as np
+from array import array
+from collections import OrderedDict
+from typing import Optional
+from events import log
+from grid import Grid, getCached, getGrid, getMapKey
+from maps import Location, Map, read_map
+from openset import OpenSet
+from parsing import parse_location
+
+
+# Cost recorded for locations that cannot reach the goal.
+UNREACHABLE = -1
+
+# How many distance fields build_distance_field keeps for reuse.
+FIELD_CACHE_SIZE = 32
+
+
+# The cheapest path cost from every location to one goal, with the next step to take towards it.
+# Move costs are symmetric (both cell values added together) and so is passability, so a single
+# Dijkstra search outwards from the goal gives the answer for every start location at once.
+class DistanceField:
+
+    __slots__ = ("grid", "goal", "cost", "next")
+
+    def __init__(self, grid: Grid, goal: Location, cost: array, next: array):
+        self.grid = grid
+        self.goal = goal
+        self.cost = cost
+        self.next = next
+
+
+    # The cost of the cheapest path from every location to the goal as a (rows, cols) NumPy array,
+    # UNREACHABLE where the goal cannot be reached. A view of cost, not a copy.
+    @property
+    def distances(self) -> np.ndarray:
+        return np.frombuffer(self.cost, dtype=np.int64).reshape(self.grid.rowSize, self.grid.colSize)
+
+
+    # The cell number (row * cols + col) of the next step towards the goal from every location as a (rows, cols)
+    # NumPy array, that is its predecessor in the search outwards from the goal. -1 at the goal and wherever
+    # the goal cannot be reached. A view of next, not a copy.
+    @property
+    def predecessors(self) -> np.ndarray:
+        return np.frombuffer(self.next, dtype=np.int32).reshape(self.grid.rowSize, self.grid.colSize)
+
+
+    # Returns (cost, list(locations)) of the cheapest path from start to the goal,
+    # or (None, None) if the goal cannot be reached. Only follows the next steps, O(path length).
+    def pathFrom(self, start: Location) -> tuple[Optional[int], Optional[list[Location]]]:
+
+        grid = self.grid
+        cell = grid.cell(start)
+        cost = self.cost[cell]
+
+        if cost == UNREACHABLE:
+            return None, None
+
+        goalCell = grid.cell(self.goal)
+        path = [start]
+        while cell != goalCell:
+            cell = self.next[cell]
+            path.append(grid.location(cell))
+
+        return cost, path
+
+
+
+# Runs Dijkstra's algorithm backwards from the goal over the precomputed grid.
+def buildDistanceField(grid: Grid, goal: Location) -> DistanceField:
+
+    size = grid.rowSize * grid.colSize
+    neighbour = grid.neighbour
+    moveCost = grid.moveCost
+
+    cost = array("q", [UNREACHABLE]) * size
+    next = array("i", [-1]) * size
+    explored = bytearray(size)
+
+    frontier = OpenSet()
+    goalCell = grid.cell(goal)
+    cost[goalCell] = 0
+    frontier.push(goalCell, (0, goalCell), None)
+
+    while len(frontier) > 0:
+        cell, (distance, _), _ = frontier.pop()
+        explored[cell] = 1
+
+        for index in range(cell * 4, cell * 4 + 4):
+            target = neighbour[index]
+            if target < 0 or explored[target]:
+                continue
+
+            newDistance = distance + moveCost[index]
+            if cost[target] == UNREACHABLE or newDistance < cost[target]:
+                cost[target] = newDistance
+                next[target] = cell
+                frontier.push(target, (newDistance, target), None)
+
+    return DistanceField(grid, goal, cost, next)
+
+
+
+_fields = OrderedDict()
+
+
+def build_distance_field(terrain_map: Map, terrain_threshold: int, goal: Location) -> DistanceField:
+    """Finds the cheapest path cost from every location to the goal (Task 1) with one reverse Dijkstra search.
+       Afterwards field.pathFrom(start) returns what find_shortest_path(start, goal, ...) would, (cost,list(locations))
+       or (None,None), by following the next steps in O(path length). Among equally cheap paths a different one
+       may be returned. field.distances and field.predecessors give the whole field as NumPy arrays.
+       The most recently used fields are kept, so asking again for the same map, threshold and goal is free,
+       and find_shortest_path answers queries to the goal from the field too."""
+
+    goal = tuple(goal)
+    return getCached(_fields, (getMapKey(terrain_map), terrain_threshold, goal),
+                     lambda: buildDistanceField(getGrid(terrain_map, terrain_threshold), goal), FIELD_CACHE_SIZE)
+
+
+
+# Returns the distance field build_distance_field keeps for a map, threshold and goal, or None, never building one.
+# The map is only hashed when a field for the same threshold and goal is kept, so without one this costs almost nothing.
+def findDistanceField(terrain_map: Map, terrain_threshold: int, goal: Location) -> Optional[DistanceField]:
+
+    goal = tuple(goal)
+    if getattr(terrain_map, "tiled", False) or not any(key[1:] == (terrain_threshold, goal) for key in _fields):
+        return None
+
+    key = (getMapKey(terrain_map), terrain_threshold, goal)
+    if key not in _fields:
+        return None
+
+    _fields.move_to_end(key)
+    return _fields[key]
+
+
+
+# Distance fields are saved next to the map they belong to, for example the field for goal (80, 40)
+# at threshold 500 of terrain04.txt is terrain04.txt.goal-80-40.t500.npz
+def distance_field_file(map_file: str, terrain_threshold: int, goal: Location) -> str:
+    return f"{map_file}.goal-{goal[0]}-{goal[1]}.t{terrain_threshold}.npz"
+
+
+def save_distance_field(field: DistanceField, file_name: str) -> None:
+    """Saves a distance field to a .npz file, along with the goal, the threshold and a hash of the map it belongs to."""
+
+    # Written under a temporary name and moved into place, so a reader never sees a half-written field
+    temporary_name = f"{file_name}.{os.getpid()}.tmp"
+    with open(temporary_name, "wb") as file:
+        np.savez(file, cost=np.frombuffer(field.cost, dtype=np.int64), next=np.frombuffer(field.next, dtype=np.int32),
+                 goal=np.array(field.goal), threshold=np.array(field.grid.threshold),
+                 map_key=np.array(getMapKey(field.grid.values)))
+
+    os.replace(temporary_name, file_name)
+
+
+def load_distance_field(file_name: str, terrain_map: Map) -> DistanceField:
+    """Loads a distance field saved by save_distance_field for the given terrain map.
+       Raises ValueError if it was saved for a different map. Once loaded it is also what
+       build_distance_field returns for the same map, threshold and goal."""
+
+    with np.load(file_name) as data:
+        goal = tuple(int(value) for value in data["goal"])
+        threshold = data["threshold"].item()
+        grid = getGrid(terrain_map, threshold)
+
+        if str(data["map_key"]) != getMapKey(grid.values):
+            raise ValueError(f"Distance field '{file_name}' was saved for a different map")
+
+        field = DistanceField(grid, goal, array("q", data["cost"].tobytes()), array("i", data["next"].tobytes()))
+
+    return getCached(_fields, (getMapKey(terrain_map), threshold, goal), lambda: field, FIELD_CACHE_SIZE)
+
+
+
+@click.command(no_args_is_help=True)
+@click.argument("terrain_file", required=True, type=click.Path(exists=True, dir_okay=False))
+@click.argument("terrain_threshold", required=True, type=click.IntRange(min=0,max=1000))
+@click.argument("goals", required=True, nargs=-1)
+def main(terrain_file: str, terrain_threshold: int, goals: tuple[str]) -> None:
+    """Precomputes the distance field of each goal and saves it next to the map, ready to be loaded at startup.
+
+    \b
+    python distancefield.py resources/terrain04.txt 500 80,40 0,3
+    """
+    terrain_map = read_map(terrain_file)
+
+    for text in goals:
+        try:
+            goal = parse_location(text)
+        except AssertionError:
+            raise click.BadParameter(f"Location '{text}' is invalid")
+
+        file_name = distance_field_file(terrain_file, terrain_threshold, goal)
+        field = build_distance_field(terrain_map, terrain_threshold, goal)
+        save_distance_field(field, file_name)
+
+        reachable = int((field.distances != UNREACHABLE).sum())
+        log(f"Saved the distance field of {goal} ({reachable} locations can reach it) to {file_name}")
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,132 @@
+import contextlib
+import struct
+from typing import Iterator
 from maps import Location
 
+
+# The kinds of search event, recorded by log_visit_state, log_enqueue_state and log_ignore_state.
+VISITED = 0
+ENQUEUED = 1
+IGNORED = 2
+
+_FORMATS = {
+    VISITED: 'VISITED {} cost={} success={:.4f}',
+    ENQUEUED: '+ ENQUEUED {} cost={} success={:.4f}',
+    IGNORED: '+ IGNORED {} cost={} success={:.4f}',
+}
+
+
+# Formats a search event in the text format printed by default (used for grading and debugging).
+def format_event(kind: int, location: Location, cost: int, p_success: float) -> str:
+    return _FORMATS[kind].format(location, cost, p_success)
+
+
+
+# Search events are passed to a sink, which decides what to do with them. 
+# A sink has a record(kind, location, cost, p_success) method. The sinks below cover printing (the default),
+# discarding, buffering in memory, a fixed size binary ring buffer and writing to a file.
+class PrintSink:
+
+    def record(self, kind: int, location: Location, cost: int, p_success: float) -> None:
+        print(format_event(kind, location, cost, p_success))
+
+
+# Discards every event. While it is the sink the searches skip logging altogether (see logging_enabled),
+# so they pay no per-event cost and never format any text.
+class NullSink:
+
+    def record(self, kind: int, location: Location, cost: int, p_success: float) -> None:
+        pass
+
+
+# Keeps every event in memory as (kind, location, cost, p_success) tuples, formatted only when asked for.
+class ListSink:
+
+    def __init__(self):
+        self.events = []
+
+    def record(self, kind: int, location: Location, cost: int, p_success: float) -> None:
+        self.events.append((kind, location, cost, p_success))
+
+    def lines(self) -> list[str]:
+        return [format_event(*event) for event in self.events]
+
+
+# Keeps the most recent events packed into a fixed size binary buffer, the oldest are overwritten once it is full.
+# Memory use is bounded however long the search runs, which suits keeping a trace around for debugging.
+class RingBufferSink:
+
+    RECORD = struct.Struct("<Biiqd")
+
+    def __init__(self, capacity: int = 65536):
+        self.capacity = capacity
+        self.buffer = bytearray(self.RECORD.size * capacity)
+        self.count = 0
+
+    def record(self, kind: int, location: Location, cost: int, p_success: float) -> None:
+        self.RECORD.pack_into(self.buffer, (self.count % self.capacity) * self.RECORD.size,
+                              kind, location[0], location[1], cost, p_success)
+        self.count += 1
+
+    # Returns the retained events, oldest first, as (kind, location, cost, p_success) tuples.
+    def events(self) -> list[tuple]:
+        first = max(self.count - self.capacity, 0)
+        events = []
+
+        for index in range(first, self.count):
+            kind, row, col, cost, p_success = self.RECORD.unpack_from(self.buffer, (index % self.capacity) * self.RECORD.size)
+            events.append((kind, (row, col), cost, p_success))
+
+        return events
+
+    def lines(self) -> list[str]:
+        return [format_event(*event) for event in self.events()]
+
+
+# Writes every event to a file in the text format.
+class FileSink:
+
+    def __init__(self, file_name: str):
+        self.file = open(file_name, "w")
+
+    def record(self, kind: int, location: Location, cost: int, p_success: float) -> None:
+        self.file.write(format_event(kind, location, cost, p_success) + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+
+_sink = PrintSink()
+
+
+def get_sink():
+    return _sink
+
+
+# Replaces the sink search events are sent to, returning the previous one.
+def set_sink(sink):
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+# Sends search events to a sink for the duration of a with block.
+@contextlib.contextmanager
+def using_sink(sink) -> Iterator:
+    previous = set_sink(sink)
+    try:
+        yield sink
+    finally:
+        set_sink(previous)
+
+
+# Whether search events go anywhere. The searches check this once before they start 
+# and skip the log_*_state calls entirely when it is False.
+def logging_enabled() -> bool:
+    return not isinstance(_sink, NullSink)
+
+
 def log(message: str) -> None:
     print(message)
 
@@ -14,7 +141,7 @@ def log_visit_state(location: Location, cost: int, p_success: float=1.0) -> None
     :param p_success: the success probability (float in the range [0.0...1.0]) associated with 
                       the current path. Optional for Question 1.
     """
-    log(f'VISITED {location} cost={cost} success={p_success:.4f}')
+    _sink.record(VISITED, location, cost, p_success)
 
 
 def log_enqueue_state(location: Location, cost: int, p_success: float=1.0) -> None:
@@ -28,7 +155,7 @@ def log_enqueue_state(location: Location, cost: int, p_success: float=1.0) -> No
     :param p_success: the success probability (float in the range [0.0...1.0]) associated with 
                       the current path. Optional for Question 1.
     """
-    log(f'+ ENQUEUED {location} cost={cost} success={p_success:.4f}')
+    _sink.record(ENQUEUED, location, cost, p_success)
 
 
 def log_ignore_state(location: Location, cost: int, p_success: float=1.0) -> None:
@@ -43,4 +170,4 @@ def log_ignore_state(location: Location, cost: int, p_success: float=1.0) -> Non
     :param p_success: the success probability (float in the range [0.0...1.0]) associated with 
                       the current path. Optional for Question 1.
     """
-    log(f'+ IGNORED {location} cost={cost} success={p_success:.4f}')
+    _sink.record(IGNORED, location, cost, p_success)
@@ -0,0 +1,201 @@
+import hashlib
+import weakref
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+import numpy as np
+from maps import Location, Map
+
+
+# The four directions a move can take, in the order children are generated (north, south, east, west).
+DIRECTIONS = ((-1, 0), (1, 0), (0, 1), (0, -1))
+
+# How many precomputed grids (and success tables) are kept for repeated queries.
+CACHE_SIZE = 8
+
+
+# The search graph of a terrain map for one terrain threshold, precomputed once with NumPy.
+# Every location is given a flat cell number (row * colSize + col). For each cell the table holds
+# the cell number of its neighbour in each of the four directions (-1 when the move is not possible)
+# and the cost of that move. A move is possible when it stays inside the map and neither the source
+# nor the target exceeds the terrain threshold.
+# The tables are Python arrays because indexing them one item at a time is much faster than indexing an ndarray.
+class Grid:
+
+    __slots__ = ("rowSize", "colSize", "threshold", "values", "passable", "neighbour", "moveCost", "derived")
+
+    def __init__(self, map: Map, threshold):
+
+        values = np.array(map, dtype=np.int64)
+        self.values = values
+        self.rowSize, self.colSize = values.shape
+        self.threshold = threshold
+
+        # Locations within the terrain threshold
+        self.passable = values <= threshold
+
+        cells = np.arange(values.size, dtype=np.int32).reshape(values.shape)
+        neighbour = np.full(values.shape + (4,), -1, dtype=np.int32)
+        moveCost = np.zeros(values.shape + (4,), dtype=np.int64)
+
+        for direction, (rowStep, colStep) in enumerate(DIRECTIONS):
+            source = _shifted(self.rowSize, self.colSize, -rowStep, -colStep)
+            target = _shifted(self.rowSize, self.colSize, rowStep, colStep)
+
+            valid = self.passable[source] & self.passable[target]
+            neighbour[source + (direction,)] = np.where(valid, cells[target], -1)
+            moveCost[source + (direction,)] = values[source] + values[target]
+
+        self.neighbour = array("i", neighbour.tobytes())
+        self.moveCost = array("q", moveCost.tobytes())
+
+        # Further data worked out from the grid (such as landmark distances), kept with it so it is cached alongside.
+        self.derived = {}
+
+
+    def cell(self, location: Location) -> int:
+        return location[0] * self.colSize + location[1]
+
+
+    def location(self, cell: int) -> Location:
+        return divmod(cell, self.colSize)
+
+
+    # Returns (neighbour cell, move cost) for every possible move out of a cell.
+    def moves(self, cell: int):
+        neighbour = self.neighbour
+        moveCost = self.moveCost
+        return [(neighbour[index], moveCost[index]) for index in range(cell * 4, cell * 4 + 4) if neighbour[index] >= 0]
+
+
+    # Changes the value of a location, updating the moves into and out of it, and forgets any derived data.
+    # Only for a grid with a single owner (see incremental.py), never one shared through getGrid,
+    # which would then no longer match the map it is cached under.
+    def setValue(self, location: Location, value: int) -> None:
+
+        self.values[location] = value
+        self.passable[location] = value <= self.threshold
+        self.derived.clear()
+
+        row, col = location
+        cell = self.cell(location)
+        for direction, (rowStep, colStep) in enumerate(DIRECTIONS):
+            other = (row + rowStep, col + colStep)
+            if not (0 <= other[0] < self.rowSize and 0 <= other[1] < self.colSize):
+                continue
+
+            # Directions come in opposite pairs, so the move back is the other one of the pair
+            otherCell = self.cell(other)
+            valid = self.passable[location] and self.passable[other]
+            cost = value + int(self.values[other])
+
+            self.neighbour[cell * 4 + direction] = otherCell if valid else -1
+            self.neighbour[otherCell * 4 + (direction ^ 1)] = cell if valid else -1
+            self.moveCost[cell * 4 + direction] = cost
+            self.moveCost[otherCell * 4 + (direction ^ 1)] = cost
+
+
+
+# The slices of the map whose cells have a neighbour at (rowStep, colStep) still inside the map.
+def _shifted(rowSize: int, colSize: int, rowStep: int, colStep: int):
+    return (slice(max(rowStep, 0), rowSize + min(rowStep, 0)),
+            slice(max(colStep, 0), colSize + min(colStep, 0)))
+
+
+
+# A content hash of a map, so maps with the same values share precomputed data
+# even when they are different array objects, and an edited map never reuses stale data.
+# Hashing a large map takes far longer than a short search, so the hash of a map that can't be changed
+# (see frozenMap) is kept with the array object and worked out only once.
+def getMapKey(map: Map) -> str:
+
+    frozen = isFrozen(map)
+    if frozen:
+        entry = _frozenKeys.get(id(map))
+        if entry is not None and entry[0]() is map:
+            return entry[1]
+
+    values = np.ascontiguousarray(map)
+    digest = hashlib.blake2b(values.tobytes(), digest_size=16)
+    digest.update(f"{values.shape}{values.dtype}".encode())
+    key = digest.hexdigest()
+
+    if frozen:
+        _frozenKeys[id(map)] = (weakref.ref(map, lambda ref, ident=id(map): _forgetKey(ident, ref)), key)
+
+    return key
+
+
+# The keys of frozen maps, by the id of the array, each with a weak reference to check the id is still that array's.
+_frozenKeys = {}
+
+
+def _forgetKey(ident: int, ref=None) -> None:
+    entry = _frozenKeys.get(ident)
+    if entry is not None and (ref is None or entry[0] is ref):
+        del _frozenKeys[ident]
+
+
+# Whether a map can't be changed: it is read-only, and so is every array it is a view of.
+# (Its data could still be changed by making it writeable again, which frozenMap does only once it is done with it.)
+def isFrozen(map: Map) -> bool:
+    while isinstance(map, np.ndarray):
+        if map.flags.writeable:
+            return False
+        map = map.base
+    return True
+
+
+# Makes a map read-only for the duration of a with block, so the many queries run on it in the block
+# hash it only once, and anything trying to change it meanwhile fails instead of being answered from stale data.
+# Afterwards the map is made writeable again, if it was, and its kept hash forgotten.
+@contextmanager
+def frozenMap(map: Map):
+
+    if not isinstance(map, np.ndarray) or not map.flags.writeable:
+        yield map
+        return
+
+    map.flags.writeable = False
+    try:
+        yield map
+    finally:
+        _forgetKey(id(map))
+        map.flags.writeable = True
+
+
+
+_grids = OrderedDict()
+_successTables = OrderedDict()
+
+
+# Returns the value stored under key in a least recently used cache, building and storing it on first use.
+def getCached(cache: OrderedDict, key, build, size: int = CACHE_SIZE):
+
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    value = build()
+    cache[key] = value
+    if len(cache) > size:
+        cache.popitem(last=False)
+
+    return value
+
+
+# Returns the precomputed grid of a terrain map for a threshold, building it only on first use.
+# A tiled map (see tiles.py) may not fit in memory, so it gives a grid that reads its tiles as needed instead.
+def getGrid(map: Map, threshold) -> Grid:
+    if getattr(map, "tiled", False):
+        return map.makeGrid(threshold)
+    return getCached(_grids, (getMapKey(map), threshold), lambda: Grid(map, threshold))
+
+
+# For question 2, returns the probability of passing through each cell safely (1 - enemy presence / 100),
+# indexed by cell number, building it only on first use.
+def getSafetyTable(success_map: Map) -> array:
+    if getattr(success_map, "tiled", False):
+        return success_map.makeSafetyTable()
+    return getCached(_successTables, getMapKey(success_map),
+                     lambda: array("d", (1 - np.asarray(success_map, dtype=np.float64).ravel() / 100).tobytes()))
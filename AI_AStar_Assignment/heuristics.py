@@ -0,0 +1,151 @@
+import numpy as np
+from array import array
+from typing import Callable
+from distancefield import UNREACHABLE, buildDistanceField
+from grid import Grid
+from maps import Location
+from methods import calculateManhattanDistance
+
+
+# A heuristic is given the precomputed grid and the goal once per search, and returns the estimate
+# used for every location: a function from a location to a lower bound on the cost of reaching the goal.
+# All the heuristics here are admissible and consistent, so the searches still return optimal paths,
+# but better estimates let A* expand fewer nodes. Among equally cheap paths a different one may be returned.
+Heuristic = Callable[[Grid, Location], Callable[[Location], int]]
+
+
+# The plain manhattan distance (see methods.calculateManhattanDistance), the default.
+# It assumes every move costs at least 1, which badly underestimates the terrain costs.
+def manhattanHeuristic(grid: Grid, goal: Location) -> Callable[[Location], int]:
+    return lambda location: calculateManhattanDistance(location, goal)
+
+
+# Every move costs the value of its source plus its target, and only locations within the threshold
+# can be moved through, so no move can cost less than twice the lowest passable value.
+# Multiplying the manhattan distance by that cheapest move keeps it admissible and consistent.
+def getCheapestMove(grid: Grid) -> int:
+
+    if getattr(grid, "tiled", False):
+        return grid.cheapestMove()
+
+    passableValues = grid.values[grid.passable]
+    if passableValues.size == 0:
+        return 0
+
+    return 2 * max(int(passableValues.min()), 0)
+
+
+def scaledManhattanHeuristic(grid: Grid, goal: Location) -> Callable[[Location], int]:
+    cheapestMove = getCheapestMove(grid)
+    return lambda location: cheapestMove * calculateManhattanDistance(location, goal)
+
+
+
+# ALT heuristic (A*, Landmarks and the Triangle inequality).
+# The exact cost from a few landmark locations to every other location is precomputed with Dijkstra's algorithm.
+# For any landmark L, cost(L, goal) <= cost(L, n) + cost(n, goal), and costs are symmetric, so
+# |cost(L, goal) - cost(L, n)| never overestimates cost(n, goal). The largest of these over all landmarks is used,
+# or the scaled manhattan distance when that is larger.
+def landmarkHeuristic(count: int = 4) -> Heuristic:
+
+    def heuristic(grid: Grid, goal: Location) -> Callable[[Location], int]:
+
+        if getattr(grid, "tiled", False):
+            raise ValueError("The alt heuristic searches the whole map, it can't be used on tiled maps")
+        goalCell = grid.cell(goal)
+        tables = getLandmarkTables(grid, count, getComponents(grid)[goalCell])
+        goalCosts = [table[goalCell] for table in tables]
+        cheapestMove = getCheapestMove(grid)
+        colSize = grid.colSize
+
+        def estimate(location: Location) -> int:
+            best = cheapestMove * calculateManhattanDistance(location, goal)
+            cell = location[0] * colSize + location[1]
+
+            for table, goalCost in zip(tables, goalCosts):
+                cost = table[cell]
+                if cost != UNREACHABLE and goalCost != UNREACHABLE:
+                    best = max(best, abs(goalCost - cost))
+
+            return best
+
+        return estimate
+
+    return heuristic
+
+
+
+# Labels the connected parts of the grid, so locations with the same label can reach each other.
+# Locations without any possible move are labelled -1. Cached on the grid.
+def getComponents(grid: Grid) -> array:
+
+    if "components" in grid.derived:
+        return grid.derived["components"]
+
+    size = grid.rowSize * grid.colSize
+    neighbour = grid.neighbour
+    components = array("i", [-1]) * size
+    label = 0
+
+    for first in range(size):
+        if components[first] >= 0 or max(neighbour[first * 4:first * 4 + 4]) < 0:
+            continue
+
+        components[first] = label
+        stack = [first]
+
+        while stack:
+            cell = stack.pop()
+            for index in range(cell * 4, cell * 4 + 4):
+                target = neighbour[index]
+                if target >= 0 and components[target] < 0:
+                    components[target] = label
+                    stack.append(target)
+
+        label += 1
+
+    grid.derived["components"] = components
+    return components
+
+
+
+# Chooses landmarks spread out across one connected part of the grid and returns their cost tables, 
+# cached on the grid. Each new landmark is the location farthest from all the landmarks chosen so far,
+# starting from the location farthest from the first location of that part.
+# Landmarks in other parts could not reach the goal and so would say nothing about it.
+def getLandmarkTables(grid: Grid, count: int, component: int) -> list:
+
+    key = ("landmarks", count, component)
+    if key in grid.derived:
+        return grid.derived[key]
+
+    tables = []
+
+    if component >= 0:
+        first = getComponents(grid).index(component)
+        field = buildDistanceField(grid, grid.location(first))
+        nearest = np.frombuffer(field.cost, dtype=np.int64).copy()
+
+        for _ in range(count):
+            farthest = int(nearest.argmax())
+            if nearest[farthest] <= 0:
+                break
+
+            field = buildDistanceField(grid, grid.location(farthest))
+            tables.append(field.cost)
+
+            # The first location is not a landmark itself, so the first landmark replaces it
+            cost = np.frombuffer(field.cost, dtype=np.int64)
+            nearest = cost.copy() if len(tables) == 1 else np.minimum(nearest, cost)
+
+    grid.derived[key] = tables
+    return tables
+
+
+
+# The heuristics that can be chosen by name, for example from the command line.
+HEURISTICS = {
+    "manhattan": manhattanHeuristic,
+    "scaled": scaledManhattanHeuristic,
+    "alt": landmarkHeuristic(),
+}
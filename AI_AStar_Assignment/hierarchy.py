@@ -0,0 +1,486 @@
+import time
+from collections import deque
+import click
+import numpy as np
+from typing import Optional
+from events import log
+from maps import Location, Map
+from parsing import validate_location, validate_map
+
+from grid import Grid, getGrid
+from heuristics import HEURISTICS, Heuristic, manhattanHeuristic
+from openset import OpenSet
+
+
+# Hierarchical path-finding (HPA*) for question 1 on very large maps.
+# The map is split into square clusters. Wherever a move crosses from one cluster into the next,
+# a transition location is placed on each side, and the cheapest path within a cluster between every two of
+# its transitions is found once per terrain threshold. A query then searches this much smaller abstract graph
+# (transitions, plus the start and goal linked into their clusters) and refines each step of the abstract
+# path back into locations with a search confined to one cluster.
+#
+# In exact mode every move across a cluster border has its own pair of transitions. Between two border
+# crossings a path stays within one cluster, so it can be no cheaper than the cluster's own cheapest path
+# between them, and the abstract search finds a cheapest path of the whole map.
+# In near optimal mode each entrance (a run of neighbouring border crossings) has only one or two
+# transitions, as in the original HPA*, so the abstract graph is far smaller but paths are forced through
+# those transitions and may cost a little more. The cost is then reported with a guaranteed bound on how
+# much more: a second abstract graph splits every entrance into short segments and treats each side of a
+# segment as a single place (crossing anywhere along it at its cheapest crossing cost), which can only
+# underestimate, so its cheapest path is a lower bound on the true cost.
+
+# The width and height of a cluster in locations, unless given.
+CLUSTER_SIZE = 16
+
+# The ways find_hierarchical_path can search.
+MODES = ("near_optimal", "exact")
+
+# Entrances at least this long get a transition at each end rather than one in the middle.
+LONG_ENTRANCE = 6
+
+# For the lower bound entrances are split into segments of at most this many crossings,
+# shorter segments give a tighter bound but take longer to work out.
+BOUND_SEGMENT = 2
+
+# Cost of the locations that cannot be reached in the cluster searches.
+INFINITY = 2 ** 60
+
+
+
+def find_hierarchical_path(start: Location, goal: Location, terrain_map: Map, terrain_threshold: int,
+                           mode: str = "near_optimal", cluster_size: int = CLUSTER_SIZE,
+                           heuristic: Heuristic = manhattanHeuristic) \
+                           -> tuple[Optional[int],Optional[list[Location]],Optional[float]]:
+    """Finds a low cost path (Task 1) with hierarchical path-finding, for maps too large for find_shortest_path.
+       Returns (cost,list(locations),bound) when a path is found, the cost is at most bound times the lowest cost.
+       Returns (None,None,None) if no path is found.
+       In "exact" mode the cost is always the lowest, as find_shortest_path would find, and the bound is 1.0.
+       In "near_optimal" mode (the default) the search is much faster but the path may cost a little more.
+       Where locations of value 0 leave no finite bound on how much more, the path is found as in "exact" mode.
+       The clusters are worked out on first use for each map, threshold, cluster size and mode."""
+
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {', '.join(MODES)}")
+
+    start, goal = tuple(start), tuple(goal)
+    if start == goal:
+        return 0, [start], 1.0
+
+    grid = getGrid(terrain_map, terrain_threshold)
+    if not grid.passable[start] or not grid.passable[goal]:
+        return None, None, None
+
+    hierarchy = getHierarchy(grid, cluster_size, exact= mode == "exact")
+
+    startCell, goalCell = grid.cell(start), grid.cell(goal)
+    startCosts = hierarchy.costsWithin(startCell)
+    goalCosts = hierarchy.costsWithin(goalCell)
+
+    cost, abstractPath = searchAbstract(hierarchy, startCell, goalCell, startCosts, goalCosts, heuristic(grid, goal))
+    if cost is None:
+        return None, None, None
+
+    path = [start]
+    for source, target in zip(abstractPath, abstractPath[1:]):
+        path += hierarchy.refine(source, target)
+
+    if hierarchy.exact:
+        return cost, path, 1.0
+
+    # Any path costs at least the values of its start and goal, which is all the lower bound can give
+    # when they are on the same side of an entrance segment (the relaxed graph joins them at no cost)
+    lowerBound = max(searchLowerBound(hierarchy, startCell, goalCell, startCosts, goalCosts),
+                     int(grid.values[start]) + int(grid.values[goal]))
+    if lowerBound > 0:
+        return cost, path, cost / lowerBound
+    if cost == 0:
+        return cost, path, 1.0
+
+    # Through locations of value 0 the lower bound can be 0 while the path found costs more, and no finite bound
+    # follows from it. The path is then found again in exact mode, with no estimate, since the heuristics
+    # can overestimate where moves cost nothing, so its cost is the lowest.
+    exactHierarchy = getHierarchy(grid, hierarchy.clusterSize, exact= True)
+    cost, abstractPath = searchAbstract(exactHierarchy, startCell, goalCell, startCosts, goalCosts, lambda location: 0)
+
+    path = [start]
+    for source, target in zip(abstractPath, abstractPath[1:]):
+        path += exactHierarchy.refine(source, target)
+    return cost, path, 1.0
+
+
+
+# The clusters, transitions and abstract graphs of one grid, for one cluster size and mode.
+class Hierarchy:
+
+    __slots__ = ("grid", "clusterSize", "exact", "clusterCols", "blockValues", "blockPassable",
+                 "transitions", "edges", "sides", "sideCells", "sideEdges")
+
+    def __init__(self, grid: Grid, clusterSize: int, exact: bool):
+
+        self.grid = grid
+        self.clusterSize = size = clusterSize
+        self.exact = exact
+
+        # The map padded with impassable locations to whole clusters, and split into (cluster row, cluster col, k, k) blocks
+        clusterRows, self.clusterCols = -(-grid.rowSize // size), -(-grid.colSize // size)
+        values = np.zeros((clusterRows * size, self.clusterCols * size), dtype=np.int64)
+        passable = np.zeros(values.shape, dtype=bool)
+        values[:grid.rowSize, :grid.colSize] = grid.values
+        passable[:grid.rowSize, :grid.colSize] = grid.passable
+
+        self.blockValues = values.reshape(clusterRows, size, self.clusterCols, size).swapaxes(1, 2)
+        self.blockPassable = passable.reshape(clusterRows, size, self.clusterCols, size).swapaxes(1, 2)
+
+        # The transition cells of each cluster, and the abstract graph: for each transition cell, a list of
+        # (cell, cost) for the transitions across the border and the other transitions of its cluster.
+        self.transitions = [[] for _ in range(clusterRows * self.clusterCols)]
+        self.edges = {}
+
+        # For the lower bound: the sides of each entrance in each cluster, the cells of each side,
+        # and for each side a list of (side, cost) for the other side of its entrance and the other sides of its cluster.
+        self.sides = [[] for _ in range(clusterRows * self.clusterCols)]
+        self.sideCells = []
+        self.sideEdges = []
+
+        for entrance in findEntrances(grid, size):
+            self.addEntrance(entrance)
+
+        for clusterRow in range(clusterRows):
+            self.linkClusters(clusterRow)
+
+
+    def cluster(self, cell: int) -> int:
+        row, col = divmod(cell, self.grid.colSize)
+        return (row // self.clusterSize) * self.clusterCols + col // self.clusterSize
+
+
+    # The cell's position within its cluster block.
+    def local(self, cell: int) -> tuple[int,int]:
+        row, col = divmod(cell, self.grid.colSize)
+        return row % self.clusterSize, col % self.clusterSize
+
+
+    # The cell at a position within a cluster block.
+    def global_(self, cluster: int, local: tuple[int,int]) -> int:
+        clusterRow, clusterCol = divmod(cluster, self.clusterCols)
+        return (clusterRow * self.clusterSize + local[0]) * self.grid.colSize + clusterCol * self.clusterSize + local[1]
+
+
+    # Adds the transitions of an entrance, a list of (inside cell, outside cell, crossing cost) for neighbouring
+    # crossings from one cluster into the next.
+    def addEntrance(self, entrance: list) -> None:
+
+        if self.exact:
+            chosen = entrance
+        elif len(entrance) < LONG_ENTRANCE:
+            chosen = [entrance[len(entrance) // 2]]
+        else:
+            chosen = [entrance[0], entrance[-1]]
+
+        for inside, outside, cost in chosen:
+            for cell, other in ((inside, outside), (outside, inside)):
+                if cell not in self.edges:
+                    self.edges[cell] = []
+                    self.transitions[self.cluster(cell)].append(cell)
+                self.edges[cell].append((other, cost))
+
+        if self.exact:
+            return
+
+        for position in range(0, len(entrance), BOUND_SEGMENT):
+            segment = entrance[position:position + BOUND_SEGMENT]
+            cheapest = min(cost for _, _, cost in segment)
+            first = len(self.sideCells)
+
+            for side, cells in enumerate(([inside for inside, _, _ in segment], [outside for _, outside, _ in segment])):
+                self.sides[self.cluster(cells[0])].append(first + side)
+                self.sideCells.append(cells)
+                self.sideEdges.append([(first + 1 - side, cheapest)])
+
+
+    # Finds the cheapest paths within each cluster of a row of clusters between its transitions (and between its entrance sides).
+    def linkClusters(self, clusterRow: int) -> None:
+
+        first = clusterRow * self.clusterCols
+        clusters = range(first, first + self.clusterCols)
+        values, passable = self.blockValues[clusterRow], self.blockPassable[clusterRow]
+
+        costs = clusterCosts(values, passable, [[[self.local(cell)] for cell in self.transitions[cluster]] for cluster in clusters])
+        for index, cluster in enumerate(clusters):
+            transitions = self.transitions[cluster]
+            for source, cell in enumerate(transitions):
+                for target in transitions:
+                    cost = costs[index, source][self.local(target)]
+                    if target != cell and cost < INFINITY:
+                        self.edges[cell].append((target, int(cost)))
+
+        if self.exact:
+            return
+
+        costs = clusterCosts(values, passable, [[[self.local(cell) for cell in self.sideCells[side]] for side in self.sides[cluster]]
+                                                for cluster in clusters])
+        for index, cluster in enumerate(clusters):
+            sides = self.sides[cluster]
+            for source, side in enumerate(sides):
+                for target in sides:
+                    cost = min(costs[index, source][self.local(cell)] for cell in self.sideCells[target])
+                    if target != side and cost < INFINITY:
+                        self.sideEdges[side].append((target, int(cost)))
+
+
+    # The cheapest cost from a cell to every location of its cluster, staying within the cluster, as a (k, k) array.
+    def costsWithin(self, cell: int) -> np.ndarray:
+        clusterRow, clusterCol = divmod(self.cluster(cell), self.clusterCols)
+        return clusterCosts(self.blockValues[clusterRow, clusterCol][None], self.blockPassable[clusterRow, clusterCol][None],
+                            [[[self.local(cell)]]])[0, 0]
+
+
+    # The locations of a cheapest path from source to target, not including source.
+    # A step between clusters is a single move. A step within a cluster is followed back from target
+    # through the costs of reaching each location from source, along moves that keep to a cheapest path.
+    # Locations of value 0 make moves of cost 0, so several neighbours can have the same cost and a walk
+    # back could go round in circles: the moves are searched breadth first instead, each location once.
+    def refine(self, source: int, target: int) -> list[Location]:
+
+        grid = self.grid
+        cluster = self.cluster(source)
+        if self.cluster(target) != cluster:
+            return [grid.location(target)]
+
+        costs = self.costsWithin(source)
+        values = self.blockValues[divmod(cluster, self.clusterCols)]
+        first, last = self.local(source), self.local(target)
+
+        # The next location towards target of each location reached, from target back to source
+        following = {last: None}
+        queue = deque([last])
+        while first not in following:
+            row, col = queue.popleft()
+            for nextRow, nextCol in ((row - 1, col), (row + 1, col), (row, col + 1), (row, col - 1)):
+                if 0 <= nextRow < self.clusterSize and 0 <= nextCol < self.clusterSize and \
+                   (nextRow, nextCol) not in following and \
+                   costs[nextRow, nextCol] + values[nextRow, nextCol] + values[row, col] == costs[row, col]:
+                    following[nextRow, nextCol] = (row, col)
+                    queue.append((nextRow, nextCol))
+
+        path = []
+        position = following[first]
+        while position is not None:
+            path.append(grid.location(self.global_(cluster, position)))
+            position = following[position]
+
+        return path
+
+
+# Returns the entrances between neighbouring clusters, each a list of (inside cell, outside cell, crossing cost)
+# for a run of neighbouring locations on one side of a cluster border that can all move across it.
+def findEntrances(grid: Grid, size: int) -> list:
+
+    entrances = []
+    values, passable, colSize = grid.values, grid.passable, grid.colSize
+
+    # Borders between cluster rows, then between cluster columns, as (the last row or column of a cluster, is it a row)
+    borders = [(row, True) for row in range(size - 1, grid.rowSize - 1, size)] + \
+              [(col, False) for col in range(size - 1, grid.colSize - 1, size)]
+
+    for line, isRow in borders:
+        length = grid.colSize if isRow else grid.rowSize
+        crossing = passable[line] & passable[line + 1] if isRow else passable[:, line] & passable[:, line + 1]
+
+        run = []
+        for position in range(length + 1):
+            # An entrance ends at a location that can't cross, or where the border passes into the next cluster
+            if run and (position == length or not crossing[position] or position % size == 0):
+                entrances.append(run)
+                run = []
+
+            if position < length and crossing[position]:
+                inside = line * colSize + position if isRow else position * colSize + line
+                outside = inside + colSize if isRow else inside + 1
+                insideValue = values[line, position] if isRow else values[position, line]
+                outsideValue = values[line + 1, position] if isRow else values[position, line + 1]
+                run.append((inside, outside, int(insideValue + outsideValue)))
+
+    return entrances
+
+
+
+# The cheapest costs within clusters from sources in each, for a batch of clusters of the same size at once.
+# values and passable are (n, k, k) blocks. sources holds, for each cluster, a list of searches,
+# each a list of (row, col) positions starting at cost 0 (several make one multi-source search).
+# Returns the costs as an (n, searches, k, k) array, INFINITY where a location can't be reached.
+# A vectorised Bellman-Ford: each pass sweeps the costs across the block row by row and column by column
+# in both directions, relaxing every move, until a pass changes nothing. Costs flow along a whole straight run
+# in one sweep, so only paths with many turns need many passes.
+def clusterCosts(values: np.ndarray, passable: np.ndarray, sources: list) -> np.ndarray:
+
+    count, size, _ = values.shape
+    searches = max((len(clusterSources) for clusterSources in sources), default=0)
+    costs = np.full((count, max(searches, 1), size, size), INFINITY, dtype=np.int64)
+
+    for index, clusterSources in enumerate(sources):
+        for search, positions in enumerate(clusterSources):
+            for row, col in positions:
+                costs[index, search, row, col] = 0
+
+    # The cost of each move down (between rows) and right (between columns), INFINITY if it is not possible
+    down = np.where(passable[:, :-1] & passable[:, 1:], values[:, :-1] + values[:, 1:], INFINITY)[:, None]
+    right = np.where(passable[:, :, :-1] & passable[:, :, 1:], values[:, :, :-1] + values[:, :, 1:], INFINITY)[:, None]
+
+    while True:
+        previous = costs.copy()
+
+        for row in range(1, size):
+            np.minimum(costs[:, :, row], costs[:, :, row - 1] + down[:, :, row - 1], out=costs[:, :, row])
+        for row in range(size - 2, -1, -1):
+            np.minimum(costs[:, :, row], costs[:, :, row + 1] + down[:, :, row], out=costs[:, :, row])
+        for col in range(1, size):
+            np.minimum(costs[..., col], costs[..., col - 1] + right[..., col - 1], out=costs[..., col])
+        for col in range(size - 2, -1, -1):
+            np.minimum(costs[..., col], costs[..., col + 1] + right[..., col], out=costs[..., col])
+
+        if np.array_equal(costs, previous):
+            return costs
+
+
+
+# Returns the hierarchy of a grid for a cluster size and mode, building it only on first use. Cached on the grid.
+def getHierarchy(grid: Grid, clusterSize: int, exact: bool) -> Hierarchy:
+
+    key = ("hierarchy", clusterSize, exact)
+    if key not in grid.derived:
+        grid.derived[key] = Hierarchy(grid, clusterSize, exact)
+
+    return grid.derived[key]
+
+
+
+# A* over the abstract graph from the start to the goal, with the start linked to the transitions of its cluster
+# and the transitions of the goal's cluster linked to the goal (startCosts and goalCosts are their cluster costs).
+# Returns (cost, list of cells) or (None, None).
+def searchAbstract(hierarchy: Hierarchy, start: int, goal: int, startCosts, goalCosts, estimate):
+
+    grid = hierarchy.grid
+    startLinks = linksWithin(hierarchy, start, startCosts, hierarchy.transitions, goal)
+    goalLinks = dict(linksWithin(hierarchy, goal, goalCosts, hierarchy.transitions))
+
+    frontier = OpenSet()
+    cost = {start: 0}
+    parent = {start: None}
+    tieBreak = 0
+    frontier.push(start, (estimate(grid.location(start)), tieBreak), None)
+
+    while len(frontier) > 0:
+        cell, _, _ = frontier.pop()
+        g = cost[cell]
+
+        if cell == goal:
+            path = []
+            while cell is not None:
+                path.append(cell)
+                cell = parent[cell]
+            path.reverse()
+            return g, path
+
+        moves = hierarchy.edges.get(cell, [])
+        if cell == start:
+            moves = moves + startLinks
+        if cell in goalLinks:
+            moves = moves + [(goal, goalLinks[cell])]
+
+        for target, moveCost in moves:
+            newCost = g + moveCost
+            if newCost < cost.get(target, INFINITY):
+                cost[target] = newCost
+                parent[target] = cell
+                tieBreak += 1
+                frontier.push(target, (newCost + estimate(grid.location(target)), tieBreak), None)
+
+    return None, None
+
+
+# Links a cell to the places of its cluster (transitions, or entrance sides with cells given) it can reach,
+# as a list of (place, cost). For transitions the other end is also linked directly when it is in the same cluster.
+def linksWithin(hierarchy: Hierarchy, cell: int, costs, places, other: Optional[int] = None, cells=None) -> list:
+
+    cluster = hierarchy.cluster(cell)
+    links = []
+
+    for place in places[cluster]:
+        cost = min(costs[hierarchy.local(item)] for item in cells[place]) if cells is not None else costs[hierarchy.local(place)]
+        if cost < INFINITY:
+            links.append((place, int(cost)))
+
+    if other is not None and hierarchy.cluster(other) == cluster and costs[hierarchy.local(other)] < INFINITY:
+        links.append((other, int(costs[hierarchy.local(other)])))
+
+    return links
+
+
+# Dijkstra's algorithm over the entrance sides, which can only underestimate the cost of any path.
+# Returns the lower bound on the cost from start to goal.
+def searchLowerBound(hierarchy: Hierarchy, start: int, goal: int, startCosts, goalCosts) -> int:
+
+    # The start and goal are given the places after the entrance sides
+    startPlace, goalPlace = len(hierarchy.sideCells), len(hierarchy.sideCells) + 1
+    startLinks = linksWithin(hierarchy, start, startCosts, hierarchy.sides, cells= hierarchy.sideCells)
+    goalLinks = dict(linksWithin(hierarchy, goal, goalCosts, hierarchy.sides, cells= hierarchy.sideCells))
+
+    if hierarchy.cluster(start) == hierarchy.cluster(goal) and startCosts[hierarchy.local(goal)] < INFINITY:
+        startLinks.append((goalPlace, int(startCosts[hierarchy.local(goal)])))
+
+    frontier = OpenSet()
+    cost = {startPlace: 0}
+    frontier.push(startPlace, 0, None)
+
+    while len(frontier) > 0:
+        place, g, _ = frontier.pop()
+        if place == goalPlace:
+            return g
+
+        moves = startLinks if place == startPlace else hierarchy.sideEdges[place]
+        if place in goalLinks:
+            moves = moves + [(goalPlace, goalLinks[place])]
+
+        for target, moveCost in moves:
+            if g + moveCost < cost.get(target, INFINITY):
+                cost[target] = g + moveCost
+                frontier.push(target, g + moveCost, None)
+
+    # The relaxed graph only underestimates, so it always reaches the goal when the abstract search did
+    raise RuntimeError(f"No lower bound from {hierarchy.grid.location(start)} to {hierarchy.grid.location(goal)}, "
+                       "though a path was found")
+
+
+
+@click.command(no_args_is_help=True)
+@click.argument('start', required=True, callback=validate_location)
+@click.argument('goal', required=True, callback=validate_location)
+@click.argument("terrain_map", required=True, type=click.Path(exists=True), callback=validate_map)
+@click.argument("terrain_threshold", required=True, type=click.IntRange(min=0,max=1000))
+@click.option("--mode", type=click.Choice(MODES), default="near_optimal", show_default=True)
+@click.option("--cluster-size", type=click.IntRange(min=2), default=CLUSTER_SIZE, show_default=True)
+@click.option("--heuristic", type=click.Choice(list(HEURISTICS)), default="manhattan", show_default=True)
+def main(start: Location, goal: Location, terrain_map: Map, terrain_threshold: int,
+         mode: str, cluster_size: int, heuristic: str) -> None:
+    """Finds a path with hierarchical path-finding, reporting the time taken to build the clusters and to search.
+
+    \b
+    python hierarchy.py 20,80 80,40 resources/terrain04.txt 500 --mode exact
+    """
+    began = time.perf_counter()
+    getHierarchy(getGrid(terrain_map, terrain_threshold), cluster_size, exact= mode == "exact")
+    built = time.perf_counter()
+
+    cost, path, bound = find_hierarchical_path(start, goal, terrain_map, terrain_threshold, mode, cluster_size,
+                                               HEURISTICS[heuristic])
+    searched = time.perf_counter()
+
+    if path:
+        log(f"The path is {path} with cost {cost}, at most {bound:.4f} times the lowest cost.")
+    else:
+        log('No path found')
+    log(f"Built the clusters in {built - began:.3f}s, searched in {searched - built:.3f}s.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+import numpy as np
+from typing import Iterable, Optional
+from events import log_enqueue_state, log_visit_state, logging_enabled
+from maps import Location, Map
+
+from grid import Grid
+from heuristics import getCheapestMove
+from methods import calculateManhattanDistance
+from openset import OpenSet
+from safe_pathfinding_task2 import find_shortest_safe_path
+
+
+# A change to a map: the location and its new value.
+Change = tuple[Location, int]
+
+INFINITY = float("inf")
+
+
+
+# Keeps the search for one Task 1 query between calls, for maps that change a few locations at a time
+# (and agents that move along the path), repairing the previous search instead of starting again.
+#
+# This is D* Lite (Koenig and Likhachev): a search backwards from the goal that keeps, for every location,
+# g, its cheapest known cost to the goal, and rhs, the cheapest cost through its neighbours' g values.
+# A location whose two differ is inconsistent and waits in the frontier. When locations change, only
+# they and their neighbours are recalculated, and the search carries on from the locations that became
+# inconsistent until the start is consistent again, so a small edit far from the path costs little.
+# Moves are symmetric, so the cheapest path from the goal back to the start is the cheapest path reversed.
+#
+# The heuristic is the scaled manhattan distance towards the start. When the start moves, the priorities already
+# in the frontier are corrected by a running offset (km) rather than recalculated. When a change lowers the
+# cheapest move the heuristic would overestimate, so it is scaled down and every priority recalculated.
+#
+# D* Lite needs every move to cost more than 0, but locations of value 0 make moves of cost 0, and two locations
+# joined by one could keep each other consistent after a change cut both off from the goal. So the planner
+# works with every move cost multiplied by the number of locations plus 1 for the move itself. A path of
+# n moves then costs n more than the scaled cost, and n is always below the number of locations, so the
+# cheapest paths are the same (the one with fewest moves among equally cheap ones) and the cost is scaled back exactly.
+class IncrementalPlanner:
+
+    def __init__(self, start: Location, goal: Location, terrain_map: Map, terrain_threshold: int):
+        self.start = tuple(start)
+        self.goal = tuple(goal)
+
+        # A grid of its own, since the changes are applied to it.
+        self.grid = Grid(terrain_map, terrain_threshold)
+        size = self.grid.rowSize * self.grid.colSize
+        self.scale = size
+        self.cheapestMove = getCheapestMove(self.grid) * self.scale + 1
+
+        self.g = [INFINITY] * size
+        self.rhs = [INFINITY] * size
+        self.frontier = OpenSet()
+        self.km = 0
+
+        # Total number of locations expanded, over the first search and every repair.
+        self.expansions = 0
+
+        goalCell = self.grid.cell(self.goal)
+        self.rhs[goalCell] = 0
+        self.frontier.push(goalCell, self.key(goalCell), None)
+
+
+    def find_path(self) -> tuple[Optional[int],Optional[list[Location]]]:
+        """Returns the lowest cost path from the start to the goal on the map as it is now, as find_shortest_path would.
+           Returns (cost,list(locations)) when a path is found, (None,None) if no path is found.
+           Only the locations affected by changes since the last call are searched again.
+           Among equally cheap paths the one returned may differ from the one find_shortest_path returns."""
+
+        self.computeShortestPath()
+
+        startCell = self.grid.cell(self.start)
+        if self.g[startCell] == INFINITY:
+            return None, None
+
+        return self.g[startCell] // self.scale, self.getPath(startCell)
+
+
+    def update_terrain(self, changes: Iterable[Change]) -> None:
+        """Applies changes to the terrain map, given as (location, new value) pairs.
+           The search is repaired on the next call to find_path."""
+
+        grid = self.grid
+        touched = set()
+        for location, value in changes:
+            location = tuple(location)
+            grid.setValue(location, int(value))
+
+            # The moves into and out of the location changed, so it and its neighbours need their rhs recalculated.
+            cell = grid.cell(location)
+            touched.add(cell)
+            touched.update(self.getAround(cell))
+
+        cheapestMove = getCheapestMove(grid) * self.scale + 1
+        if cheapestMove < self.cheapestMove:
+            self.cheapestMove = cheapestMove
+            self.rekey()
+
+        for cell in touched:
+            self.updateCell(cell)
+
+
+    def move_start(self, location: Location) -> None:
+        """Moves the start, normally to the next location along the path as the agent follows it.
+           The search is repaired on the next call to find_path."""
+
+        location = tuple(location)
+        self.km += self.cheapestMove * calculateManhattanDistance(self.start, location)
+        self.start = location
+
+
+    # The frontier priority of a location: its lower estimate of the cost of a path through it, then its cost to the goal.
+    def key(self, cell: int) -> tuple:
+        cost = min(self.g[cell], self.rhs[cell])
+        return cost + self.cheapestMove * calculateManhattanDistance(self.grid.location(cell), self.start) + self.km, cost
+
+
+    # Recalculates the priority of every location in the frontier with the current heuristic and start.
+    def rekey(self) -> None:
+        cells = list(self.frontier.position)
+        self.frontier = OpenSet()
+        self.km = 0
+        for cell in cells:
+            self.frontier.push(cell, self.key(cell), None)
+
+
+    # Returns (neighbour cell, scaled move cost) for every possible move out of a cell, as Grid.moves.
+    def moves(self, cell: int) -> list:
+        scale = self.scale
+        return [(target, cost * scale + 1) for target, cost in self.grid.moves(cell)]
+
+
+    # The cells next to a cell, whether or not the moves to them are possible now.
+    def getAround(self, cell: int) -> list[int]:
+        grid = self.grid
+        row, col = grid.location(cell)
+        return [grid.cell((row + rowStep, col + colStep)) for rowStep, colStep in ((-1, 0), (1, 0), (0, 1), (0, -1))
+                if 0 <= row + rowStep < grid.rowSize and 0 <= col + colStep < grid.colSize]
+
+
+    # Recalculates the rhs of a cell from its neighbours, and places it in the frontier only if it is inconsistent.
+    def updateCell(self, cell: int) -> None:
+
+        if cell != self.grid.cell(self.goal):
+            g = self.g
+            self.rhs[cell] = min((cost + g[target] for target, cost in self.moves(cell)), default=INFINITY)
+
+        if cell in self.frontier:
+            self.frontier.remove(cell)
+
+        if self.g[cell] != self.rhs[cell]:
+            self.frontier.push(cell, self.key(cell), None)
+            if logging_enabled():
+                log_enqueue_state(self.grid.location(cell), self.rhs[cell])
+
+
+    # Expands inconsistent locations in priority order until the start is consistent
+    # and no location in the frontier could still lower its cost.
+    def computeShortestPath(self) -> None:
+
+        g = self.g
+        rhs = self.rhs
+        frontier = self.frontier
+        grid = self.grid
+        startCell = grid.cell(self.start)
+        logEvents = logging_enabled()
+
+        while len(frontier) > 0 and (frontier.heap[0][0] < self.key(startCell) or rhs[startCell] != g[startCell]):
+
+            cell, priority, _ = frontier.pop()
+
+            # The start has moved since the priority was worked out, so it is placed again with the current one.
+            current = self.key(cell)
+            if priority < current:
+                frontier.push(cell, current, None)
+                continue
+
+            self.expansions += 1
+            if logEvents:
+                log_visit_state(grid.location(cell), rhs[cell])
+
+            if g[cell] > rhs[cell]:
+                # The cost fell: every neighbour may now be reached more cheaply through this location
+                g[cell] = rhs[cell]
+                for target, cost in self.moves(cell):
+                    if cost + g[cell] < rhs[target]:
+                        rhs[target] = cost + g[cell]
+                        self.updateCell(target)
+            else:
+                # The cost rose: this location and every neighbour that relied on it are recalculated
+                g[cell] = INFINITY
+                self.updateCell(cell)
+                for target in self.getAround(cell):
+                    self.updateCell(target)
+
+
+    # Follows the cheapest move from each location, starting at the start, until the goal is reached.
+    # Every scaled move costs more than 0, so g falls with every step and the walk can't go round in circles.
+    def getPath(self, cell: int) -> list[Location]:
+
+        g = self.g
+        goalCell = self.grid.cell(self.goal)
+        path = [self.grid.location(cell)]
+
+        while cell != goalCell:
+            cell = min(self.moves(cell), key=lambda move: move[1] + g[move[0]])[0]
+            path.append(self.grid.location(cell))
+
+        return path
+
+
+
+# Keeps the answer to one Task 2 query between calls, for maps that change a few locations at a time.
+# The label-setting search of Task 2 keeps many paths per location, so it is not repaired like the
+# Task 1 search: the previous answer is kept for as long as no change can affect it, and the query is
+# searched again from scratch otherwise. A change can only make the answer cheaper or safer if it lowers
+# a terrain value or an enemy presence, and can only make it dearer or less safe if it is on the path.
+# Any other change leaves every other path at best as cheap and as safe as it was, so the answer stands.
+class IncrementalSafePlanner:
+
+    def __init__(self, start: Location, goal: Location, terrain_map: Map, terrain_threshold: int,
+                 success_map: Map, success_threshold: float):
+        self.start = tuple(start)
+        self.goal = tuple(goal)
+        self.terrainMap = np.array(terrain_map, dtype=np.int64)
+        self.terrainThreshold = terrain_threshold
+        self.successMap = np.array(success_map, dtype=np.float64)
+        self.successThreshold = success_threshold
+
+        self.result = None
+        self.onPath = set()
+
+        # How many times the query was searched, and how many calls were answered without searching.
+        self.searches = 0
+        self.reused = 0
+
+
+    def find_path(self) -> tuple[Optional[int],Optional[float],Optional[list[Location]]]:
+        """Returns the lowest cost path meeting the success threshold on the maps as they are now,
+           as find_shortest_safe_path would. Returns (cost,prob_success,list(locations)) when a path is found,
+           (None,None,None) if no path is found.
+           The query is only searched again when a change since the last call could affect the answer."""
+
+        if self.result is not None:
+            self.reused += 1
+            return self.copy(self.result)
+
+        self.searches += 1
+        self.result = find_shortest_safe_path(self.start, self.goal, self.terrainMap, self.terrainThreshold,
+                                              self.successMap, self.successThreshold)
+        self.onPath = set() if self.result[2] is None else set(self.result[2])
+        return self.copy(self.result)
+
+
+    def update_terrain(self, changes: Iterable[Change]) -> None:
+        """Applies changes to the terrain map, given as (location, new value) pairs."""
+        self.applyChanges(self.terrainMap, changes)
+
+
+    def update_success(self, changes: Iterable[Change]) -> None:
+        """Applies changes to the enemy presence map, given as (location, new value) pairs."""
+        self.applyChanges(self.successMap, changes)
+
+
+    # Writes the changes into a map, forgetting the answer if any of them could affect it.
+    def applyChanges(self, map: np.ndarray, changes: Iterable[Change]) -> None:
+
+        for location, value in changes:
+            location = tuple(location)
+            if value < map[location] or location in self.onPath:
+                self.result = None
+            map[location] = value
+
+
+    # Answers are handed out as copies, so changing a returned path never changes the one kept.
+    @staticmethod
+    def copy(result: tuple) -> tuple:
+        return result[:-1] + (None if result[-1] is None else list(result[-1]),)
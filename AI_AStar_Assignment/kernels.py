@@ -0,0 +1,457 @@
+from array import array
+from typing import Optional
+import numpy as np
+from events import log_enqueue_state, log_ignore_state, log_visit_state, VISITED, ENQUEUED, IGNORED
+from maps import Location
+
+from methods import TIE_BREAKS
+from heuristics import Heuristic, getCheapestMove, manhattanHeuristic, scaledManhattanHeuristic
+from pareto import BOUND_TOLERANCE
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# Compiled search loops for Task 1 and Task 2 (the "numba" backend).
+# Each node of the Python searches is a handful of Python objects and calls; these loops do the same work on
+# flat NumPy arrays instead (the grid's neighbour and move cost tables, and arrays of node cells, costs,
+# parents and heap positions), so Numba can compile them to machine code. They expand the same nodes in
+# the same order as the Python searches, breaking ties the same way, so they find the same paths and,
+# recorded as they go and logged afterwards, the same events.
+#
+# They only cover the plain searches: a single path, with the manhattan or scaled manhattan heuristic,
+# on a precomputed grid, without stats, pruning, bounds or the bidirectional mode. Anything else, or
+# any search at all when Numba isn't installed, is left to the Python searches (see runPathKernel).
+#
+# Without Numba the loops below are ordinary Python, far slower than the Python searches, which is only
+# useful for checking them (see test_kernels.py). INTERPRET makes the searches use them even so.
+
+# The ways the searches can run: the Python loops, or the compiled ones when Numba is installed.
+BACKENDS = ("python", "numba")
+NUMBA_AVAILABLE = njit is not None
+INTERPRET = False
+
+# The best known cost of a location not reached yet, and the number of nodes and events room is first made for.
+UNREACHED = np.iinfo(np.int64).max
+FIRST_CAPACITY = 1024
+
+
+# Compiles a function with Numba when it is installed, otherwise leaves it as it is.
+def kernel(function):
+    return function if njit is None else njit(cache=True, nogil=True)(function)
+
+
+# Whether the search loops below can be used, compiled, or uncompiled for checking.
+def kernelsEnabled(backend: str) -> bool:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+    return backend == "numba" and (NUMBA_AVAILABLE or INTERPRET)
+
+
+# The factor the kernels multiply the manhattan distance by for a heuristic, or None if they can't use it.
+def getHeuristicScale(heuristic: Heuristic, grid) -> Optional[int]:
+    if heuristic is manhattanHeuristic:
+        return 1
+    if heuristic is scaledManhattanHeuristic:
+        return getCheapestMove(grid)
+    return None
+
+
+
+# Whether node a comes before node b in the frontier. Task 1 orders nodes by (f, tie key, node), since nodes
+# are numbered in the order they are placed, as its tie-break counter is. Task 2 orders them by
+# (f, tie key, 1 - success probability, location, node), and the order of locations is the order of their cells.
+@kernel
+def _before(a, b, nodeF, nodeTie, nodeRisk, nodeCell, safe):
+    if nodeF[a] != nodeF[b]:
+        return nodeF[a] < nodeF[b]
+    if nodeTie[a] != nodeTie[b]:
+        return nodeTie[a] < nodeTie[b]
+    if safe:
+        if nodeRisk[a] != nodeRisk[b]:
+            return nodeRisk[a] < nodeRisk[b]
+        if nodeCell[a] != nodeCell[b]:
+            return nodeCell[a] < nodeCell[b]
+    return a < b
+
+
+# The frontier is a binary min-heap of nodes with the position of each node in it (-1 when it isn't),
+# as openset.OpenSet but keyed by node. These return the new size of the heap.
+@kernel
+def _siftUp(heap, position, index, nodeF, nodeTie, nodeRisk, nodeCell, safe):
+    node = heap[index]
+    while index > 0:
+        parentIndex = (index - 1) >> 1
+        parent = heap[parentIndex]
+        if not _before(node, parent, nodeF, nodeTie, nodeRisk, nodeCell, safe):
+            break
+        heap[index] = parent
+        position[parent] = index
+        index = parentIndex
+    heap[index] = node
+    position[node] = index
+
+
+@kernel
+def _siftDown(heap, size, position, index, nodeF, nodeTie, nodeRisk, nodeCell, safe):
+    node = heap[index]
+    while True:
+        childIndex = 2 * index + 1
+        if childIndex >= size:
+            break
+        rightIndex = childIndex + 1
+        if rightIndex < size and _before(heap[rightIndex], heap[childIndex], nodeF, nodeTie, nodeRisk, nodeCell, safe):
+            childIndex = rightIndex
+        child = heap[childIndex]
+        if not _before(child, node, nodeF, nodeTie, nodeRisk, nodeCell, safe):
+            break
+        heap[index] = child
+        position[child] = index
+        index = childIndex
+    heap[index] = node
+    position[node] = index
+
+
+@kernel
+def _push(heap, size, position, node, nodeF, nodeTie, nodeRisk, nodeCell, safe):
+    heap[size] = node
+    _siftUp(heap, position, size, nodeF, nodeTie, nodeRisk, nodeCell, safe)
+    return size + 1
+
+
+@kernel
+def _remove(heap, size, position, node, nodeF, nodeTie, nodeRisk, nodeCell, safe):
+    index = position[node]
+    position[node] = -1
+    size -= 1
+    if index < size:
+        last = heap[size]
+        heap[index] = last
+        position[last] = index
+        _siftUp(heap, position, index, nodeF, nodeTie, nodeRisk, nodeCell, safe)
+        _siftDown(heap, size, position, position[last], nodeF, nodeTie, nodeRisk, nodeCell, safe)
+    return size
+
+
+# Returns a copy of an array with room for twice as many items.
+@kernel
+def _grown(values):
+    grown = np.empty(values.shape[0] * 2, dtype=values.dtype)
+    grown[:values.shape[0]] = values
+    return grown
+
+
+@kernel
+def _distance(cell, goalCell, colSize):
+    return abs(cell // colSize - goalCell // colSize) + abs(cell % colSize - goalCell % colSize)
+
+
+# The tie key of a node under the tie-breaking policy numbered tieBreak in methods.TIE_BREAKS, as methods.getTieKey.
+@kernel
+def _tieKey(tieBreak, g, h, cell):
+    if tieBreak == 1:
+        return -g
+    if tieBreak == 2:
+        return h
+    if tieBreak == 3:
+        return cell
+    return 0
+
+
+
+# Task 1, as find_shortest_path. Returns the goal node (-1 if no path was found), the cell, cost and
+# parent of every node, and the kind, cell and cost of every event when record is set.
+@kernel
+def searchPathKernel(neighbour, moveCost, colSize, startCell, goalCell, scale, tieBreak, record):
+
+    cells = neighbour.shape[0] // 4
+    bestCost = np.full(cells, UNREACHED, dtype=np.int64)
+    frontierNode = np.full(cells, -1, dtype=np.int64)
+
+    nodeCell = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    nodeG = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    nodeF = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    nodeTie = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    nodeParent = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    nodeRisk = np.zeros(1, dtype=np.float64)
+    position = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    heap = np.empty(cells, dtype=np.int64)
+    nodeCount = 1
+    size = 0
+
+    eventKind = np.empty(FIRST_CAPACITY if record else 0, dtype=np.int8)
+    eventCell = np.empty(FIRST_CAPACITY if record else 0, dtype=np.int64)
+    eventG = np.empty(FIRST_CAPACITY if record else 0, dtype=np.int64)
+    eventCount = 0
+
+    nodeCell[0] = startCell
+    nodeG[0] = 0
+    nodeF[0] = scale * _distance(startCell, goalCell, colSize)
+    nodeTie[0] = _tieKey(tieBreak, 0, nodeF[0], startCell)
+    nodeParent[0] = -1
+    size = _push(heap, size, position, 0, nodeF, nodeTie, nodeRisk, nodeCell, False)
+    bestCost[startCell] = 0
+    frontierNode[startCell] = 0
+    if record:
+        eventKind[0], eventCell[0], eventG[0] = ENQUEUED, startCell, 0
+        eventCount = 1
+
+    while size > 0:
+
+        node = heap[0]
+        size = _remove(heap, size, position, node, nodeF, nodeTie, nodeRisk, nodeCell, False)
+        cell = nodeCell[node]
+        frontierNode[cell] = -1
+
+        if record:
+            # Room for this event and one for each of the four moves
+            if eventCount + 5 > eventKind.shape[0]:
+                eventKind, eventCell, eventG = _grown(eventKind), _grown(eventCell), _grown(eventG)
+            eventKind[eventCount], eventCell[eventCount], eventG[eventCount] = VISITED, cell, nodeG[node]
+            eventCount += 1
+
+        if cell == goalCell:
+            return node, nodeCell[:nodeCount], nodeG[:nodeCount], nodeParent[:nodeCount], \
+                   eventKind[:eventCount], eventCell[:eventCount], eventG[:eventCount]
+
+        for index in range(cell * 4, cell * 4 + 4):
+            target = neighbour[index]
+            if target < 0:
+                continue
+
+            g = nodeG[node] + moveCost[index]
+            if g >= bestCost[target]:
+                if record:
+                    eventKind[eventCount], eventCell[eventCount], eventG[eventCount] = IGNORED, target, g
+                    eventCount += 1
+                continue
+
+            if nodeCount == nodeCell.shape[0]:
+                nodeCell, nodeG, nodeF, nodeTie = _grown(nodeCell), _grown(nodeG), _grown(nodeF), _grown(nodeTie)
+                nodeParent, position = _grown(nodeParent), _grown(position)
+
+            # A location has at most one node in the frontier, the one on the cheapest path found to it
+            child = nodeCount
+            nodeCount += 1
+            nodeCell[child] = target
+            nodeG[child] = g
+            nodeF[child] = g + scale * _distance(target, goalCell, colSize)
+            nodeTie[child] = _tieKey(tieBreak, g, nodeF[child] - g, target)
+            nodeParent[child] = node
+            if frontierNode[target] >= 0:
+                size = _remove(heap, size, position, frontierNode[target], nodeF, nodeTie, nodeRisk, nodeCell, False)
+            size = _push(heap, size, position, child, nodeF, nodeTie, nodeRisk, nodeCell, False)
+            frontierNode[target] = child
+            bestCost[target] = g
+
+            if record:
+                eventKind[eventCount], eventCell[eventCount], eventG[eventCount] = ENQUEUED, target, g
+                eventCount += 1
+
+    return -1, nodeCell[:nodeCount], nodeG[:nodeCount], nodeParent[:nodeCount], \
+           eventKind[:eventCount], eventCell[:eventCount], eventG[:eventCount]
+
+
+
+# Task 2, as searchLabels stopping at the first path. Returns the goal node (-1 if no path was found), the cell,
+# cost, success probability and parent of every node, and the kind, cell, cost and success probability of
+# every event when record is set. The labels at each location are a linked list of their nodes, which holds
+# the same labels as pareto.ParetoSet, so the same labels are dominated and superseded.
+@kernel
+def searchSafePathKernel(neighbour, moveCost, safety, survivalBound, colSize, startCell, goalCell, scale,
+                         tieBreak, successThreshold, record):
+
+    cells = neighbour.shape[0] // 4
+    labelHead = np.full(cells, -1, dtype=np.int64)
+
+    nodeCell = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    nodeG = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    nodeF = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    nodeTie = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    nodeProb = np.empty(FIRST_CAPACITY, dtype=np.float64)
+    nodeRisk = np.empty(FIRST_CAPACITY, dtype=np.float64)
+    nodeParent = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    nextLabel = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    position = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    heap = np.empty(FIRST_CAPACITY, dtype=np.int64)
+    nodeCount = 0
+    size = 0
+
+    eventKind = np.empty(FIRST_CAPACITY if record else 0, dtype=np.int8)
+    eventCell = np.empty(FIRST_CAPACITY if record else 0, dtype=np.int64)
+    eventG = np.empty(FIRST_CAPACITY if record else 0, dtype=np.int64)
+    eventProb = np.empty(FIRST_CAPACITY if record else 0, dtype=np.float64)
+    eventCount = 0
+
+    # As pareto.canSucceed
+    startProb = safety[startCell]
+    if not (startProb >= successThreshold
+            and startProb * survivalBound[startCell] * (1 + BOUND_TOLERANCE) >= successThreshold):
+        return -1, nodeCell[:0], nodeG[:0], nodeProb[:0], nodeParent[:0], \
+               eventKind[:0], eventCell[:0], eventG[:0], eventProb[:0]
+
+    nodeCell[0] = startCell
+    nodeG[0] = 0
+    nodeF[0] = scale * _distance(startCell, goalCell, colSize)
+    nodeTie[0] = _tieKey(tieBreak, 0, nodeF[0], startCell)
+    nodeProb[0] = startProb
+    nodeRisk[0] = 1 - startProb
+    nodeParent[0] = -1
+    nextLabel[0] = -1
+    labelHead[startCell] = 0
+    nodeCount = 1
+    size = _push(heap, size, position, 0, nodeF, nodeTie, nodeRisk, nodeCell, True)
+    if record:
+        eventKind[0], eventCell[0], eventG[0], eventProb[0] = ENQUEUED, startCell, 0, startProb
+        eventCount = 1
+
+    while size > 0:
+
+        node = heap[0]
+        size = _remove(heap, size, position, node, nodeF, nodeTie, nodeRisk, nodeCell, True)
+        cell = nodeCell[node]
+        if cell == goalCell:
+            return node, nodeCell[:nodeCount], nodeG[:nodeCount], nodeProb[:nodeCount], nodeParent[:nodeCount], \
+                   eventKind[:eventCount], eventCell[:eventCount], eventG[:eventCount], eventProb[:eventCount]
+
+        if record:
+            if eventCount + 5 > eventKind.shape[0]:
+                eventKind, eventCell = _grown(eventKind), _grown(eventCell)
+                eventG, eventProb = _grown(eventG), _grown(eventProb)
+            eventKind[eventCount], eventCell[eventCount] = VISITED, cell
+            eventG[eventCount], eventProb[eventCount] = nodeG[node], nodeProb[node]
+            eventCount += 1
+
+        for index in range(cell * 4, cell * 4 + 4):
+            target = neighbour[index]
+            if target < 0:
+                continue
+
+            g = nodeG[node] + moveCost[index]
+            prob = nodeProb[node] * safety[target]
+
+            # Ignored if it can't meet the threshold or a label at the location is at least as cheap and as safe
+            ignored = not (prob >= successThreshold
+                           and prob * survivalBound[target] * (1 + BOUND_TOLERANCE) >= successThreshold)
+            label = labelHead[target]
+            while not ignored and label >= 0:
+                ignored = nodeG[label] <= g and nodeProb[label] >= prob
+                label = nextLabel[label]
+
+            if ignored:
+                if record:
+                    eventKind[eventCount], eventCell[eventCount] = IGNORED, target
+                    eventG[eventCount], eventProb[eventCount] = g, prob
+                    eventCount += 1
+                continue
+
+            if nodeCount == nodeCell.shape[0]:
+                nodeCell, nodeG, nodeF, nodeTie = _grown(nodeCell), _grown(nodeG), _grown(nodeF), _grown(nodeTie)
+                nodeProb, nodeRisk, nodeParent = _grown(nodeProb), _grown(nodeRisk), _grown(nodeParent)
+                nextLabel, position, heap = _grown(nextLabel), _grown(position), _grown(heap)
+
+            child = nodeCount
+            nodeCount += 1
+            nodeCell[child] = target
+            nodeG[child] = g
+            nodeF[child] = g + scale * _distance(target, goalCell, colSize)
+            nodeTie[child] = _tieKey(tieBreak, g, nodeF[child] - g, target)
+            nodeProb[child] = prob
+            nodeRisk[child] = 1 - prob
+            nodeParent[child] = node
+            position[child] = -1
+
+            # The labels the child dominates are superseded, and taken out of the frontier if still there
+            previous = -1
+            label = labelHead[target]
+            while label >= 0:
+                following = nextLabel[label]
+                if nodeG[label] >= g and nodeProb[label] <= prob:
+                    if previous < 0:
+                        labelHead[target] = following
+                    else:
+                        nextLabel[previous] = following
+                    if position[label] >= 0:
+                        size = _remove(heap, size, position, label, nodeF, nodeTie, nodeRisk, nodeCell, True)
+                else:
+                    previous = label
+                label = following
+            nextLabel[child] = labelHead[target]
+            labelHead[target] = child
+
+            size = _push(heap, size, position, child, nodeF, nodeTie, nodeRisk, nodeCell, True)
+            if record:
+                eventKind[eventCount], eventCell[eventCount] = ENQUEUED, target
+                eventG[eventCount], eventProb[eventCount] = g, prob
+                eventCount += 1
+
+    return -1, nodeCell[:nodeCount], nodeG[:nodeCount], nodeProb[:nodeCount], nodeParent[:nodeCount], \
+           eventKind[:eventCount], eventCell[:eventCount], eventG[:eventCount], eventProb[:eventCount]
+
+
+
+# Runs the Task 1 kernel in place of find_shortest_path's own loop, returning (cost,list(locations)) or
+# (None,None) as it does, or None if the kernel can't be used for this search and the Python loop should run.
+def runPathKernel(grid, start: Location, goal: Location, heuristic: Heuristic, logEvents: bool,
+                  tie_break: str = "default") -> Optional[tuple]:
+
+    scale = getHeuristicScale(heuristic, grid) if hasattr(grid, "neighbour") else None
+    if scale is None:
+        return None
+
+    goalNode, nodeCell, nodeG, nodeParent, eventKind, eventCell, eventG = searchPathKernel(
+        np.frombuffer(grid.neighbour, dtype=np.int32), np.frombuffer(grid.moveCost, dtype=np.int64),
+        grid.colSize, grid.cell(start), grid.cell(goal), scale, TIE_BREAKS.index(tie_break), logEvents)
+
+    if logEvents:
+        replayEvents(grid, eventKind, eventCell, eventG)
+    if goalNode < 0:
+        return None, None
+    return int(nodeG[goalNode]), getKernelPath(grid, nodeCell, nodeParent, goalNode)
+
+
+# Runs the Task 2 kernel in place of searchLabels' own loop, returning its list of solutions,
+# or None if the kernel can't be used for this search and the Python loop should run.
+def runSafePathKernel(grid, safety, survivalBound, start: Location, goal: Location, heuristic: Heuristic,
+                      success_threshold: float, logEvents: bool, tie_break: str = "default") -> Optional[list]:
+
+    scale = getHeuristicScale(heuristic, grid) if hasattr(grid, "neighbour") and isinstance(safety, array) else None
+    if scale is None:
+        return None
+
+    goalNode, nodeCell, nodeG, nodeProb, nodeParent, eventKind, eventCell, eventG, eventProb = searchSafePathKernel(
+        np.frombuffer(grid.neighbour, dtype=np.int32), np.frombuffer(grid.moveCost, dtype=np.int64),
+        np.frombuffer(safety, dtype=np.float64), np.frombuffer(survivalBound, dtype=np.float64),
+        grid.colSize, grid.cell(start), grid.cell(goal), scale, TIE_BREAKS.index(tie_break), float(success_threshold),
+        logEvents)
+
+    if logEvents:
+        replayEvents(grid, eventKind, eventCell, eventG, eventProb)
+    if goalNode < 0:
+        return []
+    return [(int(nodeG[goalNode]), float(nodeProb[goalNode]), getKernelPath(grid, nodeCell, nodeParent, goalNode))]
+
+
+# The locations of the path to a node, from the start, following the parents the kernel recorded.
+def getKernelPath(grid, nodeCell, nodeParent, node: int) -> list[Location]:
+
+    path = []
+    while node >= 0:
+        path.append(grid.location(int(nodeCell[node])))
+        node = int(nodeParent[node])
+
+    path.reverse()
+    return path
+
+
+# Logs the events a kernel recorded, as the Python searches would have logged them.
+def replayEvents(grid, eventKind, eventCell, eventG, eventProb=None) -> None:
+
+    logs = {VISITED: log_visit_state, ENQUEUED: log_enqueue_state, IGNORED: log_ignore_state}
+    for index, (kind, cell, g) in enumerate(zip(eventKind.tolist(), eventCell.tolist(), eventG.tolist())):
+        if eventProb is None:
+            logs[kind](grid.location(cell), g)
+        else:
+            logs[kind](grid.location(cell), g, float(eventProb[index]))
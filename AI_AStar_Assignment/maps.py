@@ -1,7 +1,120 @@
-import numpy as np
+import os
+import re
+import warnings
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
 
 Location = tuple[int,int]
-Map = np.ndarray
 
-def read_map(file_name: str) -> Map:
-    return np.loadtxt(file_name, dtype=int)
+# Maps are NumPy arrays, but NumPy is only imported once a map is read, so modules that only need
+# locations (such as the event log and the pure-Python searches in tiny.py) start without it.
+Map = "np.ndarray"
+
+LOCATION_REGEX=r'(\d+),(\d+)'
+def parse_location(location_str:str) -> Location:
+    match = re.match(LOCATION_REGEX, location_str)
+    assert match is not None
+    return int(match.group(1)),int(match.group(2))
+
+
+# Text maps are converted once to a binary .npy sidecar (terrain01.txt -> terrain01.txt.npy)
+# holding the values in the smallest integer type that fits them, usually uint8 or uint16.
+# Later reads memory-map the sidecar instead of parsing the text again. The sidecar is given
+# the same modification time as the text file, and is rebuilt whenever the two no longer match.
+CACHE_SUFFIX = ".npy"
+
+
+def read_map(file_name: str, cache: bool = True, dtype: Optional[str] = "int64") -> Map:
+    """Reads a map from a text file (or a .npy file).
+       The map is an int64 array of its own by default, as np.loadtxt(file_name, dtype=int) would give.
+       With dtype=None it is the sidecar itself, memory-mapped copy-on-write in the smallest integer type that
+       fits the values (usually uint8 or uint16): it is never read into memory as a whole and can be changed
+       freely without altering the file, but arithmetic on its values can overflow (200 + 200 is 144 as uint8)
+       and values too large for the type can't be stored. Any other dtype gives an array of that type."""
+    import numpy as np
+
+    if file_name.endswith(CACHE_SUFFIX):
+        return _asType(np.load(file_name, mmap_mode="c"), dtype)
+
+    if not cache:
+        return _asType(_parse_map(file_name), dtype)
+
+    cache_name = file_name + CACHE_SUFFIX
+    if not _is_cache_valid(file_name, cache_name):
+        try:
+            _write_cache(file_name, cache_name)
+        except OSError:
+            # The sidecar could not be written (for example a read-only folder), so parse the text every time.
+            return _asType(_parse_map(file_name), dtype)
+
+    return _asType(np.load(cache_name, mmap_mode="c"), dtype)
+
+
+
+# The values of a map in the type asked for by read_map, or as they are when dtype is None.
+def _asType(values: Map, dtype: Optional[str]) -> Map:
+    import numpy as np
+    return values if dtype is None else np.array(values, dtype=dtype)
+
+
+
+def _is_cache_valid(file_name: str, cache_name: str) -> bool:
+    try:
+        return os.stat(cache_name).st_mtime_ns == os.stat(file_name).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+# Yields the values of each row of a text map as an array. Anything after a # is a comment.
+def _read_rows(file_name: str):
+    import numpy as np
+    with open(file_name) as file, warnings.catch_warnings():
+        # NumPy only warns about text it cannot parse, which would silently cut the row short
+        warnings.simplefilter("error", DeprecationWarning)
+
+        for line in file:
+            line = line.split("#", 1)[0]
+            if line.strip():
+                yield np.fromstring(line, dtype=np.int64, sep=" ")
+
+
+def _parse_map(file_name: str) -> Map:
+    import numpy as np
+    return np.array(list(_read_rows(file_name)), dtype=int)
+
+
+# Converts a text map to its sidecar in two passes over the text, the first finds the size and the
+# range of the values, the second writes the rows straight into the memory-mapped sidecar.
+# Only one row is held in memory at a time however large the map is.
+def _write_cache(file_name: str, cache_name: str) -> None:
+    import numpy as np
+
+    row_count = 0
+    col_count = None
+    low, high = 0, 0
+
+    for row in _read_rows(file_name):
+        if col_count is None:
+            col_count = len(row)
+            low, high = row.min(), row.max()
+        elif len(row) != col_count:
+            raise ValueError(f"Row {row_count} of {file_name} has {len(row)} values, expected {col_count}")
+        else:
+            low, high = min(low, row.min()), max(high, row.max())
+        row_count += 1
+
+    dtype = np.result_type(np.min_scalar_type(low), np.min_scalar_type(high))
+
+    # Written under a temporary name and moved into place, so a reader never sees a half-written sidecar
+    temporary_name = f"{cache_name}.{os.getpid()}.tmp"
+    values = np.lib.format.open_memmap(temporary_name, mode="w+", dtype=dtype, shape=(row_count, col_count or 0))
+    for index, row in enumerate(_read_rows(file_name)):
+        values[index] = row
+    values.flush()
+    del values
+
+    source = os.stat(file_name)
+    os.utime(temporary_name, ns=(source.st_atime_ns, source.st_mtime_ns))
+    os.replace(temporary_name, cache_name)
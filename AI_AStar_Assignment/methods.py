@@ -1,6 +1,19 @@
+import math
+import os
+from typing import TYPE_CHECKING
 from maps import Map, Location
-from node import Node
-from q2node import q2Node
+from nodepool import NodePool
+
+# Only needed for annotations, the grid module imports NumPy (see tiny.py, which uses these without it).
+if TYPE_CHECKING:
+    from grid import Grid
+
+
+# Path costs and success probabilities are carried forward from the parent node in O(1).
+# Setting the ASTAR_CHECK_COSTS environment variable to 1 (or this flag to True) makes every
+# generated node also recompute them from the whole path and check that they agree. 
+# This is slow and is only meant for debugging.
+CHECK_INCREMENTAL_COSTS = os.environ.get("ASTAR_CHECK_COSTS", "0") == "1"
 
 
 # Heuristic function - Manhattan Distance
@@ -21,16 +34,17 @@ def calculateManhattanDistance(source: Location, goal: Location) -> int:
     return abs(source[0] - goal[0]) + abs(source[1] - goal[1])
 
 
-# Returns the value of a location
+# Returns the value of a location. Compact maps (read_map with dtype=None, and tiled maps) hold their values
+# in the smallest type that fits them (often uint8), so values are made Python ints before any arithmetic can overflow.
 def getLocationCost(source: Location, map: Map) -> int:
-   return map[source[0], source[1]]
+   return int(map[source[0], source[1]])
 
 
 # Returns the cost to move from a source location to a target location
 # which is both their values combined 
 def getMoveCost(source: Location, target: Location, map: Map) -> int:
-    beginCost = map[source[0], source[1]]
-    endCost = map[target[0], target[1]]
+    beginCost = int(map[source[0], source[1]])
+    endCost = int(map[target[0], target[1]])
 
     return beginCost + endCost
 
@@ -42,171 +56,138 @@ def getFtotalCost(g, h):
     return h + g
 
 
-# Accepts a node and backtracks through all the parents of the node,
-# summing the move costs to produce the total path cost for the location.
-def getGpathCost(node, g):
-
-    while(node.moveCost != 0):    
-         g += node.moveCost
-         node = node.parent
-
-    return g
-
-
-
-# Accepts a node and a list and will backtrack through the all the parent nodes 
-# appending them to the list. Returns the list with the parent nodes which constitutes the 
-# total path to the node.
-def getParents(node, parents):
+# How nodes with the same f are ordered in the frontier, by a tie key placed in the priority straight after f.
+#   default   no preference: Task 1 takes them in the order they were placed, Task 2 the safest first and
+#             then the lowest location, as the searches always have
+#   high-g    the node furthest along its path first
+#   low-h     the node estimated closest to the goal first (the same as high-g unless the heuristic is weighted)
+#   location  the lowest location first
+# Among the many nodes of equal f on a plateau of equal values, preferring deeper nodes heads straight for
+# the goal instead of expanding the plateau breadth first. Every policy gives the same order on every run.
+TIE_BREAKS = ("default", "high-g", "low-h", "location")
 
-    while(node.parent != None): 
-        parents.append(node)
-        node = node.parent
 
-    parents.append(node)
-
-    return parents
+# Returns the function giving the tie key of a node from its (g, h, location) under a tie-breaking policy,
+# or None for the default policy, whose priorities have no tie key (and cost nothing more to compare).
+def getTieKey(policy: str):
 
+    if policy == "default":
+        return None
+    if policy == "high-g":
+        return lambda g, h, location: -g
+    if policy == "low-h":
+        return lambda g, h, location: h
+    if policy == "location":
+        return lambda g, h, location: location
+    raise ValueError(f"Unknown tie-breaking policy {policy!r}, expected one of {', '.join(TIE_BREAKS)}")
 
 
-# For question 1, finds all the neighbours of a node in four directions if they are valid.
-# Invalid neighbours will exceed the terrain threshold or exceed the boundaries of the map.
-# Once valid locations have been determined, a node is created to store the location
-# and the other required parameters for question 1.
-# Returns a list of children nodes belonging to the source node.
-def getNeighbours(sourceNode: Node, goal: Location, map: Map, threshold): 
-    
-    children: Node = []
+# Accepts a path of locations and sums the move costs between them to produce the total path cost.
+# The searches carry g forward from the parent instead, this is used for checking the incremental costs.
+def getGpathCost(path, map: Map):
 
-    # Find the boundaries of the map
-    rowSize = map.shape[0]
-    colSize = map.shape[1]
+    g = 0
 
+    for source, target in zip(path, path[1:]):
+        g += getMoveCost(source, target, map)
 
-    # Get Valid Neighbouring Locations
-    locations = [
-        getNewLocation(type= "north", source= sourceNode.location, maxSize= rowSize, map= map, threshold= threshold),
-        getNewLocation(type= "south", source= sourceNode.location, maxSize= rowSize, map= map, threshold= threshold),
-        getNewLocation(type= "east", source= sourceNode.location, maxSize= colSize, map= map, threshold= threshold),
-        getNewLocation(type= "west", source= sourceNode.location, maxSize= colSize, map= map, threshold= threshold) ]
+    return g
 
-    # Add the data to the node
-    for newLocation in locations:
-        g = 0
 
-        if newLocation != None:
-            node = Node(location=None, moveCost=0, h=0, g=0, f=0, parent=None)
-            node.location = newLocation
-            node.h = calculateManhattanDistance(newLocation, goal)
-            node.moveCost = getMoveCost(sourceNode.location, newLocation, map)
-            node.parent = sourceNode
-            node.g = getGpathCost(node, g)
-            node.f = getFtotalCost(g= node.g, h= node.h)
 
-            children.append(node)
+# Accepts a node from the pool and a list and will backtrack through the parent indices
+# appending their locations to the list. Returns the list with the locations which constitute the 
+# total path to the node, from the node back to the start.
+def getParents(pool: NodePool, node: int, parents):
 
-    return children
+    while(node != NodePool.NO_PARENT): 
+        parents.append(pool.location(node))
+        node = pool.parent[node]
 
+    return parents
 
 
 
-# Accepts a source location and a direction and performs the validation required 
-# to determine if there is a valid map location in that direction. 
-# If the boundaries of the map are exceeded, or the terrain threshold is exceeded, the direction is not valid
-# Used by getNeighbours to find valid children.
-def getNewLocation(type, source: Location, maxSize, map: Map, threshold) -> Location:
+# Fills in the locations skipped by jumps (see regions.py), where consecutive locations of a path
+# are further apart than one move. Jumps are always in a straight line.
+def fillJumps(path):
 
-    newLocation = None
+    filled = path[:1]
 
-    row = source[0]
-    col = source[1]
+    for source, target in zip(path, path[1:]):
+        steps = calculateManhattanDistance(source, target)
+        rowStep, colStep = (target[0] - source[0]) // steps, (target[1] - source[1]) // steps
+        filled.extend((source[0] + rowStep * step, source[1] + colStep * step) for step in range(1, steps + 1))
 
+    return filled
 
-    if type == "north":
-    # Check if the target is valid within the map boundaries
-        if (row - 1) >= 0:
-            newLocation = row - 1, col           
 
-    if type == "south":
-    # Check if the target is valid within the map boundaries
-        if (row + 1) < maxSize:
-            newLocation = row + 1, col
 
-    if type == "east":
-    # Check if the target is valid within the map boundaries
-        if (col + 1) < maxSize:
-            newLocation = row, col + 1
+# For question 1, finds all the neighbours of a node in four directions if they are valid.
+# Invalid neighbours will exceed the terrain threshold or exceed the boundaries of the map,
+# these have already been filtered out of the precomputed grid so this is a table lookup.
+# Once valid locations have been determined, the path cost and heuristic for question 1 are worked out,
+# estimate is the heuristic prepared for the goal (see heuristics.py).
+# Children are not added to the pool here, only those placed in the frontier need to be stored.
+# Returns a list of (location, g, h) tuples for the children of the source node.
+def getNeighbours(pool: NodePool, sourceNode: int, estimate, grid: "Grid"): 
     
-    if type == "west":
-    # Check if the target is valid within the map boundaries
-        if (col - 1) >= 0:
-            newLocation = row, col - 1
-
-    # Check if the terrain difficulty is within the threshold
-    if newLocation:
-        if getLocationCost(newLocation, map) > threshold or getLocationCost(source, map) > threshold:
-            newLocation = None
+    children = []
 
-    return newLocation
+    sourceG = pool.g[sourceNode]
 
+    for cell, moveCost in grid.moves(grid.cell(pool.location(sourceNode))):
+        newLocation = grid.location(cell)
+        g = sourceG + moveCost
 
+        if CHECK_INCREMENTAL_COSTS:
+            checkIncrementalCosts(pool, sourceNode, newLocation, g, grid)
 
+        children.append((newLocation, g, estimate(newLocation)))
 
-# For question 2, will determine the probability of success for a path
-# based on an enemy presence map, according to the given formula.
-def getSuccessProbability(path, map):
-    
-    result = 1
-
-    for node in path:
-        enemyPresence = getLocationCost(node.location, map)
+    return children
 
-        prob = 1 - (enemyPresence / 100)
-        result *= prob
 
-    return result
 
+# Debug check used when CHECK_INCREMENTAL_COSTS is set. Recomputes the path cost, and for question 2 
+# the success probability, of a child of parent from its whole path and compares them to the incremental values.
+def checkIncrementalCosts(pool: NodePool, parent: int, location: Location, g, grid: "Grid", 
+                          prob: float = None, safety = None) -> None:
 
+    path = getParents(pool, parent, [location])
+    path.reverse()
+    path = fillJumps(path)
 
-# For question 2, finds all the neighbours of a node in four directions if they are valid.
-# Invalid neighbours will exceed the terrain threshold or exceed the boundaries of the map.
-# Once valid locations have been determined, a node is created to store the location,
-# the other required parameters, and the additional parameters required for question 2.
-# Returns a list of children nodes belonging to the source node.
-def getQ2Neighbours(sourceNode: q2Node, goal: Location, map: Map, threshold, success_map: Map): 
-    
-    children: q2Node = []
+    pathCost = getGpathCost(path, grid.values)
+    assert g == pathCost, f"Incremental g={g} at {location} does not match recomputed g={pathCost}"
 
-    # Find the boundaries of the map
-    rowSize = map.shape[0]
-    colSize = map.shape[1]
+    if safety is not None:
+        pathProb = math.prod(safety[grid.cell(item)] for item in path)
+        assert math.isclose(prob, pathProb, rel_tol=1e-9, abs_tol=1e-12), \
+            f"Incremental probability {prob} at {location} does not match recomputed probability {pathProb}"
 
 
-    # Get Valid Neighbouring Locations
-    locations = [
-        getNewLocation(type= "north", source= sourceNode.location, maxSize= rowSize, map= map, threshold= threshold),
-        getNewLocation(type= "south", source= sourceNode.location, maxSize= rowSize, map= map, threshold= threshold),
-        getNewLocation(type= "east", source= sourceNode.location, maxSize= colSize, map= map, threshold= threshold),
-        getNewLocation(type= "west", source= sourceNode.location, maxSize= colSize, map= map, threshold= threshold) ]
 
+# For question 2, finds all the neighbours of a node in four directions if they are valid, as for question 1.
+# Once valid locations have been determined, the path cost, heuristic and 
+# the success probability required for question 2 are worked out.
+# The success probability of a location is looked up in the safety table of the enemy presence map.
+# Returns a list of (location, g, h, prob) tuples for the children of the source node.
+def getQ2Neighbours(pool: NodePool, sourceNode: int, estimate, grid: "Grid", safety): 
+    
+    children = []
 
-    # Add the data to the node
-    for newLocation in locations:
+    sourceG = pool.g[sourceNode]
+    sourceProb = pool.prob[sourceNode]
 
-        path = []
-        if newLocation != None:
+    for cell, moveCost in grid.moves(grid.cell(pool.location(sourceNode))):
+        newLocation = grid.location(cell)
+        g = sourceG + moveCost
+        prob = sourceProb * safety[cell]
 
-            node = q2Node(location=None, moveCost=0, h=0, g=0, f=0, parent=None, prob=0, tag="Keep")
-            node.location = newLocation
-            node.h = calculateManhattanDistance(newLocation, goal)
-            node.moveCost = getMoveCost(sourceNode.location, newLocation, map)
-            node.parent = sourceNode
-            node.g = getGpathCost(node, node.g)
-            node.f = getFtotalCost(g= node.g, h= node.h)
-               
-            path = getParents(node, path)
-            node.prob = getSuccessProbability(path, success_map)
+        if CHECK_INCREMENTAL_COSTS:
+            checkIncrementalCosts(pool, sourceNode, newLocation, g, grid, prob, safety)
 
-            children.append(node)            
+        children.append((newLocation, g, estimate(newLocation), prob))
 
-    return children
\ No newline at end of file
+    return children
@@ -0,0 +1,51 @@
+from array import array
+from maps import Location
+
+
+# Stores every node created by a search in parallel, compactly typed arrays instead of one object per node.
+# A node is simply its integer index into the pool, and a node's parent is held as the parent's index
+# (NO_PARENT for the start node), so following a path back to the start never touches a Python object.
+# Only nodes that are actually placed in the frontier are added, ignored children are never stored.
+class NodePool:
+
+    NO_PARENT = -1
+
+    __slots__ = ("row", "col", "g", "h", "prob", "parent")
+
+    def __init__(self):
+        self.row = array("i")
+        self.col = array("i")
+        self.g = array("q")
+        self.h = array("q")
+        self.prob = array("d")
+        self.parent = array("q")
+
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+
+    # Adds a node and returns its index.
+    def add(self, location: Location, g: int, h: int, prob: float = 1.0, parent: int = NO_PARENT) -> int:
+        self.row.append(location[0])
+        self.col.append(location[1])
+        self.g.append(g)
+        self.h.append(h)
+        self.prob.append(prob)
+        self.parent.append(parent)
+
+        return len(self.parent) - 1
+
+
+    def location(self, node: int) -> Location:
+        return self.row[node], self.col[node]
+
+
+    # The complete path cost (g + h) of a node.
+    def f(self, node: int) -> int:
+        return self.g[node] + self.h[node]
+
+
+    # Approximate memory held by the pool, in bytes.
+    def nbytes(self) -> int:
+        return sum(values.itemsize * len(values) for values in (self.row, self.col, self.g, self.h, self.prob, self.parent))
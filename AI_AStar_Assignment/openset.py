@@ -0,0 +1,280 @@
+from typing import Optional
+from maps import Location, Map
+
+
+# The frontier (open set) shared by Task 1 and Task 2.
+# It is a binary min-heap with an index from each entry's key to its position in the heap,
+# so membership tests are O(1) and pushes, pops, removals and decrease-key are O(log n).
+# Unlike queue.PriorityQueue it takes no thread locks, and unlike removing items from
+# PriorityQueue.queue directly it never breaks the heap invariant.
+#
+# Each entry is a list [priority, key, item]. The priority is any comparable value (normally a tuple),
+# the key identifies the entry (a location in Task 1, a label id in Task 2) and the item is the node.
+class OpenSet:
+
+    __slots__ = ("heap", "position")
+
+    def __init__(self):
+        self.heap = []
+        self.position = {}
+
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+
+    def __contains__(self, key) -> bool:
+        return key in self.position
+
+
+    # Returns the priority of the entry stored under key.
+    def priority(self, key):
+        return self.heap[self.position[key]][0]
+
+
+    # Returns the item (node) of the entry stored under key.
+    def item(self, key):
+        return self.heap[self.position[key]][2]
+
+
+    # Adds a new entry, or lowers the priority of an existing entry with the same key (decrease-key).
+    # Returns False, leaving the frontier unchanged, if the existing entry already has an equal or better priority.
+    def push(self, key, priority, item) -> bool:
+
+        index = self.position.get(key)
+
+        if index is None:
+            self.heap.append([priority, key, item])
+            self.position[key] = len(self.heap) - 1
+            self._siftUp(len(self.heap) - 1)
+            return True
+
+        entry = self.heap[index]
+        if priority >= entry[0]:
+            return False
+
+        entry[0] = priority
+        entry[2] = item
+        self._siftUp(index)
+        return True
+
+
+    # Removes and returns the entry with the lowest priority as a (key, priority, item) tuple.
+    def pop(self):
+
+        heap = self.heap
+        last = heap.pop()
+
+        if heap:
+            first = heap[0]
+            heap[0] = last
+            self.position[last[1]] = 0
+            self._siftDown(0)
+        else:
+            first = last
+
+        del self.position[first[1]]
+
+        return first[1], first[0], first[2]
+
+
+    # Removes the entry stored under key, wherever it is in the heap.
+    def remove(self, key) -> None:
+
+        index = self.position.pop(key)
+        heap = self.heap
+        last = heap.pop()
+
+        if index < len(heap):
+            heap[index] = last
+            self.position[last[1]] = index
+            self._siftUp(index)
+            self._siftDown(self.position[last[1]])
+
+
+    def _siftUp(self, index: int) -> None:
+
+        heap = self.heap
+        position = self.position
+        entry = heap[index]
+        priority = entry[0]
+
+        while index > 0:
+            parentIndex = (index - 1) >> 1
+            parent = heap[parentIndex]
+
+            if priority < parent[0]:
+                heap[index] = parent
+                position[parent[1]] = index
+                index = parentIndex
+            else:
+                break
+
+        heap[index] = entry
+        position[entry[1]] = index
+
+
+    def _siftDown(self, index: int) -> None:
+
+        heap = self.heap
+        position = self.position
+        size = len(heap)
+        entry = heap[index]
+        priority = entry[0]
+
+        while True:
+            childIndex = 2 * index + 1
+            if childIndex >= size:
+                break
+
+            # Pick the smaller of the two children
+            rightIndex = childIndex + 1
+            if rightIndex < size and heap[rightIndex][0] < heap[childIndex][0]:
+                childIndex = rightIndex
+
+            child = heap[childIndex]
+            if child[0] < priority:
+                heap[index] = child
+                position[child[1]] = index
+                index = childIndex
+            else:
+                break
+
+        heap[index] = entry
+        position[entry[1]] = index
+
+
+
+# The frontier for focal search (A* epsilon, Pearl and Kim), a bounded suboptimal search.
+# Every entry is kept in open, ordered by its priority as in OpenSet, whose first item is f.
+# The entries with f within bound times the lowest f in open form the focal list, and pop takes the entry from it
+# that looks closest to the goal (the lowest secondary value, such as h) rather than the lowest f.
+# An entry is only taken while its f is at most bound times the lowest f, which is a lower bound on the cost of
+# the cheapest path, so the first path found to the goal costs at most bound times the cheapest.
+# Entries whose f is above the focal bound wait in a third heap, ordered by f, until the lowest f rises enough.
+#
+# It has the same methods as OpenSet, so the searches use it in its place. open may be given
+# to count and time the frontier operations (see stats.TimedOpenSet).
+class FocalSet:
+
+    __slots__ = ("bound", "secondary", "open", "focal", "waiting")
+
+    def __init__(self, bound: float, secondary, open: Optional[OpenSet] = None):
+        self.bound = bound
+        self.secondary = secondary
+        self.open = OpenSet() if open is None else open
+        self.focal = OpenSet()
+        self.waiting = OpenSet()
+
+
+    def __len__(self) -> int:
+        return len(self.open)
+
+
+    def __contains__(self, key) -> bool:
+        return key in self.open
+
+
+    # The entries of open, as in OpenSet.
+    @property
+    def heap(self) -> list:
+        return self.open.heap
+
+
+    @property
+    def position(self) -> dict:
+        return self.open.position
+
+
+    def priority(self, key):
+        return self.open.priority(key)
+
+
+    def item(self, key):
+        return self.open.item(key)
+
+
+    def push(self, key, priority, item) -> bool:
+
+        if not self.open.push(key, priority, item):
+            return False
+
+        # The entry changed, so it is placed again in whichever of focal and waiting its f now belongs to
+        self._discard(key)
+        if priority[0] <= self.bound * self.open.heap[0][0][0]:
+            self.focal.push(key, (self.secondary(item), priority), item)
+        else:
+            self.waiting.push(key, priority, item)
+
+        return True
+
+
+    # Removes and returns the entry in the focal list closest to the goal as a (key, priority, item) tuple.
+    def pop(self):
+
+        lowest = self.open.heap[0][0][0]
+        while True:
+            # Entries whose f is now within the bound join the focal list
+            waiting = self.waiting
+            while len(waiting) > 0 and waiting.heap[0][0][0] <= self.bound * lowest:
+                key, priority, item = waiting.pop()
+                self.focal.push(key, (self.secondary(item), priority), item)
+
+            key, (_, priority), item = self.focal.pop()
+            if priority[0] <= self.bound * lowest:
+                break
+
+            # The entry joined focal while the lowest f was lower and is no longer within the bound
+            self.waiting.push(key, priority, item)
+
+        self.open.remove(key)
+        return key, priority, item
+
+
+    def remove(self, key) -> None:
+        self.open.remove(key)
+        self._discard(key)
+
+
+    # Takes the entry stored under key out of focal or waiting, wherever it is.
+    def _discard(self, key) -> None:
+        if key in self.focal:
+            self.focal.remove(key)
+        elif key in self.waiting:
+            self.waiting.remove(key)
+
+
+
+# A table of values per map cell, used to record the best known path cost (g) per location.
+# Only the locations given a value are stored, so a short query on a large map doesn't pay for a table
+# the size of the whole map (and a tiled map, see tiles.py, which may not fit in memory, never needs one).
+class CostTable:
+
+    __slots__ = ("values", "colSize")
+
+    def __init__(self, map: Map, initial=float("inf")):
+        self.colSize = map.shape[1]
+        self.values = SparseValues(initial)
+
+
+    def __getitem__(self, location: Location):
+        return self.values[location[0] * self.colSize + location[1]]
+
+
+    def __setitem__(self, location: Location, value) -> None:
+        self.values[location[0] * self.colSize + location[1]] = value
+
+
+
+# A dictionary that gives a default for missing keys without storing it, so reading a location costs no memory.
+class SparseValues(dict):
+
+    __slots__ = ("initial",)
+
+    def __init__(self, initial):
+        super().__init__()
+        self.initial = initial
+
+
+    def __missing__(self, key):
+        return self.initial
@@ -0,0 +1,194 @@
+import os
+import time
+import click
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator, Optional
+from events import get_sink, log, set_sink, using_sink, ListSink, NullSink
+from maps import Map
+from parsing import validate_map, validate_optional_map
+
+from batch import Query, validate_queries, write_result
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+
+
+# How many queries each task sent to a worker holds, unless given.
+# Larger chunks mean less inter-process traffic, smaller ones balance the load better.
+CHUNK_SIZE = 16
+
+
+# A map copied once into shared memory. Workers attach to the block by name and use it in place,
+# so the map is never pickled and sent along with each task.
+class SharedMap:
+
+    def __init__(self, map: Map):
+        values = np.ascontiguousarray(map)
+        self.memory = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        self.spec = (self.memory.name, values.shape, values.dtype.str)
+
+        np.ndarray(values.shape, dtype=values.dtype, buffer=self.memory.buf)[...] = values
+
+
+    def close(self) -> None:
+        self.memory.close()
+        self.memory.unlink()
+
+
+
+# Attaches to a map shared by another process, returns the shared memory block and an array using it.
+def attachMap(spec) -> tuple[shared_memory.SharedMemory, Map]:
+    name, shape, dtype = spec
+
+    # Worker processes share the parent's resource tracker, so attaching does not
+    # hand ownership of the block to the worker, the parent still unlinks it.
+    memory = shared_memory.SharedMemory(name=name)
+
+    # The worker never changes the map, so read-only it is hashed once rather than by every query (see grid.getMapKey).
+    map = np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf)
+    map.flags.writeable = False
+
+    return memory, map
+
+
+
+# Worker process state, set up once per process by _initWorker.
+_worker = {}
+
+
+def _initWorker(terrainSpec, terrainThreshold, successSpec, successThreshold, events) -> None:
+
+    # The searches would log every state they visit, interleaved on stdout from every worker.
+    # When the events are wanted each query's are kept instead and sent back to the parent with its result.
+    set_sink(NullSink())
+    _worker["events"] = events
+
+    _worker["memory"], _worker["terrain_map"] = attachMap(terrainSpec)
+    _worker["terrain_threshold"] = terrainThreshold
+    _worker["success_map"] = None
+    _worker["success_threshold"] = successThreshold
+
+    if successSpec is not None:
+        _worker["successMemory"], _worker["success_map"] = attachMap(successSpec)
+
+
+# Answers a chunk of (index, start, goal) queries in a worker, returning (index, result, events) triples,
+# events being the query's (kind, location, cost, p_success) search events, or None when they aren't wanted.
+def _solveChunk(chunk) -> list:
+
+    terrainMap = _worker["terrain_map"]
+    terrainThreshold = _worker["terrain_threshold"]
+    successMap = _worker["success_map"]
+    successThreshold = _worker["success_threshold"]
+
+    results = []
+    for index, start, goal in chunk:
+        with using_sink(ListSink() if _worker["events"] else NullSink()) as sink:
+            if successMap is None:
+                result = find_shortest_path(start, goal, terrainMap, terrainThreshold)
+            else:
+                result = find_shortest_safe_path(start, goal, terrainMap, terrainThreshold, successMap, successThreshold)
+
+        results.append((index, result, sink.events if _worker["events"] else None))
+
+    return results
+
+
+# Yields the (index, result) pairs of a finished chunk, first sending each query's events to this process's sink.
+def _collectChunk(results) -> Iterator[tuple[int, tuple]]:
+    for index, result, events in results:
+        if events:
+            sink = get_sink()
+            for event in events:
+                sink.record(*event)
+        yield index, result
+
+
+
+def iter_paths_parallel(queries: Iterable[Query], terrain_map: Map, terrain_threshold: int,
+                        success_map: Optional[Map] = None, success_threshold: float = 0.0,
+                        workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE,
+                        ordered: bool = True, events: bool = False) -> Iterator[tuple[int, tuple]]:
+    """Answers independent (start, goal) queries on one map across a pool of worker processes.
+       Task 1 results are found unless a success_map is given, then Task 2 results are found.
+       Yields (query index, result) pairs, in query order when ordered is True
+       and otherwise as soon as each chunk of queries completes.
+       When events is True the search events of each query are sent to the current sink (see events.py)
+       just before its result is yielded, otherwise the workers discard them."""
+
+    queries = list(queries)
+    chunks = [[(index, start, goal) for index, (start, goal) in enumerate(queries[first:first + chunk_size], first)]
+              for first in range(0, len(queries), chunk_size)]
+
+    sharedTerrain = SharedMap(terrain_map)
+    sharedSuccess = None if success_map is None else SharedMap(success_map)
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_initWorker,
+                               initargs=(sharedTerrain.spec, terrain_threshold,
+                                         sharedSuccess and sharedSuccess.spec, success_threshold, events))
+    try:
+        futures = [pool.submit(_solveChunk, chunk) for chunk in chunks]
+
+        if ordered:
+            for future in futures:
+                yield from _collectChunk(future.result())
+        else:
+            for future in as_completed(futures):
+                yield from _collectChunk(future.result())
+    finally:
+        # When the caller stops early the chunks not yet started are dropped, only those running are waited for,
+        # and they must finish before the shared maps they read are closed.
+        pool.shutdown(wait=True, cancel_futures=True)
+        sharedTerrain.close()
+        if sharedSuccess is not None:
+            sharedSuccess.close()
+
+
+
+def find_shortest_paths_parallel(queries: Iterable[Query], terrain_map: Map, terrain_threshold: int,
+                                 success_map: Optional[Map] = None, success_threshold: float = 0.0,
+                                 workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> list[tuple]:
+    """Answers independent (start, goal) queries on one map across a pool of worker processes.
+       Returns the result of each query, in order, as find_shortest_path
+       (or find_shortest_safe_path when a success_map is given) would."""
+
+    return [result for _, result in iter_paths_parallel(queries, terrain_map, terrain_threshold, success_map,
+                                                        success_threshold, workers, chunk_size)]
+
+
+
+@click.command(no_args_is_help=True)
+@click.argument("queries", required=True, type=click.Path(exists=True), callback=validate_queries)
+@click.argument("terrain_map", required=True, type=click.Path(exists=True), callback=validate_map)
+@click.argument("terrain_threshold", required=True, type=click.IntRange(min=0,max=1000))
+@click.option("--success-map", type=click.Path(exists=True), callback=validate_optional_map,
+              help="Enemy presence map, answers the queries for Task 2 instead of Task 1.")
+@click.option("--success-threshold", type=click.FloatRange(min=0.0,max=1.0), default=0.0, show_default=True)
+@click.option("--workers", type=click.IntRange(min=1), default=None, help="Worker processes (default one per core).")
+@click.option("--chunk-size", type=click.IntRange(min=1), default=CHUNK_SIZE, show_default=True)
+@click.option("--unordered", is_flag=True, help="Write results as they complete instead of in query order.")
+@click.option("--output", type=click.File("w"), default="-", help="Where to write the JSONL results (default stdout).")
+@click.option("--events", is_flag=True, help="Also log the states visited, enqueued and ignored by every search, "
+                                            "each query's together.")
+def main(queries: list[Query], terrain_map: Map, terrain_threshold: int,
+         success_map: Optional[Map], success_threshold: float,
+         workers: Optional[int], chunk_size: int, unordered: bool, output, events: bool) -> None:
+    """Answers every query in a JSONL or CSV file in parallel and reports the throughput.
+
+    \b
+    python parallel.py queries.jsonl resources/terrain04.txt 500 --workers 4 --output results.jsonl
+    """
+    began = time.perf_counter()
+
+    found = 0
+    for index, result in iter_paths_parallel(queries, terrain_map, terrain_threshold, success_map, success_threshold,
+                                             workers, chunk_size, ordered= not unordered, events= events):
+        found += write_result(output, queries[index], result)
+
+    elapsed = time.perf_counter() - began
+    log(f"Found {found} of {len(queries)} paths in {elapsed:.2f}s with {workers or os.cpu_count()} workers "
+        f"({len(queries) / elapsed:.1f} queries/s).")
+
+if __name__ == '__main__':
+    main()
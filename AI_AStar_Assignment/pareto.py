@@ -0,0 +1,114 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING
+from maps import Location
+from openset import OpenSet
+
+# Only needed for annotations, the grid module imports NumPy (see tiny.py, which uses these without it).
+if TYPE_CHECKING:
+    from grid import Grid
+
+
+# Allows for rounding when a path's success probability is compared with the optimistic bound,
+# which multiplies the same probabilities in a different order.
+BOUND_TOLERANCE = 1e-9
+
+
+# For question 2, the labels (paths) that reach one location and are not dominated by each other.
+# A label dominates another when it is at least as cheap and at least as safe.
+# Kept sorted by path cost, so that the success probability strictly increases along the set:
+# a dearer label is only worth keeping if it is also safer. This makes checking a new label
+# a binary search, O(log k), rather than a comparison with every label at the location.
+# Comparing success probabilities orders labels exactly as comparing log-survival would.
+class ParetoSet:
+
+    __slots__ = ("costs", "probs", "nodes")
+
+    def __init__(self):
+        self.costs = []
+        self.probs = []
+        self.nodes = []
+
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
+    # Whether a label in the set is at least as cheap and at least as safe as (cost, prob).
+    def dominates(self, cost, prob: float) -> bool:
+
+        # The label with the highest cost not above cost is the safest of those at least as cheap
+        index = bisect_right(self.costs, cost) - 1
+        return index >= 0 and self.probs[index] >= prob
+
+
+    # Adds a label that is not dominated, removing the labels it dominates.
+    # Returns the nodes of the removed labels.
+    def insert(self, cost, prob: float, node: int) -> list[int]:
+
+        # Labels with a cost of at least cost and a probability no higher than prob are now dominated,
+        # they are the run of labels starting where the new label goes.
+        start = bisect_left(self.costs, cost)
+        end = start
+        while end < len(self.probs) and self.probs[end] <= prob:
+            end += 1
+
+        removed = self.nodes[start:end]
+        self.costs[start:end] = [cost]
+        self.probs[start:end] = [prob]
+        self.nodes[start:end] = [node]
+
+        return removed
+
+
+
+# For question 2, an optimistic bound on how likely the rest of a path is to succeed.
+# For every location, the highest success probability of any path from there to the goal,
+# counting the locations after it (up to and including the goal), or 0.0 if the goal can't be reached.
+# Found by a search backwards from the goal that maximises the product of the safety of each location.
+# A path whose success probability so far, times this bound, is below the threshold can never meet it.
+# A tiled grid (see tiles.py) is too large to search in full, so every location is given the loosest bound (1.0),
+# which never prunes a label and so leaves the path found the same, only found with more labels explored.
+def getSurvivalBound(grid: "Grid", safety, goal: Location) -> array:
+
+    if getattr(grid, "tiled", False):
+        return LoosestBound()
+
+    size = grid.rowSize * grid.colSize
+    neighbour = grid.neighbour
+
+    bound = array("d", [0.0]) * size
+    explored = bytearray(size)
+
+    frontier = OpenSet()
+    goalCell = grid.cell(goal)
+    bound[goalCell] = 1.0
+    frontier.push(goalCell, -1.0, None)
+
+    while len(frontier) > 0:
+        cell, _, _ = frontier.pop()
+        explored[cell] = 1
+
+        # Reaching any neighbour first and then moving into this cell adds this cell's safety
+        survival = bound[cell] * safety[cell]
+
+        for index in range(cell * 4, cell * 4 + 4):
+            source = neighbour[index]
+            if source >= 0 and not explored[source] and survival > bound[source]:
+                bound[source] = survival
+                frontier.push(source, -survival, None)
+
+    return bound
+
+
+# The survival bound of a tiled grid, 1.0 for every cell.
+class LoosestBound:
+
+    def __getitem__(self, cell: int) -> float:
+        return 1.0
+
+
+# Whether a path with success probability prob so far can still meet the success threshold,
+# given the optimistic bound on the success probability of the rest of the path.
+def canSucceed(prob: float, bound: float, success_threshold: float) -> bool:
+    return prob >= success_threshold and prob * bound * (1 + BOUND_TOLERANCE) >= success_threshold
@@ -1,12 +1,6 @@
-import re
 import click
-from maps import Location, Map, read_map
-
-LOCATION_REGEX=r'(\d+),(\d+)'
-def parse_location(location_str:str) -> Location:
-    match = re.match(LOCATION_REGEX, location_str)
-    assert match is not None
-    return int(match.group(1)),int(match.group(2))
+from typing import Optional
+from maps import Location, Map, parse_location, read_map
 
 
 def validate_location(_ctx, _param, location_arg) -> tuple:
@@ -18,3 +12,6 @@ def validate_location(_ctx, _param, location_arg) -> tuple:
 def validate_map(_ctx, _param, file_path) -> Map:
     return read_map(file_path)
 
+
+def validate_optional_map(_ctx, _param, file_path) -> Optional[Map]:
+    return None if file_path is None else read_map(file_path)
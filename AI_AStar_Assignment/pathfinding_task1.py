@@ -1,115 +1,220 @@
 import click
 from typing import Optional
-from events import log, log_enqueue_state, log_ignore_state, log_visit_state
+from events import log, log_enqueue_state, log_ignore_state, log_visit_state, logging_enabled, set_sink, NullSink
 from maps import Location, Map
 from parsing import validate_location, validate_map
 
 from methods import *
-from queue import PriorityQueue
-from node import Node
+from heuristics import HEURISTICS, Heuristic, manhattanHeuristic
+from grid import getGrid
+from openset import CostTable
+from nodepool import NodePool
+from bidirectional import searchBidirectional
+from regions import getJumpGrid
+from bounded import getAchievedBound, getWeight, makeBoundedFrontier
+from stats import SearchStats, make_frontier, profiling
+from kernels import BACKENDS, kernelsEnabled, runPathKernel
+from distancefield import findDistanceField
 
 
+# The ways find_shortest_path can search, see bidirectional.py for the second.
+MODES = ("unidirectional", "bidirectional")
+
 
 def find_shortest_path(start: Location, goal: Location, 
-                       terrain_map: Map, terrain_threshold: int) \
-                   -> tuple[Optional[int],Optional[list[Location]]]:
+                       terrain_map: Map, terrain_threshold: int,
+                       heuristic: Heuristic = manhattanHeuristic,
+                       stats: Optional[SearchStats] = None,
+                       mode: str = "unidirectional",
+                       pruning: bool = False,
+                       weight: Optional[float] = None,
+                       epsilon: Optional[float] = None,
+                       backend: str = "python",
+                       tie_break: str = "default") \
+                   -> tuple:
     """Finds the path with lowest total cost (Task 1)
        Returns (cost,list(locations)) when a path is found.
-       Returns (None,None) if no path is found."""
+       Returns (None,None) if no path is found.
+       The heuristic is one of those in heuristics.py, the manhattan distance by default.
+       When stats is given it is filled in with counters and timings of the search (see stats.py).
+       The mode is "unidirectional" (the default) or "bidirectional", which searches from both ends at once.
+       Both find a path of the same, lowest cost, but may pick different paths among equally cheap ones.
+       With pruning the search jumps across areas of equal terrain values instead of expanding every location
+       in them (see regions.py), finding a path of the same cost. Only the unidirectional mode supports it.
+       Given a weight (weighted A*) or an epsilon (focal search) the path found may cost more than the lowest,
+       but at most weight or 1 + epsilon times as much, and is usually found much faster (see bounded.py).
+       The result then also holds the bound achieved: (cost,list(locations),bound), or (None,None,None).
+       The backend "numba" runs the search compiled when Numba is installed and the search allows it (see kernels.py),
+       finding the same path, and otherwise falls back to the "python" backend (the default).
+       The tie_break policy orders nodes of equal f (see methods.TIE_BREAKS), which changes how many nodes are
+       expanded and may change which of several equally cheap paths is found, but never the cost.
+       Only the unidirectional mode supports a policy other than "default".
+       When a distance field for the map, threshold and goal has been built (see distancefield.build_distance_field)
+       and no events, stats, pruning or bound are asked for, the path is read from the field in O(path length)
+       instead of searched for. Its cost is the same, but among equally cheap paths it may be a different one."""
 
     # This is the entry point for your code for Task 1.
     # Please create additional functions and classes etc as needed 
     # to structure your implementation. 
     # Avoid implementing the entire algorithm in one long chunk.
     
-    frontier = PriorityQueue()
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {', '.join(MODES)}")
+    if pruning and mode != "unidirectional":
+        raise ValueError(f"Pruning is not supported in {mode} mode")
+    bounded = weight is not None or epsilon is not None
+    if bounded and mode != "unidirectional":
+        raise ValueError(f"Bounded search is not supported in {mode} mode")
+    if getattr(terrain_map, "tiled", False) and (pruning or mode != "unidirectional"):
+        raise ValueError("Tiled maps (see tiles.py) only support the unidirectional search without pruning")
+    tieKey = getTieKey(tie_break)
+    if tie_break != "default" and mode != "unidirectional":
+        raise ValueError(f"Tie-breaking policies are not supported in {mode} mode")
+    useKernel = kernelsEnabled(backend) and stats is None and not pruning and not bounded
+    weighted = getWeight(weight, epsilon)
+
+    # Search events are only logged when a sink is listening (see events.py).
+    logEvents = logging_enabled()
+
+    # A distance field already built for the goal (see distancefield.py) answers the query by following its
+    # next steps, in O(path length), unless the search itself is wanted: its events, stats or a bounded search.
+    if not logEvents and stats is None and mode == "unidirectional" and not pruning and not bounded:
+        field = findDistanceField(terrain_map, terrain_threshold, goal)
+        if field is not None:
+            return field.pathFrom(tuple(start))
+
+    if stats is not None:
+        stats.begin()
+
+    # Frontier operations are only counted and timed when stats are gathered.
+    frontier = make_frontier(stats)
+
+    # The neighbours and move costs of every location, precomputed once per map and threshold.
+    grid = getGrid(terrain_map, terrain_threshold)
+
+    if mode == "bidirectional":
+        result = searchBidirectional(start, goal, grid, heuristic, logEvents, stats)
+        if stats is not None:
+            stats.finish()
+        return result
+
+    # The compiled search loop (see kernels.py) takes the place of the one below when it can.
+    if useKernel and mode == "unidirectional":
+        result = runPathKernel(grid, start, goal, heuristic, logEvents, tie_break)
+        if result is not None:
+            return result
+
+    # The heuristic estimate of the cost from each location to the goal.
+    estimate = heuristic(grid, goal)
+
+    # With pruning the search moves on a copy of the grid that jumps across uniform areas.
+    if pruning:
+        grid = getJumpGrid(grid, start, goal)
+
+    # All nodes placed in the frontier are stored in the pool and referred to by index.
+    pool = NodePool()
+
+    # For focal search the frontier picks among the nodes within the bound (see bounded.py).
+    if epsilon is not None:
+        frontier = makeBoundedFrontier(epsilon, lambda node: pool.h[node], stats)
+
+    # Best known path cost (g) for every location, whether it is still in the frontier or already explored.
+    bestCost = CostTable(terrain_map)
+
+    # Weighted A* never explores a location twice, which keeps its bound (see bounded.py).
+    # The nodes for cheaper paths found to explored locations are only kept for working out the bound achieved.
+    explored = CostTable(terrain_map, False) if weighted != 1 else None
+    reached = []
+
+    # Generates the children of a node, timed when stats are gathered.
+    expand = getNeighbours if stats is None else stats.timed(getNeighbours)
+    if stats is not None:
+        stats.track(pool, frontier)
 
     # Create the initial starting node.
-    h = calculateManhattanDistance(start, goal)
-    startNode = Node(location= start, h= h, moveCost= 0, g= 0, f= getFtotalCost(g=0, h=h), parent= None)
+    startNode = pool.add(start, g= 0, h= estimate(start))
 
     # Used as a second priority in case elements share the same first priority.
     tieBreak = 0
 
-    # Frontier initialized with start node. 
+    # Frontier initialized with start node, keyed by its location. 
     # Frontier sorts by totalFCost(includes heuristic) as the priority, tieBreak as second priority
-    frontier.put((startNode.f, tieBreak, startNode))
-    log_enqueue_state(startNode.location, startNode.g)
-
+    # Any other tie-breaking policy than the default places its tie key in between.
+    # Weighted A* multiplies the heuristic by its weight, otherwise the weight is 1.
+    startF = getFtotalCost(g= 0, h= weighted * pool.h[startNode])
+    frontier.push(start, (startF, tieBreak) if tieKey is None else (startF, tieKey(0, pool.h[startNode], start), tieBreak),
+                  startNode)
+    bestCost[start] = 0
+    if logEvents:
+        log_enqueue_state(start, 0)
 
-    explored = set()
 
 
-
-    while(frontier.qsize() > 0):
+    while(len(frontier) > 0):
 
         # Retrieve a node from the frontier
-        temp = frontier.get()
-        # Strip out the priority queue sorting element
-        currentLocation = temp[2]
-        log_visit_state(currentLocation.location, currentLocation.g)
+        location, _, currentNode = frontier.pop()
+        if logEvents:
+            log_visit_state(location, pool.g[currentNode])
+        if explored is not None:
+            explored[location] = True
 
         # Goal test
-        if currentLocation.location == goal:
+        if location == goal:
             # A goal has been found
 
-            finalList = []
-            pathList = []
-
             # Work backwards from the goal node to retrieve the entire path that lead to the goal
-            pathList = getParents(currentLocation, pathList)
-            
-            # Need to extract the locations from the nodes in the path to return a location list
-            for item in pathList:
-                finalList.append(item.location)
+            pathList = getParents(pool, currentNode, [])
 
             # Reverse the list so that the expected order of visited locations is correct.
-            finalList.reverse()
+            pathList.reverse()
+            if pruning:
+                pathList = fillJumps(pathList)
 
-            return currentLocation.g, finalList
-         
-        
-        explored.add(currentLocation)
+            if stats is not None:
+                stats.finish()
+            if bounded:
+                bound = getAchievedBound(pool, frontier, pool.g[currentNode], weight, epsilon, reached)
+                return pool.g[currentNode], pathList, bound
+            return pool.g[currentNode], pathList
 
     
         # Expand the node, find the neighbouring children. 
-        child_nodes = getNeighbours(currentLocation, goal, terrain_map, terrain_threshold)
+        child_nodes = expand(pool, currentNode, estimate, grid)
 
         # Process the children
-        for child in child_nodes:
-
-            # Boolean stops unwanted nodes from being placed
-            placeable = True
-
-            # Check the child has not already been explored. If not, it can be placed in the frontier.
-            # If it has, and the incoming child has a lower f cost than the explored item, the explored item will be deleted. 
-            # Otherwise it is a worse path and should be ignored
-            if child in explored:
-                placeable = False
-                log_ignore_state(child.location, child.g)           
-
-
-            # Check the child is not already in the frontier. If not, it can be placed in the frontier.
-            for item in frontier.queue:
-
-                # If it is, and the incoming child has a lower f cost than the frontier item, the frontier item will be deleted. 
-                # Otherwise it is a worse path and should be ignored
-                if child.location == item[2].location:
-     
-                    if child.f < item[2].f:
-                        frontier.queue.remove(item)
-
-                    else:
-                        placeable = False
-                        log_ignore_state(child.location, child.g)
-
-
-            # The child is eligible to be placed in the frontier
-            if placeable:
-                tieBreak += 1
-                frontier.put((child.f, tieBreak, child))
-                log_enqueue_state(child.location, child.g)
-
+        for childLocation, g, h in child_nodes:
+
+            # A child is only worth placing if it reaches its location more cheaply than any path found so far.
+            # This covers both explored locations and locations still waiting in the frontier,
+            # otherwise it is a worse path and should be ignored.
+            if g >= bestCost[childLocation]:
+                if logEvents:
+                    log_ignore_state(childLocation, g)
+                if stats is not None:
+                    stats.ignored += 1
+                continue
+
+            if explored is not None and explored[childLocation]:
+                reached.append(pool.add(childLocation, g, h, parent= currentNode))
+                bestCost[childLocation] = g
+                continue
+
+            # The child is eligible to be placed in the frontier.
+            # If its location is already in the frontier the entry is updated in place (decrease-key).
+            child = pool.add(childLocation, g, h, parent= currentNode)
+            tieBreak += 1
+            f = getFtotalCost(g= g, h= weighted * h)
+            frontier.push(childLocation, (f, tieBreak) if tieKey is None else (f, tieKey(g, h, childLocation), tieBreak),
+                          child)
+            bestCost[childLocation] = g
+            if logEvents:
+                log_enqueue_state(childLocation, g)
+
+    if stats is not None:
+        stats.finish()
+    if bounded:
+        return None, None, None
     return None, None        
 
 
@@ -118,15 +223,41 @@ def find_shortest_path(start: Location, goal: Location,
 @click.argument('goal', required=True, callback=validate_location)
 @click.argument("terrain_map", required=True, type=click.Path(exists=True), callback=validate_map)
 @click.argument("terrain_threshold", required=True, type=click.IntRange(min=0,max=1000))
-def main(start: Location, goal: Location, terrain_map: Map, terrain_threshold: int) -> None:
+@click.option("--heuristic", type=click.Choice(list(HEURISTICS)), default="manhattan", show_default=True)
+@click.option("--mode", type=click.Choice(MODES), default="unidirectional", show_default=True)
+@click.option("--pruning", is_flag=True, help="Jump across areas of equal terrain values (unidirectional mode only).")
+@click.option("--weight", type=click.FloatRange(min=1.0), help="Weighted A*, finding a path within this factor of the lowest cost.")
+@click.option("--epsilon", type=click.FloatRange(min=0.0), help="Focal search, finding a path within 1 + epsilon of the lowest cost.")
+@click.option("--backend", type=click.Choice(BACKENDS), default="python", show_default=True,
+              help="Run the search compiled with Numba when it is installed (see kernels.py).")
+@click.option("--tie-break", type=click.Choice(TIE_BREAKS), default="default", show_default=True,
+              help="How nodes of equal f are ordered (see methods.py).")
+@click.option("--quiet", is_flag=True, help="Don't log the states visited, enqueued and ignored by the search.")
+@click.option("--profile", is_flag=True, help="Run the search under cProfile and tracemalloc and report its stats.")
+def main(start: Location, goal: Location, terrain_map: Map, terrain_threshold: int, heuristic: str, mode: str,
+         pruning: bool, weight: Optional[float], epsilon: Optional[float], backend: str, tie_break: str, quiet: bool,
+         profile: bool) -> None:
     """Example usage:
 
     \b
     python pathfinding_task1.py 3,2 0,3 resources/terrain01.txt 50
     """
-    path = find_shortest_path(start, goal, terrain_map, terrain_threshold)
+    if quiet:
+        set_sink(NullSink())
+
+    if profile:
+        with profiling(SearchStats()) as stats:
+            path = find_shortest_path(start, goal, terrain_map, terrain_threshold, HEURISTICS[heuristic], stats, mode,
+                                      pruning, weight, epsilon, tie_break= tie_break)
+    else:
+        path = find_shortest_path(start, goal, terrain_map, terrain_threshold, HEURISTICS[heuristic], mode= mode,
+                                  pruning= pruning, weight= weight, epsilon= epsilon, backend= backend,
+                                  tie_break= tie_break)
+
     if path:
         log(f"The path is {path[1]} with cost {path[0]}.")
+        if len(path) > 2 and path[2] is not None:
+            log(f"The cost is at most {path[2]:.4f} times the lowest.")
     else:
         log('No path found')
 
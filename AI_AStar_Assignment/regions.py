@@ -0,0 +1,144 @@
+import copy
+import numpy as np
+from array import array
+from grid import DIRECTIONS, Grid
+from maps import Location
+
+
+# Uniform region pruning for question 1 (rectangular symmetry reduction, Harabor, Botea and Kilby).
+# Terrain maps often have areas where every location has the same value. Inside such an area every move costs
+# the same, so the many paths between two locations that never turn back all cost the same, and A* would
+# otherwise expand every location of the area to find out which one to use.
+#
+# The map is split into rectangles of equal, passable values, at least 3 by 3 so they have an inside.
+# The inside locations are left out of the search, and each border location instead jumps straight across
+# to the location opposite it on the far border, at the cost of every move in between. Nothing else changes.
+# Any path between two border locations of a rectangle can be swapped for one that walks along the border and
+# jumps across at most once, with the same number of moves at the same cost, so the cheapest cost is kept.
+# When the start or the goal is inside a rectangle, that rectangle is searched location by location as usual.
+
+# Rectangles smaller than this in either direction have no inside and are not worth recording.
+SMALLEST_RECTANGLE = 3
+
+NORTH, SOUTH, EAST, WEST = range(len(DIRECTIONS))
+
+
+# The rectangles of one grid and the neighbour and move cost tables (laid out as in Grid) with their insides
+# left out and their borders jumping across. rectangle holds, for every cell, the index into rectangles of the
+# rectangle whose inside it is in, or -1.
+class Rectangles:
+
+    __slots__ = ("rectangles", "rectangle", "neighbour", "moveCost")
+
+    def __init__(self, grid: Grid):
+
+        self.rectangles = findRectangles(grid.values, grid.passable)
+        rectangle = np.full((grid.rowSize, grid.colSize), -1, dtype=np.int32)
+
+        cells = np.arange(grid.rowSize * grid.colSize, dtype=np.int32).reshape(grid.rowSize, grid.colSize)
+        neighbour = np.frombuffer(grid.neighbour, dtype=np.int32).reshape(grid.rowSize, grid.colSize, 4).copy()
+        moveCost = np.frombuffer(grid.moveCost, dtype=np.int64).reshape(grid.rowSize, grid.colSize, 4).copy()
+
+        for index, (top, left, bottom, right) in enumerate(self.rectangles):
+            move = 2 * int(grid.values[top, left])
+            rectangle[top + 1:bottom, left + 1:right] = index
+            neighbour[top + 1:bottom, left + 1:right] = -1
+
+            # Each side jumps across to the opposite side, past the inside
+            rows, cols = slice(top + 1, bottom), slice(left + 1, right)
+            for side, direction, opposite, distance in (((rows, left), EAST, (rows, right), right - left),
+                                                        ((rows, right), WEST, (rows, left), right - left),
+                                                        ((top, cols), SOUTH, (bottom, cols), bottom - top),
+                                                        ((bottom, cols), NORTH, (top, cols), bottom - top)):
+                neighbour[side + (direction,)] = cells[opposite]
+                moveCost[side + (direction,)] = move * distance
+
+        self.rectangle = array("i", rectangle.tobytes())
+        self.neighbour = array("i", neighbour.tobytes())
+        self.moveCost = array("q", moveCost.tobytes())
+
+
+
+# Splits the equal, passable values of a map into rectangles at least SMALLEST_RECTANGLE on each side,
+# returned as (top, left, bottom, right) with the bottom and right inclusive. Each location is in at most one.
+# Works through the map row by row, taking at each location not yet covered the largest rectangle whose
+# top left corner it is.
+def findRectangles(values: np.ndarray, passable: np.ndarray) -> list[tuple[int, int, int, int]]:
+
+    rowSize, colSize = values.shape
+    runRight = getRuns(values, passable)
+    runDown = getRuns(values.T, passable.T).T
+
+    covered = np.zeros(values.shape, dtype=bool)
+    rectangles = []
+
+    # Only locations with room for a rectangle to their right and below can be a top left corner
+    for top, left in zip(*np.nonzero((runRight >= SMALLEST_RECTANGLE) & (runDown >= SMALLEST_RECTANGLE))):
+        if covered[top, left]:
+            continue
+
+        best = None
+        width = colSize
+        for bottom in range(top, top + int(runDown[top, left])):
+            # The row only extends the rectangle as far as its equal values do, and up to a covered location
+            row = covered[bottom, left:left + int(runRight[bottom, left])]
+            width = min(width, int(np.argmax(row)) if row.any() else len(row))
+            if width < SMALLEST_RECTANGLE:
+                break
+
+            height = bottom - top + 1
+            if height >= SMALLEST_RECTANGLE and (best is None or width * height > best[0]):
+                best = (width * height, bottom, left + width - 1)
+
+        if best is not None:
+            _, bottom, right = best
+            covered[top:bottom + 1, left:right + 1] = True
+            rectangles.append((int(top), int(left), int(bottom), int(right)))
+
+    return rectangles
+
+
+# For every location, how many locations from it to the right (itself included) are passable and have its value.
+def getRuns(values: np.ndarray, passable: np.ndarray) -> np.ndarray:
+
+    runs = np.zeros(values.shape, dtype=np.int64)
+    runs[:, -1] = passable[:, -1]
+    for col in range(values.shape[1] - 2, -1, -1):
+        same = passable[:, col] & (values[:, col] == values[:, col + 1])
+        runs[:, col] = np.where(same, runs[:, col + 1] + 1, passable[:, col])
+
+    return runs
+
+
+# Returns the rectangles of a grid, working them out only on first use. Cached on the grid.
+def getRectangles(grid: Grid) -> Rectangles:
+
+    if "rectangles" not in grid.derived:
+        grid.derived["rectangles"] = Rectangles(grid)
+
+    return grid.derived["rectangles"]
+
+
+
+# Returns a copy of the grid for one query that jumps across uniform rectangles, for the search only
+# (heuristics are still given the grid itself). A rectangle with the start or the goal inside it keeps its moves.
+def getJumpGrid(grid: Grid, start: Location, goal: Location) -> Grid:
+
+    rectangles = getRectangles(grid)
+    jumpGrid = copy.copy(grid)
+    jumpGrid.neighbour = rectangles.neighbour
+    jumpGrid.moveCost = rectangles.moveCost
+
+    kept = {rectangles.rectangle[grid.cell(location)] for location in (start, goal)} - {-1}
+    if kept:
+        jumpGrid.neighbour = rectangles.neighbour[:]
+        jumpGrid.moveCost = rectangles.moveCost[:]
+
+    for index in kept:
+        top, left, bottom, right = rectangles.rectangles[index]
+        for row in range(top, bottom + 1):
+            first, last = grid.cell((row, left)) * 4, grid.cell((row, right)) * 4 + 4
+            jumpGrid.neighbour[first:last] = grid.neighbour[first:last]
+            jumpGrid.moveCost[first:last] = grid.moveCost[first:last]
+
+    return jumpGrid
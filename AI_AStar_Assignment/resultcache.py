@@ -0,0 +1,249 @@
+import json
+import sqlite3
+from collections import OrderedDict
+from itertools import accumulate
+from typing import Optional
+from grid import getMapKey
+from maps import Location, Map
+
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+
+
+# How many results are kept in memory, unless given.
+CAPACITY = 4096
+
+
+# Remembers the results of queries so repeated queries are not searched again.
+# A result is stored under a content hash of the maps (see grid.getMapKey) and the query parameters,
+# so the same query on an equal map is a hit whatever array it comes in, and an edited map never is.
+#
+# The most recently used results are kept in memory and the least recently used evicted first.
+# When a file name is given every result is also written to an SQLite database there, which
+# outlives the process, and results missing from memory are looked up in it before searching.
+#
+# For Task 1 every part of a cheapest path is itself a cheapest path between its two ends,
+# and moves cost the same in both directions, so a query whose start and goal both lie on a
+# path in memory is answered from it (in either direction) without a search.
+# This does not hold for Task 2, whose results are only reused for exactly the same query.
+#
+# Among equally cheap paths the one returned may differ from the one a search would find now,
+# the cost is always the same.
+class ResultCache:
+
+    def __init__(self, capacity: int = CAPACITY, file_name: Optional[str] = None):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+        # For Task 1 paths in memory, by (terrain key, threshold): every location on a path, mapped to
+        # the entry keys of the paths through it and its position along each.
+        self.onPath = {}
+
+        self.hits = 0
+        self.subpathHits = 0
+        self.diskHits = 0
+        self.misses = 0
+
+        self.store = None
+        if file_name is not None:
+            self.store = sqlite3.connect(file_name)
+            self.store.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL)")
+
+
+    def find_shortest_path(self, start: Location, goal: Location, terrain_map: Map, terrain_threshold: int,
+                           **options) -> tuple[Optional[int],Optional[list[Location]]]:
+        """As pathfinding_task1.find_shortest_path, answered from the cache when possible.
+           Other options (such as the heuristic or mode) are passed on to the search on a miss.
+           Bounded searches (given a weight or epsilon) are not cached, their results are not the lowest cost."""
+
+        if self._bounded(options):
+            return find_shortest_path(start, goal, terrain_map, terrain_threshold, **options)
+
+        start, goal, terrain_threshold = toLocation(start), toLocation(goal), int(terrain_threshold)
+        group = (getMapKey(terrain_map), terrain_threshold)
+        key = json.dumps(["task1", *group, start, goal])
+
+        result = self._get(key, group, terrain_map)
+        if result is None:
+            result = self._getSubpath(group, start, goal)
+
+        if result is None:
+            self.misses += 1
+            result = find_shortest_path(start, goal, terrain_map, terrain_threshold, **options)
+            self._put(key, result, group, terrain_map)
+
+        return self._copy(result)
+
+
+    def find_shortest_safe_path(self, start: Location, goal: Location, terrain_map: Map, terrain_threshold: int,
+                                success_map: Map, success_threshold: float,
+                                **options) -> tuple[Optional[int],Optional[float],Optional[list[Location]]]:
+        """As safe_pathfinding_task2.find_shortest_safe_path, answered from the cache when possible.
+           Other options (such as the heuristic) are passed on to the search on a miss.
+           Bounded searches (given a weight or epsilon) are not cached, their results are not the lowest cost."""
+
+        if self._bounded(options):
+            return find_shortest_safe_path(start, goal, terrain_map, terrain_threshold, success_map, success_threshold,
+                                           **options)
+
+        start, goal = toLocation(start), toLocation(goal)
+        terrain_threshold, success_threshold = int(terrain_threshold), float(success_threshold)
+        key = json.dumps(["task2", getMapKey(terrain_map), terrain_threshold, getMapKey(success_map), success_threshold,
+                          start, goal])
+
+        result = self._get(key)
+        if result is None:
+            self.misses += 1
+            result = find_shortest_safe_path(start, goal, terrain_map, terrain_threshold, success_map, success_threshold,
+                                             **options)
+            self._put(key, result)
+
+        return self._copy(result)
+
+
+    def cache_info(self) -> dict:
+        """Returns the hit and miss counts and the number of results held in memory.
+           Subpath and disk hits are also counted as hits."""
+
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "subpath_hits": self.subpathHits, "disk_hits": self.diskHits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0, "entries": len(self.entries), "capacity": self.capacity}
+
+
+    def clear(self) -> None:
+        """Forgets every result held in memory and on disk, and resets the counts."""
+
+        self.entries.clear()
+        self.onPath.clear()
+        self.hits = self.subpathHits = self.diskHits = self.misses = 0
+
+        if self.store is not None:
+            self.store.execute("DELETE FROM results")
+            self.store.commit()
+
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+
+    # Looks a result up in memory, then on disk. Returns None if it is in neither.
+    # A Task 1 result read from disk is indexed for subpaths with the group and map it belongs to.
+    def _get(self, key: str, group=None, terrain_map: Optional[Map] = None) -> Optional[tuple]:
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        if self.store is None:
+            return None
+
+        row = self.store.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        self.hits += 1
+        self.diskHits += 1
+
+        # JSON has no tuples, so the locations come back as lists
+        result = json.loads(row[0])
+        if result[-1] is not None:
+            result[-1] = [tuple(location) for location in result[-1]]
+        result = tuple(result)
+
+        self._remember(key, result, group, terrain_map)
+        return result
+
+
+    # Answers a Task 1 query from part of a path in memory that passes through both the start and the goal.
+    def _getSubpath(self, group, start: Location, goal: Location) -> Optional[tuple]:
+
+        onPath = self.onPath.get(group)
+        if onPath is None or start not in onPath or goal not in onPath:
+            return None
+
+        throughGoal = onPath[goal]
+        for key, first in onPath[start].items():
+            last = throughGoal.get(key)
+            if last is None:
+                continue
+
+            (_, path), prefixCosts, _ = self.entries[key]
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.subpathHits += 1
+
+            if first <= last:
+                return prefixCosts[last] - prefixCosts[first], path[first:last + 1]
+            return prefixCosts[first] - prefixCosts[last], path[last:first + 1][::-1]
+
+        return None
+
+
+    # Stores a new result in memory and on disk.
+    def _put(self, key: str, result: tuple, group=None, terrain_map: Optional[Map] = None) -> None:
+
+        if self.store is not None:
+            self.store.execute("INSERT OR REPLACE INTO results VALUES (?, ?)", (key, json.dumps(result)))
+            self.store.commit()
+
+        self._remember(key, result, group, terrain_map)
+
+
+    # Stores a result in memory, evicting the least recently used result once the capacity is exceeded.
+    # Task 1 paths (given their group and map) are also indexed by the locations along them.
+    def _remember(self, key: str, result: tuple, group=None, terrain_map: Optional[Map] = None) -> None:
+
+        prefixCosts = None
+        path = result[-1]
+
+        if group is not None and path is not None:
+            # The cost of the path up to each location on it, so any part of it is costed by one subtraction
+            prefixCosts = [0] + list(accumulate(int(terrain_map[a]) + int(terrain_map[b]) for a, b in zip(path, path[1:])))
+
+            onPath = self.onPath.setdefault(group, {})
+            for index, location in enumerate(path):
+                onPath.setdefault(location, {})[key] = index
+
+        self.entries[key] = (result, prefixCosts, group)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.capacity:
+            self._forget(*self.entries.popitem(last=False))
+
+
+    # Removes an evicted Task 1 path from the index of locations.
+    def _forget(self, key: str, entry: tuple) -> None:
+
+        (result, prefixCosts, group) = entry
+        if prefixCosts is None:
+            return
+
+        onPath = self.onPath[group]
+        for location in result[-1]:
+            paths = onPath[location]
+            paths.pop(key, None)
+            if not paths:
+                del onPath[location]
+
+
+    # Whether the options ask for a bounded suboptimal search (see bounded.py).
+    @staticmethod
+    def _bounded(options: dict) -> bool:
+        return options.get("weight") is not None or options.get("epsilon") is not None
+
+
+    # Results are handed out as copies, so changing a returned path never changes the cache.
+    @staticmethod
+    def _copy(result: tuple) -> tuple:
+        return result[:-1] + (None if result[-1] is None else list(result[-1]),)
+
+
+
+# A location as a tuple of Python ints, so that locations given as NumPy integers can be written into keys
+# and stored results as JSON.
+def toLocation(location) -> Location:
+    return int(location[0]), int(location[1])
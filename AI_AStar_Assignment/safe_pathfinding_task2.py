@@ -1,120 +1,258 @@
 import click
 from typing import Optional
-from events import log, log_enqueue_state, log_ignore_state, log_visit_state
+from events import log, log_enqueue_state, log_ignore_state, log_visit_state, logging_enabled, set_sink, NullSink
 from maps import Location, Map
 from parsing import validate_location, validate_map
 
 from methods import *
-from queue import PriorityQueue
-from q2node import q2Node
+from heuristics import HEURISTICS, Heuristic, manhattanHeuristic
+from grid import getGrid, getSafetyTable
+from nodepool import NodePool
+from pareto import ParetoSet, canSucceed, getSurvivalBound
+from stats import SearchStats, make_frontier, profiling
+from bounded import getAchievedBound, getWeight, makeBoundedFrontier
+from kernels import BACKENDS, kernelsEnabled, runSafePathKernel
 
 
 
 def find_shortest_safe_path(start: Location, goal: Location, 
                             terrain_map: Map, terrain_threshold: int,
-                            success_map: Map, success_threshold: float) \
-                            -> tuple[Optional[int],Optional[float],Optional[list[Location]]]:
+                            success_map: Map, success_threshold: float,
+                            heuristic: Heuristic = manhattanHeuristic,
+                            stats: Optional[SearchStats] = None,
+                            weight: Optional[float] = None,
+                            epsilon: Optional[float] = None,
+                            backend: str = "python",
+                            tie_break: str = "default") -> tuple:
     """Finds the path with lowest total cost that also satisfies 
        the minimum success probability threshold (Task 2).
        Returns (cost,prob_success,list(locations)) when a path is found.
-       Returns (None,None,None) if no path is found."""
+       Returns (None,None,None) if no path is found.
+       The heuristic is one of those in heuristics.py, the manhattan distance by default.
+       When stats is given it is filled in with counters and timings of the search (see stats.py).
+       Given a weight (weighted A*) or an epsilon (focal search) the path found may cost more than the lowest
+       meeting the threshold, but at most weight or 1 + epsilon times as much (see bounded.py). The result then
+       also holds the bound achieved: (cost,prob_success,list(locations),bound), or (None,None,None,None).
+       The backend "numba" runs the search compiled when Numba is installed and the search allows it (see kernels.py),
+       finding the same path, and otherwise falls back to the "python" backend (the default).
+       The tie_break policy orders labels of equal f (see methods.TIE_BREAKS), which changes how many labels are
+       expanded and may change which of several equally good paths is found, but never the cost."""
 
     # This is the entry point for your code for Task 2.
     # Please create additional functions and classes etc as needed 
     # to structure your implementation. 
     # Avoid implementing the entire algorithm in one long chunk.
 
-
-    frontier = PriorityQueue()
+    bounded = weight is not None or epsilon is not None
+    solutions = searchLabels(start, goal, terrain_map, terrain_threshold, success_map, success_threshold, 
+                             heuristic, wholeFront= False, stats= stats, weight= weight, epsilon= epsilon,
+                             backend= backend, tie_break= tie_break)
+
+    if not solutions:
+        return (None, None, None, None) if bounded else (None, None, None)
+
+    return solutions[0] if bounded else solutions[0][:3]
+
+
+def find_pareto_front(start: Location, goal: Location, 
+                      terrain_map: Map, terrain_threshold: int,
+                      success_map: Map, success_threshold: float = 0.0,
+                      heuristic: Heuristic = manhattanHeuristic,
+                      stats: Optional[SearchStats] = None,
+                      tie_break: str = "default") \
+                      -> list[tuple[int,float,list[Location]]]:
+    """Finds every path that trades cost against success probability optimally (the Pareto front):
+       no other path is both at least as cheap and at least as likely to succeed.
+       Only paths meeting the minimum success probability threshold are considered.
+       Returns a list of (cost,prob_success,list(locations)), cheapest (and least safe) first.
+       The list is empty if no path is found.
+       When stats is given it is filled in with counters and timings of the search (see stats.py).
+       The tie_break policy orders labels of equal f (see methods.TIE_BREAKS), the costs and success probabilities
+       found are the same."""
+
+    return searchLabels(start, goal, terrain_map, terrain_threshold, success_map, success_threshold, 
+                        heuristic, wholeFront= True, stats= stats, tie_break= tie_break)
+
+
+
+# Multi-objective A* (NAMOA* style label-setting search) for question 2.
+# Several paths (labels) may reach the same location with different trade-offs between cost and safety.
+# Each location keeps the set of labels found so far that no other label dominates (see pareto.ParetoSet),
+# a new label is ignored if it is dominated and removes the labels it dominates from the frontier.
+# Labels that can't meet the success threshold, even if the rest of the path were as safe as possible, are pruned.
+# When wholeFront is False the search stops at the first (cheapest) path that reaches the goal, 
+# otherwise it carries on and returns every non-dominated path to the goal.
+# Given a weight or epsilon (see bounded.py) the first path found may cost more than the cheapest, within the bound,
+# and is returned with the bound achieved. Only a search stopping at the first path takes them.
+def searchLabels(start: Location, goal: Location, terrain_map: Map, terrain_threshold: int,
+                 success_map: Map, success_threshold: float, heuristic: Heuristic, wholeFront: bool,
+                 stats: Optional[SearchStats] = None,
+                 weight: Optional[float] = None, epsilon: Optional[float] = None, backend: str = "python",
+                 tie_break: str = "default") -> list:
+
+    bounded = weight is not None or epsilon is not None
+    if bounded and wholeFront:
+        raise ValueError("Bounded search only finds a single path, not the Pareto front")
+    weighted = getWeight(weight, epsilon)
+    tieKey = getTieKey(tie_break)
+    useKernel = kernelsEnabled(backend) and stats is None and not bounded and not wholeFront
+
+    if stats is not None:
+        stats.begin()
+
+    # Frontier operations are only counted and timed when stats are gathered.
+    frontier = make_frontier(stats)
+
+    # Search events are only logged when a sink is listening (see events.py).
+    logEvents = logging_enabled()
+
+    # The neighbours and move costs of every location, precomputed once per map and threshold,
+    # and the probability of passing each location safely.
+    grid = getGrid(terrain_map, terrain_threshold)
+    safety = getSafetyTable(success_map)
+
+    # The heuristic estimate of the cost from each location to the goal,
+    # and the best possible success probability of the rest of the path from each location.
+    estimate = heuristic(grid, goal)
+    survivalBound = getSurvivalBound(grid, safety, goal)
+
+    # The compiled search loop (see kernels.py) takes the place of the one below when it can.
+    if useKernel:
+        solutions = runSafePathKernel(grid, safety, survivalBound, start, goal, heuristic, success_threshold, logEvents,
+                                      tie_break)
+        if solutions is not None:
+            return solutions
+
+    # All nodes placed in the frontier are stored in the pool and referred to by index.
+    pool = NodePool()
+
+    # For focal search the frontier picks the safest of the labels within the bound.
+    if epsilon is not None:
+        frontier = makeBoundedFrontier(epsilon, lambda node: 1 - pool.prob[node], stats)
+
+    # The non-dominated labels at each location, and the paths found to the goal.
+    labels = {}
+    goalLabels = ParetoSet()
+    solutions = []
+
+    # Generates the children of a node, timed when stats are gathered.
+    expand = getQ2Neighbours if stats is None else stats.timed(getQ2Neighbours)
+    if stats is not None:
+        stats.track(pool, frontier)
 
     # Create the initial starting node to be added to the frontier
-    h = calculateManhattanDistance(start, goal)
-    startNode = q2Node(location= start, h= h, moveCost= 0, g= 0, f= getFtotalCost(g=0, h=h), prob=1, parent= None, tag= "Keep")
-
-    # Frontier sorts by totalFCost(includes heuristic) as the priority, success probability as second priority, and location as third priority.
-    frontier.put((startNode.f, (1 - startNode.prob), startNode.location, startNode))
-    log_enqueue_state(startNode.location, startNode.g, startNode.prob)
-    
-    explored = set()
-
-    pathList = []
+    # The start location is part of the path, so its enemy presence counts towards the success probability.
+    startCell = grid.cell(start)
+    startProb = safety[startCell]
+    if not canSucceed(startProb, survivalBound[startCell], success_threshold):
+        if stats is not None:
+            stats.finish()
+        return solutions
+
+    startNode = pool.add(start, g= 0, h= estimate(start), prob= startProb)
+    labels[start] = ParetoSet()
+    labels[start].insert(0, startProb, startNode)
+
+    # Frontier sorts by totalFCost(includes heuristic) as the priority, success probability as second priority, 
+    # location as third priority and the node index as the last.
+    # Any other tie-breaking policy than the default places its tie key straight after totalFCost.
+    # Weighted A* multiplies the heuristic by its weight, otherwise the weight is 1.
+    startF = getFtotalCost(g= 0, h= weighted * pool.h[startNode])
+    frontier.push(startNode, (startF, (1 - startProb), start, startNode) if tieKey is None else
+                             (startF, tieKey(0, pool.h[startNode], start), (1 - startProb), start, startNode), startNode)
+    if logEvents:
+        log_enqueue_state(start, 0, startProb)
 
 
 
     # Start the search
-    while(frontier.qsize() > 0):
+    while(len(frontier) > 0):
 
         # Retrieve a node from the frontier
-        temp = frontier.get()
-
-        # Strip out the priority queue sorting elements
-        currentNode = temp[3]
-
-        # Keep tag means that only valid nodes are processed
-        if currentNode.tag == "Keep":
-
-            # Goal test
-            if currentNode.location == goal:
-
-                # Goal has been found
-                finalList = []
-                pathList = []
-
-                # Work backwards from the goal node to retrieve the entire path that lead to the goal
-                pathList = getParents(currentNode, pathList)
-
-                # Need to extract the locations from the nodes in the path to return a location list
-                for node in pathList:
-                    finalList.append(node.location)
-
-                # Reverse the list so that the expected order of visited locations is correct.
-                finalList.reverse()
-
-                return currentNode.g, currentNode.prob, finalList
-
-
-
-            # Expand the node and add it to the explored list                         
-            explored.add(currentNode)
-            log_visit_state(currentNode.location, currentNode.g, currentNode.prob)
-    
-            # Get the neighbouring children
-            child_nodes = getQ2Neighbours(currentNode, goal, terrain_map, terrain_threshold, success_map)
-
-
-
-            # Process the children
-            for child in child_nodes:
-  
-                placeable = True        
-
-                # If an item in the explored list shares the same location as the child,
-                # the equality check in the q2Node class will filter the explored list accordingly.
-                if child in explored:
-                    placeable = False
-
-                for f in frontier.queue:
-                    if child.location == f[3].location:
-
-                        # If the child has a higher f cost and the same or lower probability of success
-                        # then it is a more treacherous path and should be ignored.
-                        if child.f >= f[3].f and child.prob <= f[3].prob:
-                            placeable = False
-                            log_ignore_state(child.location, child.g, child.prob)
-                            break
-                    
-                        # The incoming child has a superior path with lower f cost and higher or equal chance of success.
-                        # The frontier queue item can't be directly deleted so a remove tag means that it is ignored.
-                        elif child.f < f[3].f and child.prob >= f[3].prob:
-                            f[3].tag = "REMOVE"                                                        
-
-                if placeable:
-                    # The child can only be placed in the frontier if it satisfies the success threshold.
-                    if child.prob >= success_threshold:
-                        frontier.put((child.f, (1 - child.prob), child.location, child))
-                        log_enqueue_state(child.location, child.g, child.prob)
+        currentNode, priority, _ = frontier.pop()
+        currentF = priority[0]
+        location = priority[-2]
+
+        g = pool.g[currentNode]
+        prob = pool.prob[currentNode]
+
+        # A path to the goal found since this label was placed may already be at least as good as any way of finishing it.
+        if wholeFront and goalLabels.dominates(currentF, prob * survivalBound[grid.cell(location)]):
+            if stats is not None:
+                stats.stalePops += 1
+            continue
+
+        # Goal test
+        if location == goal:
+
+            # Goal has been found
+            # Work backwards from the goal node to retrieve the entire path that lead to the goal
+            pathList = getParents(pool, currentNode, [])
+
+            # Reverse the list so that the expected order of visited locations is correct.
+            pathList.reverse()
+
+            solutions.append((g, prob, pathList))
+            if not wholeFront:
+                if stats is not None:
+                    stats.finish()
+                if bounded:
+                    solutions[0] += (getAchievedBound(pool, frontier, g, weight, epsilon),)
+                return solutions
+
+            # Paths carrying on from the goal and coming back could only be dearer and less safe.
+            goalLabels.insert(g, prob, currentNode)
+            continue
+
+
+
+        # Expand the node
+        if logEvents:
+            log_visit_state(location, g, prob)
+
+        # Get the neighbouring children
+        child_nodes = expand(pool, currentNode, estimate, grid, safety)
+
+
+
+        # Process the children
+        for childLocation, childG, childH, childProb in child_nodes:
+
+            childF = getFtotalCost(g= childG, h= weighted * childH)
+            childSurvival = survivalBound[grid.cell(childLocation)]
+            sameLocation = labels.get(childLocation)
+
+            if sameLocation is None:
+                sameLocation = labels[childLocation] = ParetoSet()
+
+            # The child can only be placed in the frontier if it can still satisfy the success threshold.
+            # If a path to the same location is at least as cheap and at least as safe,
+            # or a path to the goal already found beats any way of finishing it, 
+            # the child is a more treacherous path and should be ignored.
+            if not canSucceed(childProb, childSurvival, success_threshold) \
+               or sameLocation.dominates(childG, childProb) \
+               or (wholeFront and goalLabels.dominates(childF, childProb * childSurvival)):
+                if logEvents:
+                    log_ignore_state(childLocation, childG, childProb)
+                if stats is not None:
+                    stats.ignored += 1
+                continue
+
+            # The child supersedes the paths it dominates, any of them still in the frontier is removed.
+            child = pool.add(childLocation, childG, childH, childProb, parent= currentNode)
+            for superseded in sameLocation.insert(childG, childProb, child):
+                if superseded in frontier:
+                    frontier.remove(superseded)
+
+            frontier.push(child, (childF, (1 - childProb), childLocation, child) if tieKey is None else
+                                 (childF, tieKey(childG, childH, childLocation), (1 - childProb), childLocation, child),
+                          child)
+            if logEvents:
+                log_enqueue_state(childLocation, childG, childProb)
     
-    return None, None, None
+    if stats is not None:
+        stats.finish()
+    return solutions
 
 
 @click.command(no_args_is_help=True)
@@ -124,17 +262,54 @@ def find_shortest_safe_path(start: Location, goal: Location,
 @click.argument("terrain_threshold", required=True, type=click.IntRange(min=0,max=1000))
 @click.argument("success_map", required=True, type=click.Path(exists=True), callback=validate_map)
 @click.argument("success_threshold", required=True, type=click.FloatRange(min=0.0,max=1.0))
+@click.option("--heuristic", type=click.Choice(list(HEURISTICS)), default="manhattan", show_default=True)
+@click.option("--quiet", is_flag=True, help="Don't log the states visited, enqueued and ignored by the search.")
+@click.option("--pareto-front", is_flag=True, help="List every path that best trades cost against success probability.")
+@click.option("--profile", is_flag=True, help="Run the search under cProfile and tracemalloc and report its stats.")
+@click.option("--weight", type=click.FloatRange(min=1.0), help="Weighted A*, finding a path within this factor of the lowest cost.")
+@click.option("--epsilon", type=click.FloatRange(min=0.0), help="Focal search, finding a path within 1 + epsilon of the lowest cost.")
+@click.option("--backend", type=click.Choice(BACKENDS), default="python", show_default=True,
+              help="Run the search compiled with Numba when it is installed (see kernels.py).")
+@click.option("--tie-break", type=click.Choice(TIE_BREAKS), default="default", show_default=True,
+              help="How labels of equal f are ordered (see methods.py).")
 def main(start: Location, goal: Location, 
          terrain_map: Map, success_map: Map, 
-         terrain_threshold: int, success_threshold: float) -> None:
+         terrain_threshold: int, success_threshold: float, heuristic: str, quiet: bool, pareto_front: bool,
+         profile: bool, weight: Optional[float], epsilon: Optional[float], backend: str, tie_break: str) -> None:
     """Example usage:
 
         \b
         python safe_pathfinding_task2.py 3,2 0,3 resources/terrain01.txt 50 resources/enemy01.txt 1.0
     """
-    path = find_shortest_safe_path(start, goal, terrain_map, terrain_threshold, success_map, success_threshold)
+    if quiet:
+        set_sink(NullSink())
+
+    if pareto_front and (weight is not None or epsilon is not None):
+        raise click.UsageError("--weight and --epsilon only apply to a single path, not --pareto-front")
+
+    search = find_pareto_front if pareto_front else find_shortest_safe_path
+    arguments = (start, goal, terrain_map, terrain_threshold, success_map, success_threshold, HEURISTICS[heuristic])
+    options = {"tie_break": tie_break} if pareto_front else \
+              {"weight": weight, "epsilon": epsilon, "backend": backend, "tie_break": tie_break}
+
+    if profile:
+        with profiling(SearchStats()) as stats:
+            result = search(*arguments, stats, **options)
+    else:
+        result = search(*arguments, **options)
+
+    if pareto_front:
+        front = result
+        for cost, prob, path in front:
+            log(f"The path is {path} with cost {cost} and success probability {prob}")
+        log(f"Found {len(front)} paths on the Pareto front.")
+        return
+
+    path = result
     if path:
         log(f"The path is {path[2]} with cost {path[0]} and success probability {path[1]}")
+        if len(path) > 3 and path[3] is not None:
+            log(f"The cost is at most {path[3]:.4f} times the lowest.")
     else:
         log('No path found')
 
@@ -0,0 +1,425 @@
+import asyncio
+import json
+import os
+import click
+import numpy as np
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from time import perf_counter
+from typing import Optional
+from urllib.parse import urlsplit
+from events import log, set_sink, NullSink
+from maps import Location, Map, read_map
+
+from grid import getGrid
+from heuristics import HEURISTICS
+from parallel import SharedMap, attachMap
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+
+
+# A resident service answering Task 1 and Task 2 queries on named maps, so the cost of starting Python,
+# importing click and NumPy and reading the maps is paid once instead of by every query as with the CLIs.
+# It speaks plain HTTP/1.1 with JSON bodies over TCP or a Unix socket (keep-alive connections included):
+#
+#   POST /task1   {"map": "world04", "start": [20, 80], "goal": [80, 40], "threshold": 500, "heuristic": "alt"}
+#                 -> {"cost": 24024, "path": [[20, 80], ...]}
+#   POST /task2   the same with "success_map": "enemy04" and "success_threshold": 0.5
+#                 -> {"cost": 24836, "success": 0.52, "path": [[20, 80], ...]}
+#   GET  /health  -> the maps, the requests in flight and, for each endpoint, request counts
+#                    and percentiles of the latency of the most recent requests
+#
+# Connections are handled on one asyncio event loop and every search runs in a pool of worker processes,
+# so many requests can wait at once without a long search holding up the others. The maps are shared with
+# the workers once (see parallel.SharedMap), and each worker keeps its precomputed grids between queries.
+# The heuristic defaults to "manhattan", the same as the CLIs.
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+# How many of the most recent latencies of each endpoint the percentiles are worked out from.
+LATENCY_WINDOW = 10000
+PERCENTILES = (50, 90, 99)
+
+# Requests with a larger body, or more header lines, are refused.
+MAX_BODY = 1 << 20
+MAX_HEADERS = 100
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+ENDPOINTS = {"/task1": "POST", "/task2": "POST", "/health": "GET"}
+
+
+# A request that can't be answered, with the HTTP status to answer it with.
+class RequestError(Exception):
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+
+# Worker state: the named maps, attached once per process by _initWorker (or set directly when the
+# searches run in threads of the service's own process).
+_maps = {}
+_memories = []
+
+
+def _initWorker(specs: dict, warm: list) -> None:
+
+    # The searches would log every state they visit.
+    set_sink(NullSink())
+
+    for name, spec in specs.items():
+        memory, _maps[name] = attachMap(spec)
+        _memories.append(memory)
+
+    warmMaps(warm)
+
+
+# Precomputes the grid of each (map name, terrain threshold) pair, so the first queries don't pay for it.
+def warmMaps(warm: list) -> None:
+    for name, threshold in warm:
+        getGrid(_maps[name], threshold)
+
+
+# Answers one query in a worker, query being the arguments checked by parseQuery.
+def _solve(task: str, query: tuple) -> dict:
+
+    if task == "task1":
+        name, start, goal, threshold, heuristic = query
+        cost, path = find_shortest_path(start, goal, _maps[name], threshold, HEURISTICS[heuristic])
+        return {"cost": cost, "path": path}
+
+    name, start, goal, threshold, successName, successThreshold, heuristic = query
+    cost, prob, path = find_shortest_safe_path(start, goal, _maps[name], threshold, _maps[successName],
+                                               successThreshold, HEURISTICS[heuristic])
+    return {"cost": cost, "success": prob, "path": path}
+
+
+
+class PathService:
+
+    def __init__(self, maps: dict[str, Map], warm: list = (), workers: Optional[int] = None,
+                 executor: Optional[Executor] = None):
+        """Serves queries on the named maps. warm holds (map name, terrain threshold) pairs to precompute.
+           The searches run in a pool of worker processes (workers of them, one per core by default),
+           or in the executor given, which shares this process's maps (for instance a ThreadPoolExecutor).
+           The maps are made read-only."""
+
+        # Served maps must not change, read-only they are hashed once rather than by every query (see grid.getMapKey).
+        # Arrays are made read-only before they are viewed, since a view of a writeable array could still change.
+        self.maps = {}
+        for name, map in maps.items():
+            if isinstance(map, np.ndarray):
+                map.flags.writeable = False
+            self.maps[name] = np.asarray(map)
+            self.maps[name].flags.writeable = False
+        self.warm = [(name, int(threshold)) for name, threshold in warm]
+        for name, _ in self.warm:
+            if name not in self.maps:
+                raise ValueError(f"Unknown map {name!r} to warm")
+
+        self.shared = {}
+        if executor is None:
+            self.shared = {name: SharedMap(map) for name, map in self.maps.items()}
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_initWorker,
+                                           initargs=({name: shared.spec for name, shared in self.shared.items()},
+                                                     self.warm))
+        else:
+            _maps.update(self.maps)
+            warmMaps(self.warm)
+        self.executor = executor
+        self.workers = getattr(executor, "_max_workers", workers)
+
+        self.began = perf_counter()
+        self.inFlight = 0
+        self.latencies = {endpoint: deque(maxlen=LATENCY_WINDOW) for endpoint in ENDPOINTS}
+        self.counts = {endpoint: {"requests": 0, "errors": 0} for endpoint in ENDPOINTS}
+
+
+    async def start(self, host: str = HOST, port: int = PORT, path: Optional[str] = None) -> asyncio.Server:
+        """Starts listening on host and port, or on the Unix socket at path when given, and returns the server.
+           Port 0 picks a free port (see the server's sockets for the one chosen)."""
+
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path=path)
+        return await asyncio.start_server(self.handle, host, port)
+
+
+    def close(self) -> None:
+        """Stops the workers and frees the shared maps."""
+
+        self.executor.shutdown()
+        for shared in self.shared.values():
+            shared.close()
+        self.shared = {}
+
+
+    def metrics(self) -> dict:
+        """The service's state and, for each endpoint, its request and error counts and latency percentiles in ms."""
+
+        endpoints = {}
+        for endpoint, latencies in self.latencies.items():
+            values = np.percentile(np.fromiter(latencies, dtype=float), PERCENTILES) * 1000 if latencies else None
+            endpoints[endpoint] = dict(self.counts[endpoint], latency_ms=None if values is None else
+                                       {f"p{percentile}": round(float(value), 3)
+                                        for percentile, value in zip(PERCENTILES, values)})
+
+        return {"status": "ok", "uptime_s": round(perf_counter() - self.began, 3), "workers": self.workers,
+                "in_flight": self.inFlight, "maps": {name: list(map.shape) for name, map in self.maps.items()},
+                "endpoints": endpoints}
+
+
+    # Answers the requests of one connection in turn until the client closes it or asks to.
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+
+        try:
+            while True:
+                try:
+                    request = await readRequest(reader)
+                except RequestError as error:
+                    await writeResponse(writer, error.status, {"error": str(error)}, False)
+                    break
+                if request is None:
+                    break
+
+                began = perf_counter()
+                method, target, headers, body = request
+                status, payload = await self.respond(method, target, body)
+
+                keepAlive = headers.get("connection", "").lower() != "close"
+                await writeResponse(writer, status, payload, keepAlive)
+                self.record(target, status, perf_counter() - began)
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+    # Returns the status and JSON payload answering a request.
+    async def respond(self, method: str, target: str, body: bytes) -> tuple[int, dict]:
+
+        endpoint = urlsplit(target).path
+        try:
+            if endpoint not in ENDPOINTS:
+                raise RequestError(404, f"No such endpoint {endpoint}")
+            if method != ENDPOINTS[endpoint]:
+                raise RequestError(405, f"{endpoint} expects {ENDPOINTS[endpoint]}")
+            if endpoint == "/health":
+                return 200, self.metrics()
+
+            task = endpoint[1:]
+            query = parseQuery(task, body, self.maps)
+
+            self.inFlight += 1
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(self.executor, _solve, task, query)
+            finally:
+                self.inFlight -= 1
+            return 200, result
+
+        except RequestError as error:
+            return error.status, {"error": str(error)}
+        except Exception as error:
+            return 500, {"error": f"{type(error).__name__}: {error}"}
+
+
+    def record(self, target: str, status: int, elapsed: float) -> None:
+        endpoint = urlsplit(target).path
+        if endpoint in ENDPOINTS:
+            self.counts[endpoint]["requests"] += 1
+            self.counts[endpoint]["errors"] += status != 200
+            self.latencies[endpoint].append(elapsed)
+
+
+
+# Reads one HTTP request, returning (method, target, headers, body), or None if the client closed the connection.
+async def readRequest(reader: asyncio.StreamReader) -> Optional[tuple[str, str, dict, bytes]]:
+
+    line = await reader.readline()
+    if not line:
+        return None
+
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise RequestError(400, "Malformed request line")
+    method, target, _ = parts
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise RequestError(400, "Too many headers")
+        name, separator, value = line.decode("latin-1").partition(":")
+        if not separator:
+            raise RequestError(400, "Malformed header")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise RequestError(400, "Malformed Content-Length")
+    if length > MAX_BODY:
+        raise RequestError(413, f"The body is larger than {MAX_BODY} bytes")
+
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method, target, headers, body
+
+
+async def writeResponse(writer: asyncio.StreamWriter, status: int, payload: dict, keepAlive: bool) -> None:
+
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keepAlive else 'close'}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+
+# Checks the JSON body of a Task 1 or Task 2 query against the maps, returning the arguments for _solve.
+def parseQuery(task: str, body: bytes, maps: dict[str, Map]) -> tuple:
+
+    try:
+        query = json.loads(body)
+    except ValueError as error:
+        raise RequestError(400, f"The body is not valid JSON: {error}")
+    if not isinstance(query, dict):
+        raise RequestError(400, "The body must be a JSON object")
+
+    try:
+        name = getName(query, "map", maps)
+        start = getLocation(query, "start", maps[name])
+        goal = getLocation(query, "goal", maps[name])
+        threshold = getInteger(query["threshold"], "threshold")
+        heuristic = query.get("heuristic", "manhattan")
+        if heuristic not in HEURISTICS:
+            raise RequestError(400, f"Unknown heuristic {heuristic!r}, expected one of {', '.join(HEURISTICS)}")
+
+        if task == "task1":
+            return name, start, goal, threshold, heuristic
+
+        successName = getName(query, "success_map", maps)
+        if maps[successName].shape != maps[name].shape:
+            raise RequestError(400, f"Maps {name!r} and {successName!r} differ in size")
+        successThreshold = float(query["success_threshold"])
+        if not 0 <= successThreshold <= 1:
+            raise RequestError(400, "success_threshold must be from 0 to 1")
+        return name, start, goal, threshold, successName, successThreshold, heuristic
+
+    except KeyError as error:
+        raise RequestError(400, f"Missing {error.args[0]!r}")
+    except (TypeError, ValueError) as error:
+        raise RequestError(400, f"Invalid query: {error}")
+
+
+def getName(query: dict, field: str, maps: dict[str, Map]) -> str:
+    name = query[field]
+    if name not in maps:
+        raise RequestError(400, f"Unknown map {name!r}")
+    return name
+
+
+# A whole number given in a query, which int() would otherwise silently cut a fraction off.
+def getInteger(value, name: str) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or \
+       (isinstance(value, float) and not value.is_integer()):
+        raise RequestError(400, f"{name} must be a whole number, not {value!r}")
+    return int(value)
+
+
+def getLocation(query: dict, field: str, map: Map) -> Location:
+    location = query[field]
+    if not isinstance(location, list) or len(location) != 2:
+        raise RequestError(400, f"{field} must be a [row, col] pair, not {location!r}")
+    row, col = (getInteger(value, field) for value in location)
+    if not (0 <= row < map.shape[0] and 0 <= col < map.shape[1]):
+        raise RequestError(400, f"{field} {[row, col]} is outside the map")
+    return row, col
+
+
+
+async def send_request(method: str, target: str, body: Optional[dict] = None, host: str = HOST, port: int = PORT,
+                       path: Optional[str] = None) -> tuple[int, dict]:
+    """Sends one request to a running service (over the Unix socket at path when given),
+       returning the status and the JSON payload of the response."""
+
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    try:
+        data = b"" if body is None else json.dumps(body).encode()
+        writer.write(f"{method} {target} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+        await writer.drain()
+
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await reader.readexactly(length))
+    finally:
+        writer.close()
+
+
+
+# Parses NAME=VALUE options into (name, value) pairs.
+def validate_pairs(_ctx, _param, values) -> list[tuple[str, str]]:
+    pairs = []
+    for value in values:
+        name, separator, rest = value.partition("=")
+        if not separator or not name or not rest:
+            raise click.BadParameter(f"'{value}' is not NAME=VALUE")
+        pairs.append((name, rest))
+    return pairs
+
+
+
+@click.command(no_args_is_help=True)
+@click.option("--map", "maps", multiple=True, required=True, callback=validate_pairs,
+              help="A map to serve, as NAME=FILE (terrain and enemy maps alike). Can be repeated.")
+@click.option("--warm", multiple=True, callback=validate_pairs,
+              help="Precompute a map for a terrain threshold at startup, as NAME=THRESHOLD. Can be repeated.")
+@click.option("--host", default=HOST, show_default=True)
+@click.option("--port", type=click.IntRange(min=0, max=65535), default=PORT, show_default=True)
+@click.option("--unix", "path", type=click.Path(dir_okay=False), help="Listen on this Unix socket instead of a port.")
+@click.option("--workers", type=click.IntRange(min=1), default=None, help="Worker processes (default one per core).")
+def main(maps, warm, host: str, port: int, path: Optional[str], workers: Optional[int]) -> None:
+    """Serves Task 1 and Task 2 queries on named maps over HTTP until interrupted.
+
+    \b
+    python server.py --map world04=resources/terrain04.txt --map enemy04=resources/enemy04.txt --warm world04=500
+    curl -d '{"map": "world04", "start": [20, 80], "goal": [80, 40], "threshold": 500}' localhost:8765/task1
+    """
+    try:
+        service = PathService({name: read_map(file) for name, file in maps},
+                              [(name, int(threshold)) for name, threshold in warm], workers)
+    except ValueError as error:
+        raise click.UsageError(str(error))
+
+    async def serve() -> None:
+        server = await service.start(host, port, path)
+        log(f"Serving {', '.join(service.maps)} on {path or ':'.join(map(str, server.sockets[0].getsockname()[:2]))}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+import contextlib
+import cProfile
+import io
+import pstats
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Iterator
+from events import log
+from openset import OpenSet
+
+
+# What a single search did and where its time went, filled in when a SearchStats is passed to
+# find_shortest_path, find_shortest_safe_path or find_pareto_front. Without one the searches
+# skip all of this, so timing every heap operation costs nothing unless it is asked for.
+#
+# The time of a search is split into phases: setup (the grid, heuristic and bounds), generating
+# neighbours, frontier (heap) operations and bookkeeping, which is everything else in the loop
+# (the goal test, dominance checks, logging and building the path).
+class SearchStats:
+
+    __slots__ = ("expansions", "generated", "pushes", "pops", "stalePops", "ignored", "removed", "maxFrontier",
+                 "setupTime", "neighbourTime", "frontierTime", "totalTime", "bytesAllocated", "peakBytes",
+                 "_began", "_pool", "_frontier")
+
+    def __init__(self):
+        self.expansions = 0       # nodes whose neighbours were generated
+        self.generated = 0        # children generated, whether placed in the frontier or not
+        self.pushes = 0           # entries added to the frontier, or updated in place (decrease-key)
+        self.pops = 0
+        self.stalePops = 0        # popped entries that were no longer worth expanding (Task 2 only,
+                                  # Task 1 updates entries in place so never pops a stale one)
+        self.ignored = 0          # children that were not placed in the frontier
+        self.removed = 0          # entries taken out of the frontier by dominance (Task 2 only)
+        self.maxFrontier = 0
+        self.setupTime = 0.0
+        self.neighbourTime = 0.0
+        self.frontierTime = 0.0
+        self.totalTime = 0.0
+        self.bytesAllocated = 0   # approximate bytes held by the nodes and the frontier when the search ended
+        self.peakBytes = None     # peak bytes allocated during the search, only measured by profiling()
+
+        self._began = None
+        self._pool = None
+        self._frontier = None
+
+
+    # The time spent in the search loop outside of generating neighbours and frontier operations.
+    @property
+    def bookkeepingTime(self) -> float:
+        return max(self.totalTime - self.setupTime - self.neighbourTime - self.frontierTime, 0.0)
+
+
+    # Called by a search when it starts.
+    def begin(self) -> None:
+        self._began = perf_counter()
+
+
+    # Called by a search once it is set up, with the node pool and frontier it is about to search with.
+    # A search that keeps its nodes some other way passes None and fills in bytesAllocated itself.
+    def track(self, pool, frontier) -> None:
+        self.setupTime = perf_counter() - self._began
+        self._pool = pool
+        self._frontier = frontier
+
+
+    # Called by a search when it returns.
+    def finish(self) -> None:
+        self.totalTime = perf_counter() - self._began
+
+        if self._pool is not None:
+            heap = self._frontier.heap
+            self.bytesAllocated = (self._pool.nbytes() + sys.getsizeof(heap) + sys.getsizeof(self._frontier.position)
+                                   + len(heap) * sys.getsizeof([None, None, None]))
+
+        # The pool and frontier are not kept alive once the search is over
+        self._pool = self._frontier = None
+
+
+    # Wraps a neighbour function (methods.getNeighbours or methods.getQ2Neighbours) so its calls are counted and timed.
+    def timed(self, getNeighbours):
+
+        def timedNeighbours(*args):
+            began = perf_counter()
+            children = getNeighbours(*args)
+            self.neighbourTime += perf_counter() - began
+            self.expansions += 1
+            self.generated += len(children)
+            return children
+
+        return timedNeighbours
+
+
+    def as_dict(self) -> dict:
+        values = {name: getattr(self, name) for name in self.__slots__ if not name.startswith("_")}
+        values["bookkeepingTime"] = self.bookkeepingTime
+        return values
+
+
+    def lines(self) -> list[str]:
+        lines = [f"expansions={self.expansions} generated={self.generated} pushes={self.pushes} pops={self.pops} "
+                 f"stale pops={self.stalePops} ignored={self.ignored} removed={self.removed} max frontier={self.maxFrontier}",
+                 f"time={self.totalTime:.4f}s setup={self.setupTime:.4f}s neighbours={self.neighbourTime:.4f}s "
+                 f"frontier={self.frontierTime:.4f}s bookkeeping={self.bookkeepingTime:.4f}s",
+                 f"bytes allocated={self.bytesAllocated}"]
+
+        if self.peakBytes is not None:
+            lines[-1] += f" peak bytes={self.peakBytes}"
+
+        return lines
+
+
+
+# The frontier used while stats are being gathered, an OpenSet that counts and times every operation.
+class TimedOpenSet(OpenSet):
+
+    __slots__ = ("stats",)
+
+    def __init__(self, stats: SearchStats):
+        super().__init__()
+        self.stats = stats
+
+
+    def push(self, key, priority, item) -> bool:
+        began = perf_counter()
+        pushed = super().push(key, priority, item)
+        self.stats.frontierTime += perf_counter() - began
+
+        self.stats.pushes += pushed
+        self.stats.maxFrontier = max(self.stats.maxFrontier, len(self.heap))
+        return pushed
+
+
+    def pop(self):
+        began = perf_counter()
+        entry = super().pop()
+        self.stats.frontierTime += perf_counter() - began
+        self.stats.pops += 1
+        return entry
+
+
+    def remove(self, key) -> None:
+        began = perf_counter()
+        super().remove(key)
+        self.stats.frontierTime += perf_counter() - began
+        self.stats.removed += 1
+
+
+
+# The frontier a search should use: a plain OpenSet unless stats are being gathered.
+def make_frontier(stats) -> OpenSet:
+    return OpenSet() if stats is None else TimedOpenSet(stats)
+
+
+
+@contextlib.contextmanager
+def profiling(stats: SearchStats, top: int = 20) -> Iterator[SearchStats]:
+    """Runs the body of a with block under cProfile and tracemalloc, then logs the stats gathered by the search,
+       its peak memory and the functions with the most cumulative time.
+       Both slow the search down considerably, so the times reported are only useful relative to each other."""
+
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+
+    try:
+        yield stats
+    finally:
+        profiler.disable()
+        stats.peakBytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        for line in stats.lines():
+            log(line)
+
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+        log(report.getvalue())
@@ -0,0 +1,127 @@
+import numpy as np
+from maps import Location, Map
+
+
+# Seeded generators of synthetic terrain and enemy maps shaped like the ones in resources/,
+# for benchmarking at sizes far beyond the bundled maps. The same size and seed always give the same map.
+# Terrain values run from 1 to 500 like terrain04, with walls of IMPASSABLE that no threshold used here lets through.
+
+IMPASSABLE = 1000
+
+
+# Smooth rolling hills: coarse random heights interpolated up to the full size, like terrain04.
+def makeHills(size: int, seed: int = 0) -> Map:
+    hills = getSmoothNoise(np.random.default_rng(seed), size, max(size // 16, 2) + 1)
+    return (1 + hills * 499).round().astype(np.int64)
+
+
+# Wide flat terraces with a step up or down between them: much broader hills than makeHills,
+# with their heights rounded down to five levels, so most of the map is large areas of equal values.
+def makeTerraces(size: int, seed: int = 0) -> Map:
+    hills = getSmoothNoise(np.random.default_rng(seed), size, max(size // 64, 2) + 1)
+    return 1 + np.minimum(hills * 5, 4).astype(np.int64) * 100
+
+
+# Random heights from 0 to 1 on a coarse grid of coarseSize by coarseSize, bilinearly interpolated
+# up to size by size, first along the rows and then along the columns.
+def getSmoothNoise(rng, size: int, coarseSize: int) -> np.ndarray:
+
+    coarse = rng.random((coarseSize, coarseSize))
+    points = np.linspace(0, coarseSize - 1, size)
+    rows = np.array([np.interp(points, np.arange(coarseSize), line) for line in coarse])
+    return np.array([np.interp(points, np.arange(coarseSize), line) for line in rows.T]).T
+
+
+# Open ground of low values broken up by long straight walls, each with a few gaps to pass through.
+def makeWalls(size: int, seed: int = 0) -> Map:
+
+    rng = np.random.default_rng(seed)
+    terrain = rng.integers(10, 31, (size, size))
+
+    for _ in range(max(size // 10, 1)):
+        position = int(rng.integers(0, size))
+        first, last = sorted(int(value) for value in rng.integers(0, size, 2))
+        gaps = rng.integers(first, last + 1, max((last - first) // 20, 1))
+
+        line = terrain[position, first:last + 1] if rng.random() < 0.5 else terrain[first:last + 1, position]
+        line[:] = IMPASSABLE
+        line[gaps - first] = rng.integers(10, 31, len(gaps))
+
+    return terrain
+
+
+# A maze of corridors one location wide between walls, carved with the binary tree algorithm:
+# every room on the odd rows and columns is joined to the room north or west of it, chosen at random.
+# Every room can reach every other, by exactly one route.
+def makeMaze(size: int, seed: int = 0) -> Map:
+
+    rng = np.random.default_rng(seed)
+    terrain = np.full((size, size), IMPASSABLE, dtype=np.int64)
+    rooms = terrain[1::2, 1::2]
+    rooms[...] = rng.integers(10, 51, rooms.shape)
+
+    roomRows, roomCols = rooms.shape
+    goNorth = rng.random((roomRows, roomCols)) < 0.5
+    goNorth[0, :] = False
+    goNorth[:, 0] = True
+    goNorth[0, 0] = False
+
+    # The wall north of a room is at (2r, 2c+1), the wall west of it at (2r+1, 2c)
+    row, col = np.nonzero(goNorth)
+    terrain[2 * row, 2 * col + 1] = rng.integers(10, 51, len(row))
+    row, col = np.nonzero(~goNorth)
+    keep = col > 0
+    terrain[2 * row[keep] + 1, 2 * col[keep]] = rng.integers(10, 51, int(keep.sum()))
+
+    return terrain
+
+
+# Enemy presence: mostly zero, with hotspots around a few random centres fading out with distance.
+def makeEnemyHotspots(size: int, seed: int = 0) -> Map:
+
+    rng = np.random.default_rng(seed)
+    presence = np.zeros((size, size))
+
+    # Hotspots keep the size and density of those in enemy04 whatever the size of the map
+    for _ in range(max(size * size // 2000, 1)):
+        centreRow, centreCol = (int(value) for value in rng.integers(0, size, 2))
+        radius = rng.uniform(2, 10)
+        peak = rng.uniform(20, 60)
+
+        # Beyond four radii from the centre a hotspot rounds to no presence, so only the area around it is updated
+        reach = int(4 * radius) + 1
+        top, left = max(centreRow - reach, 0), max(centreCol - reach, 0)
+        rows, cols = np.ogrid[top:min(centreRow + reach, size), left:min(centreCol + reach, size)]
+        presence[rows, cols] += peak * np.exp(-((rows - centreRow) ** 2 + (cols - centreCol) ** 2) / (2 * radius ** 2))
+
+    return np.clip(presence.round(), 0, 100).astype(np.int64)
+
+
+
+TERRAIN_GENERATORS = {
+    "hills": makeHills,
+    "walls": makeWalls,
+    "maze": makeMaze,
+    "terraces": makeTerraces,
+}
+
+
+# Picks count (start, goal) queries between distinct locations within the terrain threshold.
+# The goal may still be unreachable from the start, which is part of what is being measured.
+def makeQueries(terrain: Map, threshold: int, count: int, seed: int = 0) -> list[tuple[Location, Location]]:
+
+    rng = np.random.default_rng(seed)
+    passable = np.flatnonzero(terrain <= threshold)
+    colSize = terrain.shape[1]
+
+    queries = []
+    for _ in range(count):
+        start, goal = rng.choice(passable, 2, replace=False)
+        queries.append((divmod(int(start), colSize), divmod(int(goal), colSize)))
+
+    return queries
+
+
+# Writes a map as text in the same layout as the files in resources/.
+def writeMap(file_name: str, values: Map, name: str) -> None:
+    np.savetxt(file_name, values, fmt="%d", header=name, comments="# ")
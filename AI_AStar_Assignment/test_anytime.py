@@ -0,0 +1,67 @@
+import pytest
+from anytime import AnytimeSearch, find_paths_anytime
+from heuristics import HEURISTICS
+from maps import read_map
+from methods import getGpathCost
+from pathfinding_task1 import find_shortest_path
+from synthetic import makeQueries, makeWalls
+
+
+@pytest.mark.parametrize("heuristic", ["manhattan", "alt"])
+def test_world_04_improves_to_lowest_cost(heuristic):
+    terrain_map = read_map("resources/terrain04.txt")
+    solutions = list(find_paths_anytime((20, 80), (80, 40), terrain_map, 500, HEURISTICS[heuristic]))
+
+    assert solutions[-1][0] == 24024 and solutions[-1][2] == 1.0
+    for (cost, path, bound), previous in zip(solutions, [None] + solutions):
+        assert 24024 <= cost <= 24024 * bound and 1.0 <= bound <= 3.0
+        assert path[0] == (20, 80) and path[-1] == (80, 40) and getGpathCost(path, terrain_map) == cost
+        if previous is not None:
+            assert cost <= previous[0] and bound <= previous[2] and (cost, bound) != previous[::2]
+
+
+def test_synthetic_lowest_cost():
+    terrain_map = makeWalls(64, 2)
+    for start, goal in makeQueries(terrain_map, 500, 10, 2):
+        expected, _ = find_shortest_path(start, goal, terrain_map, 500, HEURISTICS["alt"])
+        solutions = list(find_paths_anytime(start, goal, terrain_map, 500, HEURISTICS["alt"], weight=5, step=1))
+        if expected is None:
+            assert solutions == []
+        else:
+            assert solutions[-1][0] == expected and all(expected <= cost <= expected * bound
+                                                         for cost, _, bound in solutions)
+
+
+def test_resumes_after_deadline():
+    terrain_map = read_map("resources/terrain04.txt")
+    whole = AnytimeSearch((20, 80), (80, 40), terrain_map, 500, HEURISTICS["alt"])
+    expected = list(whole.solutions())
+
+    # No time at all each call, so every call only expands a few locations before stopping
+    search = AnytimeSearch((20, 80), (80, 40), terrain_map, 500, HEURISTICS["alt"])
+    solutions = []
+    calls = 0
+    while not search.done:
+        solutions += search.solutions(deadline_ms=0)
+        calls += 1
+
+    assert calls > 10 and solutions == expected and search.expansions == whole.expansions
+    assert list(search.solutions()) == [] and search.best == expected[-1]
+
+
+def test_caller_stops_early():
+    terrain_map = read_map("resources/terrain04.txt")
+    search = AnytimeSearch((20, 80), (80, 40), terrain_map, 500, HEURISTICS["alt"])
+    first = next(iter(search.solutions()))
+    assert search.best == first and not search.done
+
+    rest = list(search.solutions())
+    assert rest and rest[0][0] <= first[0] and rest[-1][0] == 24024
+
+
+def test_trivial_and_unreachable():
+    terrain_map = read_map("resources/terrain01.txt")
+    assert list(find_paths_anytime((3, 2), (3, 2), terrain_map, 50)) == [(0, [(3, 2)], 1.0)]
+    assert list(find_paths_anytime((3, 2), (0, 3), terrain_map, 1)) == []
+    with pytest.raises(ValueError):
+        AnytimeSearch((3, 2), (0, 3), terrain_map, 50, weight=0.5)
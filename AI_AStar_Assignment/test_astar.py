@@ -0,0 +1,49 @@
+import subprocess
+import sys
+import pytest
+from astar import main
+from events import get_sink, set_sink
+
+
+TASK1 = ["task1", "3,2", "0,3", "resources/terrain01.txt", "50"]
+TASK2 = ["task2", "4,1", "0,3", "resources/terrain03.txt", "50", "resources/enemy03.txt", "0.5"]
+
+
+# --quiet replaces the event sink for the rest of the process, as it does when the scripts run.
+@pytest.fixture(autouse=True)
+def restore_sink():
+    sink = get_sink()
+    yield
+    set_sink(sink)
+
+
+@pytest.mark.parametrize("arguments", [TASK1, TASK1 + ["--quiet"], TASK2, TASK2[:-1] + ["0.99", "--quiet"],
+                                       ["task1", "3,2", "0,3", "resources/terrain01.txt", "1"]])
+def test_tiny_output_matches_script(arguments, capsys):
+    assert main(arguments) == 0
+    tiny = capsys.readouterr().out
+    assert main(["--full"] + arguments) == 0
+    assert tiny == capsys.readouterr().out and tiny.count("\n") >= 1
+
+
+def test_tiny_path_imports_neither_numpy_nor_click():
+    check = ("import sys, astar; astar.main({!r}); "
+             "loaded = [name for name in ('numpy', 'click') if name in sys.modules]; sys.exit(str(loaded) if loaded else 0)")
+    for arguments in (TASK1, TASK2, ["--help"]):
+        result = subprocess.run([sys.executable, "-c", check.format(arguments + ["--quiet"] * (arguments != ["--help"]))],
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+
+def test_scripts_answer_the_rest(tmp_path, capsys):
+    assert main(["task1", "20,80", "80,40", "resources/terrain04.txt", "500", "--quiet", "--heuristic", "alt"]) == 0
+    assert "with cost 24024." in capsys.readouterr().out
+
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text('{"start": [3, 2], "goal": [0, 3]}\n')
+    assert main(["batch", str(queries), "resources/terrain01.txt", "50"]) == 0
+    assert '"cost": 80' in capsys.readouterr().out
+
+    assert main(["task1", "3,2", "0,3", "resources/terrain01.txt", "5000"]) == 2
+    assert main(["task1", "3;2", "0,3", "resources/terrain01.txt", "50"]) == 2
+    assert main(["nowhere"]) == 2
@@ -0,0 +1,38 @@
+from batch import find_shortest_paths_batch, find_shortest_safe_paths_batch, read_queries
+from maps import read_map
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+
+
+def test_world_04_shared_goal():
+    terrain_map = read_map("resources/terrain04.txt")
+    queries = [((20, 80), (80, 40)), ((0, 0), (80, 40)), ((99, 99), (80, 40)), ((50, 50), (80, 40)), ((80, 40), (80, 40))]
+    results = find_shortest_paths_batch(queries, terrain_map, 500)
+    assert results[0] == (24024, find_shortest_path((20, 80), (80, 40), terrain_map, 500)[1])
+    for (start, goal), (cost, path) in zip(queries, results):
+        assert cost == find_shortest_path(start, goal, terrain_map, 500)[0]
+        assert path[0] == start and path[-1] == goal
+    assert results[-1] == (0, [(80, 40)])
+
+
+def test_world_01_batch_impossible():
+    terrain_map = read_map("resources/terrain01.txt")
+    queries = [((3, 2), (0, 3))] * 4 + [((2, 1), (0, 3))]
+    results = find_shortest_paths_batch(queries, terrain_map, 50, shared_goal_queries=2)
+    assert results[:4] == [(80, [(3, 2), (3, 3), (2, 3), (1, 3), (0, 3)])] * 4
+    assert results[4] == (None, None)
+
+
+def test_world_03_safe_batch():
+    terrain_map = read_map("resources/terrain03.txt")
+    enemy_map = read_map("resources/enemy03.txt")
+    queries = [((4, 1), (0, 3)), ((0, 3), (4, 1))]
+    results = find_shortest_safe_paths_batch(queries, terrain_map, 50, enemy_map, 0.9)
+    assert results == [find_shortest_safe_path(start, goal, terrain_map, 50, enemy_map, 0.9) for start, goal in queries]
+
+
+def test_read_queries(tmp_path):
+    (tmp_path / "queries.jsonl").write_text('{"start": [3, 2], "goal": [0, 3]}\n\n{"start": [1, 1], "goal": [2, 2]}\n')
+    (tmp_path / "queries.csv").write_text("start_row,start_col,goal_row,goal_col\n3,2,0,3\n1,1,2,2\n")
+    assert read_queries(str(tmp_path / "queries.jsonl")) == [((3, 2), (0, 3)), ((1, 1), (2, 2))]
+    assert read_queries(str(tmp_path / "queries.csv")) == [((3, 2), (0, 3)), ((1, 1), (2, 2))]
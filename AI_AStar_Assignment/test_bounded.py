@@ -0,0 +1,47 @@
+import pytest
+from heuristics import HEURISTICS
+from maps import read_map
+from methods import getGpathCost
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+from synthetic import makeQueries, makeWalls
+
+
+@pytest.mark.parametrize("options, guaranteed, heuristic", [({"weight": 1.5}, 1.5, "manhattan"),
+                                                            ({"weight": 1.5}, 1.5, "alt"),
+                                                            ({"epsilon": 0.3}, 1.3, "alt")])
+def test_world_04_within_bound(options, guaranteed, heuristic):
+    terrain_map = read_map("resources/terrain04.txt")
+    cost, path, bound = find_shortest_path((20, 80), (80, 40), terrain_map, 500, HEURISTICS[heuristic], **options)
+    assert 1.0 <= bound <= guaranteed and 24024 <= cost <= 24024 * bound
+    assert path[0] == (20, 80) and path[-1] == (80, 40) and getGpathCost(path, terrain_map) == cost
+
+
+@pytest.mark.parametrize("options", [{"weight": 3}, {"epsilon": 1.0}])
+def test_synthetic_within_bound(options):
+    terrain_map = makeWalls(64, 5)
+    for start, goal in makeQueries(terrain_map, 500, 10, 5):
+        expected, _ = find_shortest_path(start, goal, terrain_map, 500, HEURISTICS["alt"])
+        cost, path, bound = find_shortest_path(start, goal, terrain_map, 500, HEURISTICS["alt"], **options)
+        if expected is None:
+            assert (cost, path, bound) == (None, None, None)
+        else:
+            assert expected <= cost <= expected * bound and getGpathCost(path, terrain_map) == cost
+
+
+def test_world_04_enemy_focal():
+    arguments = ((20, 80), (80, 40), read_map("resources/terrain04.txt"), 200, read_map("resources/enemy04.txt"), 0.5)
+    cost, prob, path, bound = find_shortest_safe_path(*arguments, HEURISTICS["alt"], epsilon=0.2)
+    assert 24836 <= cost <= 24836 * bound and bound <= 1.2 and prob >= 0.5
+    assert find_shortest_safe_path(*arguments, weight=1.2)[0] <= 24836 * 1.2
+
+
+def test_invalid_bounds():
+    terrain_map = read_map("resources/terrain01.txt")
+    with pytest.raises(ValueError):
+        find_shortest_path((3, 2), (0, 3), terrain_map, 50, weight=1.5, epsilon=0.5)
+    with pytest.raises(ValueError):
+        find_shortest_path((3, 2), (0, 3), terrain_map, 50, weight=0.5)
+    with pytest.raises(ValueError):
+        find_shortest_path((3, 2), (0, 3), terrain_map, 50, mode="bidirectional", epsilon=0.5)
+    assert find_shortest_path((3, 2), (0, 3), terrain_map, 50, epsilon=0.0) == (80, [(3, 2), (3, 3), (2, 3), (1, 3), (0, 3)], 1.0)
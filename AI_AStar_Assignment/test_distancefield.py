@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import pathfinding_task1
+from distancefield import (UNREACHABLE, build_distance_field, distance_field_file, findDistanceField,
+                           load_distance_field, save_distance_field)
+from events import ListSink, NullSink, using_sink
+from maps import read_map
+from pathfinding_task1 import find_shortest_path
+
+
+def test_world_04_distance_field():
+    terrain_map = read_map("resources/terrain04.txt")
+    field = build_distance_field(terrain_map, 500, (80, 40))
+    assert build_distance_field(terrain_map, 500, (80, 40)) is field
+    assert field.distances.shape == terrain_map.shape and field.distances[80, 40] == 0
+    assert field.distances[20, 80] == 24024 and field.predecessors[80, 40] == -1
+
+    cost, path = field.pathFrom((20, 80))
+    assert cost == 24024 and path[0] == (20, 80) and path[-1] == (80, 40)
+    for start in [(0, 0), (99, 99), (50, 50)]:
+        assert field.pathFrom(start)[0] == find_shortest_path(start, (80, 40), terrain_map, 500)[0]
+
+
+def test_world_01_unreachable():
+    terrain_map = read_map("resources/terrain01.txt")
+    field = build_distance_field(terrain_map, 50, (0, 3))
+    assert field.distances[2, 1] == UNREACHABLE and field.predecessors[2, 1] == -1
+    assert field.pathFrom((2, 1)) == (None, None)
+    assert field.pathFrom((3, 2)) == find_shortest_path((3, 2), (0, 3), terrain_map, 50)
+
+
+def test_world_03_save_and_load(tmp_path):
+    terrain_map = read_map("resources/terrain03.txt")
+    field = build_distance_field(terrain_map, 50, (0, 3))
+    file_name = distance_field_file(str(tmp_path / "terrain03.txt"), 50, (0, 3))
+    assert file_name.endswith("terrain03.txt.goal-0-3.t50.npz")
+    save_distance_field(field, file_name)
+
+    loaded = load_distance_field(file_name, read_map("resources/terrain03.txt"))
+    assert loaded.goal == (0, 3) and np.array_equal(loaded.distances, field.distances)
+    assert loaded.pathFrom((4, 1)) == field.pathFrom((4, 1))
+
+    terrain_map[0, 0] += 1
+    with pytest.raises(ValueError):
+        load_distance_field(file_name, terrain_map)
+
+
+def test_find_shortest_path_uses_kept_field(monkeypatch):
+    terrain_map = read_map("resources/terrain04.txt")
+    field = build_distance_field(terrain_map, 500, (80, 40))
+    with using_sink(NullSink()):
+        monkeypatch.setattr(pathfinding_task1, "getGrid", None)
+        assert find_shortest_path((20, 80), (80, 40), terrain_map, 500) == field.pathFrom((20, 80))
+        assert find_shortest_path((2, 1), (80, 40), terrain_map, 500) == field.pathFrom((2, 1))
+        monkeypatch.undo()
+
+        # Other goals and thresholds, and searches whose events are wanted, still search
+        assert find_shortest_path((20, 80), (80, 41), terrain_map, 500)[0] is not None
+        assert findDistanceField(terrain_map, 400, (80, 40)) is None
+    with using_sink(ListSink()) as events:
+        find_shortest_path((20, 80), (80, 40), terrain_map, 500)
+    assert events.events
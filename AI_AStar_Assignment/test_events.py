@@ -0,0 +1,31 @@
+from events import ListSink, NullSink, RingBufferSink, using_sink, log_visit_state, log_enqueue_state, log_ignore_state
+from maps import read_map
+from pathfinding_task1 import find_shortest_path
+
+
+def test_text_format(capsys):
+    log_enqueue_state((3, 2), 0)
+    log_visit_state((3, 2), 0)
+    log_ignore_state((2, 3), 40, 0.25)
+    assert capsys.readouterr().out.splitlines() == [
+        "+ ENQUEUED (3, 2) cost=0 success=1.0000",
+        "VISITED (3, 2) cost=0 success=1.0000",
+        "+ IGNORED (2, 3) cost=40 success=0.2500"]
+
+
+def test_world_01_sinks(capsys):
+    terrain_map = read_map("resources/terrain01.txt")
+    printed = find_shortest_path((3, 2), (0, 3), terrain_map, 50)
+    lines = capsys.readouterr().out.splitlines()
+
+    with using_sink(ListSink()) as sink:
+        assert find_shortest_path((3, 2), (0, 3), terrain_map, 50) == printed
+    assert sink.lines() == lines
+
+    with using_sink(RingBufferSink(capacity=4)) as sink:
+        assert find_shortest_path((3, 2), (0, 3), terrain_map, 50) == printed
+    assert sink.lines() == lines[-4:]
+
+    with using_sink(NullSink()):
+        assert find_shortest_path((3, 2), (0, 3), terrain_map, 50) == printed
+    assert capsys.readouterr().out == ""
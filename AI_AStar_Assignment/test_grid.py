@@ -0,0 +1,43 @@
+import pytest
+import grid
+from grid import frozenMap, getGrid, getMapKey
+from maps import read_map
+
+
+def test_world_01_moves():
+    grid = getGrid(read_map("resources/terrain01.txt"), 30)
+    # North of (3,2) is 90, above the threshold, so only the east and west moves remain.
+    assert [(grid.location(cell), cost) for cell, cost in grid.moves(grid.cell((3, 2)))] == [((3, 3), 20), ((3, 1), 30)]
+    assert grid.moves(grid.cell((2, 1))) == []
+
+
+def test_grid_cache():
+    terrain_map = read_map("resources/terrain01.txt")
+    assert getGrid(terrain_map, 50) is getGrid(read_map("resources/terrain01.txt"), 50)
+    terrain_map[(3, 2)] = 15
+    assert getGrid(terrain_map, 50) is not getGrid(read_map("resources/terrain01.txt"), 50)
+
+
+def test_frozen_map_hashed_once(monkeypatch):
+    terrain_map = read_map("resources/terrain01.txt")
+    key = getMapKey(terrain_map)
+
+    with frozenMap(terrain_map):
+        assert getMapKey(terrain_map) == key
+        monkeypatch.setattr(grid.hashlib, "blake2b", None)
+        assert getMapKey(terrain_map) == key and getGrid(terrain_map, 50) is getGrid(terrain_map, 50)
+        with pytest.raises(ValueError):
+            terrain_map[(3, 2)] = 15
+
+    monkeypatch.undo()
+    terrain_map[(3, 2)] = 15
+    assert getMapKey(terrain_map) != key
+
+
+def test_view_of_writeable_map_is_not_frozen():
+    terrain_map = read_map("resources/terrain01.txt")
+    view = terrain_map[:]
+    view.flags.writeable = False
+    key = getMapKey(view)
+    terrain_map[(3, 2)] = 15
+    assert getMapKey(view) != key
@@ -0,0 +1,35 @@
+import math
+import pytest
+from distancefield import buildDistanceField
+from grid import getGrid
+from heuristics import HEURISTICS
+from maps import read_map
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+
+
+@pytest.mark.parametrize("heuristic", HEURISTICS)
+def test_world_04_large_heuristics(heuristic):
+    terrain_map = read_map("resources/terrain04.txt")
+    cost, path = find_shortest_path((20, 80), (80, 40), terrain_map, 500, HEURISTICS[heuristic])
+    assert cost == 24024
+    assert path[0] == (20, 80) and path[-1] == (80, 40)
+
+
+@pytest.mark.parametrize("heuristic", HEURISTICS)
+def test_world_04_enemy_heuristics(heuristic):
+    terrain_map = read_map("resources/terrain04.txt")
+    enemy_map = read_map("resources/enemy04.txt")
+    cost, prob_success, path = find_shortest_safe_path((20, 80), (80, 40), terrain_map, 200, enemy_map, 0.5, HEURISTICS[heuristic])
+    assert cost == 24836
+    assert math.isclose(prob_success,0.51334208,rel_tol=1e-5)
+
+
+@pytest.mark.parametrize("heuristic", HEURISTICS)
+def test_world_04_admissible(heuristic):
+    grid = getGrid(read_map("resources/terrain04.txt"), 200)
+    field = buildDistanceField(grid, (80, 40))
+    estimate = HEURISTICS[heuristic](grid, (80, 40))
+    for cell, cost in enumerate(field.cost):
+        if cost >= 0:
+            assert estimate(grid.location(cell)) <= cost
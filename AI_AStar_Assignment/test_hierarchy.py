@@ -0,0 +1,84 @@
+import pytest
+import numpy as np
+from methods import getGpathCost
+from hierarchy import find_hierarchical_path
+from maps import read_map
+from pathfinding_task1 import find_shortest_path
+from synthetic import makeQueries, makeWalls
+
+
+@pytest.mark.parametrize("map_file, threshold, start, goal", [
+    ("resources/terrain01.txt", 50, (3, 2), (0, 3)),
+    ("resources/terrain03.txt", 50, (4, 1), (0, 3)),
+    ("resources/terrain04.txt", 500, (20, 80), (80, 40)),
+    ("resources/terrain05.txt", 300, (0, 0), (9, 9)),
+])
+def test_exact_mode_matches_flat_search(map_file, threshold, start, goal):
+    terrain_map = read_map(map_file)
+    expected, _ = find_shortest_path(start, goal, terrain_map, threshold)
+
+    for cluster_size in (2, 5, 16):
+        cost, path, bound = find_hierarchical_path(start, goal, terrain_map, threshold, "exact", cluster_size)
+        assert cost == expected and bound == 1.0
+        if path is not None:
+            assert path[0] == start and path[-1] == goal
+            assert getGpathCost(path, terrain_map) == cost
+
+
+def test_near_optimal_mode_is_within_its_bound():
+    terrain_map = makeWalls(70, 3)
+    for start, goal in makeQueries(terrain_map, 500, 8, 3):
+        expected, _ = find_shortest_path(start, goal, terrain_map, 500)
+        cost, path, bound = find_hierarchical_path(start, goal, terrain_map, 500, cluster_size=8)
+        if expected is None:
+            assert cost is None
+            continue
+
+        assert expected <= cost <= bound * expected
+        assert path[0] == start and path[-1] == goal
+        assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:]))
+        assert getGpathCost(path, terrain_map) == cost
+
+
+def test_start_is_goal_and_unreachable():
+    terrain_map = read_map("resources/terrain01.txt")
+    assert find_hierarchical_path((3, 2), (3, 2), terrain_map, 50) == (0, [(3, 2)], 1.0)
+    assert find_hierarchical_path((2, 1), (0, 3), terrain_map, 50, cluster_size=2) == (None, None, None)
+
+
+def test_zero_valued_locations():
+    terrain_map = np.array([[1, 0, 0, 1], [1, 0, 0, 1], [1, 1, 1, 1]])
+    for mode in ("exact", "near_optimal"):
+        for cluster_size in (2, 4):
+            cost, path, _ = find_hierarchical_path((2, 0), (0, 3), terrain_map, 10, mode, cluster_size)
+            assert cost == 4 and path[0] == (2, 0) and path[-1] == (0, 3)
+            assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:]))
+            assert getGpathCost(path, terrain_map) == cost
+
+    cost, path, bound = find_hierarchical_path((0, 0), (3, 3), np.zeros((4, 4), dtype=int), 10, "exact")
+    assert cost == 0 and len(path) == 7 and bound == 1.0
+
+
+def test_start_and_goal_on_one_entrance_segment():
+    assert find_hierarchical_path((1, 0), (1, 1), np.full((4, 4), 5), 10, cluster_size=2) == (10, [(1, 0), (1, 1)], 1.0)
+    assert find_hierarchical_path((1, 0), (1, 1), np.zeros((4, 4), dtype=int), 10, cluster_size=2) == \
+           (0, [(1, 0), (1, 1)], 1.0)
+
+
+def test_near_optimal_bound_is_finite_through_zero_valued_locations():
+    # The relaxed lower bound is 0 here, while the transitions force the first path found through costly locations
+    terrain_map = np.array([[15, 0, 0, 0, 0, 21, 0, 0], [0, 29, 0, 0, 5, 0, 0, 0], [0, 0, 0, 17, 0, 0, 1, 15],
+                            [20, 0, 0, 0, 24, 0, 0, 3], [20, 8, 8, 0, 0, 0, 0, 26], [25, 0, 0, 23, 0, 0, 0, 0],
+                            [11, 22, 10, 0, 21, 0, 0, 17], [12, 15, 0, 0, 0, 17, 13, 18]])
+    for cluster_size in (2, 3, 4):
+        cost, path, bound = find_hierarchical_path((0, 2), (5, 6), terrain_map, 25, cluster_size=cluster_size)
+        assert cost == 0 and bound == 1.0 and getGpathCost(path, terrain_map) == 0
+
+    rng = np.random.default_rng(0)
+    for _ in range(40):
+        terrain_map = np.where(rng.random((9, 9)) < 0.6, 0, rng.integers(1, 30, (9, 9)))
+        start, goal = (0, int(rng.integers(9))), (8, int(rng.integers(9)))
+        terrain_map[start] = terrain_map[goal] = 0
+        cost, path, bound = find_hierarchical_path(start, goal, terrain_map, 25, cluster_size=3)
+        if cost is not None:
+            assert bound < float("inf") and getGpathCost(path, terrain_map) == cost
@@ -0,0 +1,104 @@
+import numpy as np
+from grid import Grid
+from incremental import IncrementalPlanner, IncrementalSafePlanner
+from maps import read_map
+from methods import getGpathCost
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+
+
+def test_grid_set_value():
+    terrain_map = read_map("resources/terrain01.txt").astype(np.int64)
+    grid = Grid(terrain_map, 50)
+    grid.setValue((1, 2), 7)
+    terrain_map[1, 2] = 7
+    assert list(grid.neighbour) == list(Grid(terrain_map, 50).neighbour)
+    assert list(grid.moveCost) == list(Grid(terrain_map, 50).moveCost)
+
+
+def test_world_04_repairs_match_search_from_scratch():
+    rng = np.random.default_rng(0)
+    terrain_map = read_map("resources/terrain04.txt").astype(np.int64)
+    start, goal = (20, 80), (80, 40)
+    planner = IncrementalPlanner(start, goal, terrain_map, 500)
+    assert planner.find_path()[0] == 24024
+
+    for round in range(8):
+        changes = [((int(row), int(col)), int(value)) for row, col, value in
+                   zip(rng.integers(0, 100, 5), rng.integers(0, 100, 5), rng.integers(0, 700, 5))]
+        for location, value in changes:
+            terrain_map[location] = value
+        planner.update_terrain(changes)
+
+        # Every few rounds the agent takes a step along its path
+        if round % 4 == 3:
+            start = path[1]
+            planner.move_start(start)
+
+        cost, path = planner.find_path()
+        assert cost == find_shortest_path(start, goal, terrain_map, 500)[0]
+        assert path[0] == start and path[-1] == goal and getGpathCost(path, terrain_map) == cost
+
+
+def test_world_01_blocked_and_reopened():
+    terrain_map = read_map("resources/terrain01.txt")
+    planner = IncrementalPlanner((3, 2), (0, 3), terrain_map, 50)
+    assert planner.find_path() == (80, [(3, 2), (3, 3), (2, 3), (1, 3), (0, 3)])
+
+    blocked_map = terrain_map.copy()
+    blocked_map[1, 3] = 100
+    planner.update_terrain([((1, 3), 100)])
+    assert planner.find_path() == find_shortest_path((3, 2), (0, 3), blocked_map, 50)
+
+    planner.update_terrain([((1, 3), terrain_map[1, 3])])
+    assert planner.find_path()[0] == 80
+
+
+def test_zero_valued_locations():
+    terrain_map = np.array([[1, 0, 0, 1], [1, 0, 0, 1], [1, 1, 1, 1]])
+    planner = IncrementalPlanner((2, 0), (0, 3), terrain_map, 10)
+    cost, path = planner.find_path()
+    assert cost == find_shortest_path((2, 0), (0, 3), terrain_map, 10)[0] == 4
+    assert path[0] == (2, 0) and path[-1] == (0, 3) and getGpathCost(path, terrain_map) == cost
+
+    terrain_map[1, 1] = 5
+    planner.update_terrain([((1, 1), 5)])
+    cost, path = planner.find_path()
+    assert cost == find_shortest_path((2, 0), (0, 3), terrain_map, 10)[0]
+    assert path[-1] == (0, 3) and getGpathCost(path, terrain_map) == cost
+
+
+def test_goal_blocked_behind_zero_valued_locations():
+    planner = IncrementalPlanner((1, 0), (0, 0), np.array([[0], [0], [0]]), 9)
+    assert planner.find_path() == (0, [(1, 0), (0, 0)])
+    planner.update_terrain([((0, 0), 50)])
+    assert planner.find_path() == (None, None)
+
+    terrain_map = np.array([[0, 0, 0], [0, 0, 0], [50, 0, 50]])
+    planner = IncrementalPlanner((0, 0), (2, 1), terrain_map, 9)
+    assert planner.find_path()[0] == 0
+    planner.update_terrain([((1, 1), 50)])
+    assert planner.find_path() == (None, None)
+    planner.update_terrain([((1, 1), 0)])
+    assert planner.find_path()[0] == 0
+
+
+def test_world_04_enemy_reuses_unaffected_answers():
+    terrain_map = read_map("resources/terrain04.txt")
+    success_map = read_map("resources/enemy04.txt")
+    arguments = ((20, 80), (80, 40), terrain_map, 200, success_map, 0.5)
+    planner = IncrementalSafePlanner(*arguments)
+    cost, prob, path = planner.find_path()
+    assert (cost, prob) == find_shortest_safe_path(*arguments)[:2]
+
+    # More enemies off the path leave the answer as it was
+    offPath = next((row, col) for row in range(100) for col in range(100) if (row, col) not in path)
+    planner.update_success([(offPath, 100)])
+    assert planner.find_path()[:2] == (cost, prob) and planner.searches == 1
+
+    # More enemies on the path make it search again
+    planner.update_success([(path[len(path) // 2], 100)])
+    success_map = success_map.astype(np.int64)
+    success_map[offPath] = success_map[path[len(path) // 2]] = 100
+    assert planner.find_path()[:2] == find_shortest_safe_path(*arguments[:4], success_map, 0.5)[:2]
+    assert planner.searches == 2
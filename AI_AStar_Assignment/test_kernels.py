@@ -0,0 +1,110 @@
+import pytest
+import kernels
+from events import ListSink, using_sink
+from heuristics import HEURISTICS
+from maps import read_map
+from methods import TIE_BREAKS
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+
+
+WORLDS = ["01", "02", "03", "05"]
+
+
+# Without Numba the kernels are checked uncompiled, they run the same code either way
+@pytest.fixture
+def interpret(monkeypatch):
+    monkeypatch.setattr(kernels, "INTERPRET", True)
+
+
+def getLocations(terrain_map):
+    return [(row, col) for row in range(terrain_map.shape[0]) for col in range(terrain_map.shape[1])][::3]
+
+
+@pytest.mark.parametrize("world", WORLDS)
+@pytest.mark.parametrize("heuristic", ["manhattan", "scaled"])
+def test_paths_and_events_match(interpret, world, heuristic):
+    terrain_map = read_map(f"resources/terrain{world}.txt")
+    for start in getLocations(terrain_map):
+        for goal in getLocations(terrain_map)[::2]:
+            for threshold in (30, 1000):
+                with using_sink(ListSink()) as expected:
+                    path = find_shortest_path(start, goal, terrain_map, threshold, HEURISTICS[heuristic])
+                with using_sink(ListSink()) as events:
+                    assert find_shortest_path(start, goal, terrain_map, threshold, HEURISTICS[heuristic],
+                                              backend= "numba") == path
+                assert events.events == expected.events
+
+
+@pytest.mark.parametrize("world", ["01", "02", "03"])
+def test_safe_paths_and_events_match(interpret, world):
+    terrain_map = read_map(f"resources/terrain{world}.txt")
+    success_map = read_map(f"resources/enemy{world}.txt")
+    for start in getLocations(terrain_map):
+        for goal in getLocations(terrain_map)[::2]:
+            for threshold in (0.0, 0.5, 0.9):
+                with using_sink(ListSink()) as expected:
+                    path = find_shortest_safe_path(start, goal, terrain_map, 50, success_map, threshold)
+                with using_sink(ListSink()) as events:
+                    assert find_shortest_safe_path(start, goal, terrain_map, 50, success_map, threshold,
+                                                   backend= "numba") == path
+                assert events.events == expected.events
+
+
+def test_world_04_match(interpret):
+    terrain_map = read_map("resources/terrain04.txt")
+    success_map = read_map("resources/enemy04.txt")
+    assert find_shortest_path((20, 80), (80, 40), terrain_map, 500, backend= "numba")[0] == 24024
+    assert find_shortest_safe_path((20, 80), (80, 40), terrain_map, 200, success_map, 0.5, backend= "numba") == \
+           find_shortest_safe_path((20, 80), (80, 40), terrain_map, 200, success_map, 0.5)
+
+
+@pytest.mark.parametrize("tie_break", TIE_BREAKS)
+def test_tie_breaks_match(interpret, tie_break):
+    terrain_map = read_map("resources/terrain05.txt")
+    success_map = read_map("resources/enemy03.txt")
+    for start, goal in (((9, 3), (0, 8)), ((0, 0), (9, 9)), ((5, 5), (0, 2))):
+        with using_sink(ListSink()) as expected:
+            path = find_shortest_path(start, goal, terrain_map, 1000, HEURISTICS["scaled"], tie_break= tie_break)
+        with using_sink(ListSink()) as events:
+            assert find_shortest_path(start, goal, terrain_map, 1000, HEURISTICS["scaled"], backend= "numba",
+                                      tie_break= tie_break) == path
+        assert events.events == expected.events
+
+    terrain_map = read_map("resources/terrain03.txt")
+    with using_sink(ListSink()) as expected:
+        path = find_shortest_safe_path((4, 1), (0, 3), terrain_map, 50, success_map, 0.2, tie_break= tie_break)
+    with using_sink(ListSink()) as events:
+        assert find_shortest_safe_path((4, 1), (0, 3), terrain_map, 50, success_map, 0.2, backend= "numba",
+                                       tie_break= tie_break) == path
+    assert events.events == expected.events
+
+
+def test_falls_back(monkeypatch):
+    monkeypatch.setattr(kernels, "NUMBA_AVAILABLE", False)
+    terrain_map = read_map("resources/terrain01.txt")
+    assert not kernels.kernelsEnabled("numba")
+    assert find_shortest_path((3, 2), (0, 3), terrain_map, 50, backend= "numba") == \
+           find_shortest_path((3, 2), (0, 3), terrain_map, 50)
+    with pytest.raises(ValueError):
+        find_shortest_path((3, 2), (0, 3), terrain_map, 50, backend= "fortran")
+
+
+def test_unsupported_searches_fall_back(interpret):
+    terrain_map = read_map("resources/terrain04.txt")
+    assert kernels.runPathKernel(None, (20, 80), (80, 40), HEURISTICS["alt"], False) is None
+    for options in ({"weight": 2}, {"mode": "bidirectional"}, {"pruning": True}):
+        assert find_shortest_path((20, 80), (80, 40), terrain_map, 500, backend= "numba", **options) == \
+               find_shortest_path((20, 80), (80, 40), terrain_map, 500, **options)
+    assert find_shortest_path((20, 80), (80, 40), terrain_map, 500, HEURISTICS["alt"], backend= "numba") == \
+           find_shortest_path((20, 80), (80, 40), terrain_map, 500, HEURISTICS["alt"])
+
+
+def test_compiled():
+    pytest.importorskip("numba")
+    terrain_map = read_map("resources/terrain04.txt")
+    with using_sink(ListSink()) as expected:
+        path = find_shortest_path((20, 80), (80, 40), terrain_map, 500)
+    with using_sink(ListSink()) as events:
+        assert find_shortest_path((20, 80), (80, 40), terrain_map, 500, backend= "numba") == path
+    assert events.events == expected.events
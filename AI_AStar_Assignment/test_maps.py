@@ -0,0 +1,51 @@
+import os
+import shutil
+import numpy as np
+from maps import read_map
+from methods import getGpathCost, getMoveCost
+
+
+def test_world_04_cached(tmp_path):
+    file_name = str(tmp_path / "terrain04.txt")
+    shutil.copy("resources/terrain04.txt", file_name)
+    expected = np.loadtxt(file_name, dtype=int)
+
+    first = read_map(file_name)
+    assert os.path.exists(file_name + ".npy")
+    second = read_map(file_name)
+    assert first.dtype == second.dtype == np.int64
+    assert np.array_equal(first, expected) and np.array_equal(second, expected)
+
+    compact = read_map(file_name, dtype=None)
+    assert compact.dtype == np.uint16 and isinstance(compact, np.memmap)
+    assert np.array_equal(compact, expected)
+
+    # Changing a map read from the sidecar must not change the sidecar
+    second[(0, 0)] = 1
+    compact[(0, 1)] = 1
+    assert read_map(file_name)[(0, 0)] == expected[(0, 0)]
+    assert read_map(file_name, dtype=None)[(0, 1)] == expected[(0, 1)]
+
+
+def test_world_01_cache_invalidated(tmp_path):
+    file_name = str(tmp_path / "terrain01.txt")
+    shutil.copy("resources/terrain01.txt", file_name)
+    assert read_map(file_name)[(3, 2)] == 10
+
+    with open(file_name, "w") as file:
+        file.write("# terrain01 edited\n10 10\n300 10\n")
+    os.utime(file_name, ns=(0, os.stat(file_name).st_mtime_ns + 1))
+
+    edited = read_map(file_name)
+    assert edited.shape == (2, 2) and edited[(1, 0)] == 300
+
+
+def test_compact_values_do_not_overflow(tmp_path):
+    file_name = str(tmp_path / "high.txt")
+    with open(file_name, "w") as file:
+        file.write("200 200\n200 200\n")
+
+    terrain_map = read_map(file_name, dtype=None)
+    assert terrain_map.dtype == np.uint8
+    assert getMoveCost((0, 0), (0, 1), terrain_map) == 400
+    assert getGpathCost([(0, 0), (0, 1), (1, 1)], terrain_map) == 800
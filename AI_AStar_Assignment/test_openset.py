@@ -0,0 +1,49 @@
+from openset import FocalSet, OpenSet
+
+
+def test_pop_order():
+    frontier = OpenSet()
+    for key, priority in [("a", 5), ("b", 1), ("c", 3), ("d", 4), ("e", 2)]:
+        frontier.push(key, priority, key)
+    assert [frontier.pop()[0] for _ in range(len(frontier))] == ["b", "e", "c", "d", "a"]
+
+
+def test_decrease_key():
+    frontier = OpenSet()
+    frontier.push("a", 5, "first")
+    frontier.push("b", 3, "b")
+    assert frontier.push("a", 1, "second")
+    assert not frontier.push("a", 4, "third")
+    assert len(frontier) == 2
+    assert frontier.pop() == ("a", 1, "second")
+
+
+def test_remove():
+    frontier = OpenSet()
+    for key in range(10):
+        frontier.push(key, 10 - key, key)
+    frontier.remove(3)
+    frontier.remove(9)
+    assert 3 not in frontier
+    assert [frontier.pop()[0] for _ in range(len(frontier))] == [8, 7, 6, 5, 4, 2, 1, 0]
+
+
+def test_focal_set_prefers_secondary_within_bound():
+    # Items are (f, secondary) pairs, only those with f within 1.5 times the lowest f may be taken
+    frontier = FocalSet(1.5, lambda item: item[1])
+    for key, item in [("a", (10, 9)), ("b", (14, 1)), ("c", (16, 0)), ("d", (12, 5))]:
+        frontier.push(key, (item[0], key), item)
+
+    assert [frontier.pop()[0] for _ in range(2)] == ["b", "d"]
+    # The lowest f is still 10, so c (16) waits until a has been taken
+    assert frontier.pop()[0] == "a"
+    assert frontier.pop()[0] == "c" and len(frontier) == 0
+
+
+def test_focal_set_remove_and_decrease_key():
+    frontier = FocalSet(1.0, lambda item: item)
+    frontier.push("a", (5,), 5)
+    frontier.push("b", (7,), 7)
+    assert frontier.push("b", (5,), 4)
+    frontier.remove("a")
+    assert "a" not in frontier and frontier.pop() == ("b", (5,), 4)
@@ -0,0 +1,58 @@
+import parallel
+from concurrent.futures import ProcessPoolExecutor
+from events import ListSink, using_sink
+from maps import read_map
+from parallel import find_shortest_paths_parallel, iter_paths_parallel
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+
+
+def test_world_04_parallel():
+    terrain_map = read_map("resources/terrain04.txt")
+    queries = [((20, 80), (80, 40)), ((0, 0), (99, 99)), ((99, 0), (0, 99)), ((50, 50), (10, 10)), ((80, 40), (20, 80))]
+    results = find_shortest_paths_parallel(queries, terrain_map, 500, workers=2, chunk_size=2)
+    assert results == [find_shortest_path(start, goal, terrain_map, 500) for start, goal in queries]
+
+
+def test_world_03_enemy_parallel_unordered():
+    terrain_map = read_map("resources/terrain03.txt")
+    enemy_map = read_map("resources/enemy03.txt")
+    queries = [((4, 1), (0, 3)), ((0, 3), (4, 1)), ((2, 2), (4, 4))]
+    results = dict(iter_paths_parallel(queries, terrain_map, 50, enemy_map, 0.5, workers=2, chunk_size=1, ordered=False))
+    assert results == {index: find_shortest_safe_path(start, goal, terrain_map, 50, enemy_map, 0.5)
+                       for index, (start, goal) in enumerate(queries)}
+
+
+def test_world_01_events_forwarded():
+    terrain_map = read_map("resources/terrain01.txt")
+    queries = [((3, 2), (0, 3)), ((0, 3), (3, 2)), ((3, 0), (0, 0))]
+    with using_sink(ListSink()) as expected:
+        for start, goal in queries:
+            find_shortest_path(start, goal, terrain_map, 50)
+
+    with using_sink(ListSink()) as events:
+        list(iter_paths_parallel(queries, terrain_map, 50, workers=2, chunk_size=1, events=True))
+    assert events.events == expected.events
+
+    with using_sink(ListSink()) as events:
+        list(iter_paths_parallel(queries, terrain_map, 50, workers=2, chunk_size=1))
+    assert events.events == []
+
+
+def test_world_04_stopped_early(monkeypatch):
+    submitted = []
+
+    class Pool(ProcessPoolExecutor):
+        def submit(self, *args):
+            submitted.append(super().submit(*args))
+            return submitted[-1]
+
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", Pool)
+    terrain_map = read_map("resources/terrain04.txt")
+    queries = [((0, 0), (99, 99))] * 64
+    results = iter_paths_parallel(queries, terrain_map, 500, workers=1, chunk_size=1)
+    assert next(results)[0] == 0
+    results.close()
+
+    # The chunks not yet started when the caller stopped were dropped rather than searched
+    assert any(future.cancelled() for future in submitted)
@@ -0,0 +1,33 @@
+import math
+from maps import read_map
+from pareto import ParetoSet
+from safe_pathfinding_task2 import find_pareto_front, find_shortest_safe_path
+
+
+def test_pareto_set():
+    labels = ParetoSet()
+    assert labels.insert(10, 0.5, 0) == []
+    assert labels.insert(20, 0.8, 1) == []
+    assert labels.dominates(15, 0.5) and labels.dominates(20, 0.8) and labels.dominates(25, 0.6)
+    assert not labels.dominates(15, 0.6) and not labels.dominates(5, 0.1)
+    assert labels.insert(10, 0.9, 2) == [0, 1]
+    assert labels.costs == [10] and labels.probs == [0.9]
+
+
+def test_world_01_pareto_front():
+    terrain_map = read_map("resources/terrain01.txt")
+    enemy_map = read_map("resources/enemy01.txt")
+    front = find_pareto_front((3, 2), (0, 3), terrain_map, 50, enemy_map)
+    assert [(cost, prob) for cost, prob, _ in front] == [(80, 0.25), (240, 0.9), (300, 1.0)]
+    assert front[-1][2] == [(3,2),(3,1),(3,0),(2,0),(1,0),(1,1),(0,1),(0,2),(0,3)]
+    assert find_pareto_front((3, 2), (0, 3), terrain_map, 50, enemy_map, 0.5)[0][:2] == (240, 0.9)
+
+
+def test_world_04_pareto_front_matches_thresholds():
+    terrain_map = read_map("resources/terrain04.txt")
+    enemy_map = read_map("resources/enemy04.txt")
+    front = find_pareto_front((20, 80), (80, 40), terrain_map, 200, enemy_map, 0.4)
+    assert all(a[0] < b[0] and a[1] < b[1] for a, b in zip(front, front[1:]))
+    for cost, prob, path in front[::10]:
+        best = find_shortest_safe_path((20, 80), (80, 40), terrain_map, 200, enemy_map, prob)
+        assert best[0] == cost and math.isclose(best[1], prob)
@@ -1,5 +1,10 @@
+import numpy as np
+import pytest
+from heuristics import HEURISTICS
 from maps import read_map
+from methods import TIE_BREAKS, getGpathCost
 from pathfinding_task1 import find_shortest_path
+from stats import SearchStats
 
 def test_world_01():
     terrain_map = read_map("resources/terrain01.txt")
@@ -49,3 +54,59 @@ def test_world_05():
     assert cost == 615
     assert path == [ (9, 3), (8, 3), (8, 4), (7, 4), (7, 5), (6, 5), (6, 6), (5, 6), (5, 7), (5, 8), 
                      (4, 8), (3, 8), (2, 8), (1, 8), (0, 8) ]
+
+
+def test_bidirectional_matches_unidirectional():
+    queries = [("resources/terrain01.txt", (3, 2), (0, 3), 50), ("resources/terrain03.txt", (4, 1), (0, 3), 50),
+               ("resources/terrain03.txt", (4, 1), (0, 3), 28), ("resources/terrain04.txt", (20, 80), (80, 40), 500),
+               ("resources/terrain05.txt", (9, 3), (0, 8), 40), ("resources/terrain04.txt", (5, 5), (5, 5), 500)]
+
+    for file_name, start, goal, threshold in queries:
+        terrain_map = read_map(file_name)
+        cost, path = find_shortest_path(start, goal, terrain_map, threshold, mode="bidirectional")
+        assert cost == find_shortest_path(start, goal, terrain_map, threshold)[0]
+        if path is not None:
+            assert path[0] == start and path[-1] == goal and getGpathCost(path, terrain_map) == cost
+            assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:]))
+
+
+def test_world_04_bidirectional_expands_fewer():
+    terrain_map = read_map("resources/terrain04.txt")
+    unidirectional, bidirectional = SearchStats(), SearchStats()
+    find_shortest_path((20, 80), (80, 40), terrain_map, 500, stats=unidirectional)
+    find_shortest_path((20, 80), (80, 40), terrain_map, 500, stats=bidirectional, mode="bidirectional")
+    assert bidirectional.expansions < unidirectional.expansions
+
+
+@pytest.mark.parametrize("tie_break", TIE_BREAKS)
+def test_tie_breaks_keep_cost(tie_break):
+    queries = [("resources/terrain01.txt", (3, 2), (0, 3), 50), ("resources/terrain03.txt", (4, 1), (0, 3), 28),
+               ("resources/terrain04.txt", (20, 80), (80, 40), 500), ("resources/terrain05.txt", (9, 3), (0, 8), 40)]
+
+    for file_name, start, goal, threshold in queries:
+        terrain_map = read_map(file_name)
+        for heuristic in ("manhattan", "alt"):
+            cost, path = find_shortest_path(start, goal, terrain_map, threshold, HEURISTICS[heuristic],
+                                            tie_break=tie_break)
+            assert cost == find_shortest_path(start, goal, terrain_map, threshold)[0]
+            assert find_shortest_path(start, goal, terrain_map, threshold, HEURISTICS[heuristic],
+                                      tie_break=tie_break) == (cost, path)
+            if path is not None:
+                assert getGpathCost(path, terrain_map) == cost
+
+
+def test_deeper_tie_breaks_expand_fewer_on_plateaus():
+    terrain_map = np.ones((40, 40), dtype=np.int64)
+    expansions = {}
+    for tie_break in TIE_BREAKS:
+        stats = SearchStats()
+        assert find_shortest_path((2, 3), (35, 30), terrain_map, 10, HEURISTICS["scaled"], stats,
+                                  tie_break=tie_break)[0] == 120
+        expansions[tie_break] = stats.expansions
+    # Every location along one of the cheapest paths and no other, 60 moves from start to goal
+    assert expansions["high-g"] == expansions["low-h"] == 60 < expansions["default"]
+
+    with pytest.raises(ValueError):
+        find_shortest_path((2, 3), (35, 30), terrain_map, 10, tie_break="random")
+    with pytest.raises(ValueError):
+        find_shortest_path((2, 3), (35, 30), terrain_map, 10, mode="bidirectional", tie_break="high-g")
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from grid import getGrid
+from maps import read_map
+from methods import fillJumps, getGpathCost
+from pathfinding_task1 import find_shortest_path
+from regions import findRectangles, getRectangles
+from synthetic import makeQueries, makeTerraces
+
+
+def test_find_rectangles():
+    values = np.full((6, 7), 5)
+    values[:, 3] = 9
+    values[5, :] = 1
+    rectangles = findRectangles(values, values <= 5)
+    # Left of the column of 9s is a 5 by 3 rectangle, to its right only 3 columns but still 5 rows
+    assert rectangles == [(0, 0, 4, 2), (0, 4, 4, 6)]
+
+
+def test_jumps_skip_the_inside():
+    values = np.full((5, 5), 10)
+    rectangles = getRectangles(getGrid(values, 50))
+    inside = [rectangles.rectangle[row * 5 + col] for row in range(5) for col in range(5)]
+    assert inside.count(0) == 9
+    # (2, 0) jumps east straight across to (2, 4), four moves of 20
+    assert rectangles.neighbour[10 * 4 + 2] == 14 and rectangles.moveCost[10 * 4 + 2] == 80
+
+
+def test_fill_jumps():
+    assert fillJumps([(2, 0), (2, 3), (0, 3)]) == [(2, 0), (2, 1), (2, 2), (2, 3), (1, 3), (0, 3)]
+
+
+@pytest.mark.parametrize("map_file, threshold, start, goal", [
+    ("resources/terrain01.txt", 50, (3, 2), (0, 3)),
+    ("resources/terrain04.txt", 500, (20, 80), (80, 40)),
+    ("resources/terrain05.txt", 40, (9, 3), (0, 8)),
+])
+def test_pruning_keeps_the_cost(map_file, threshold, start, goal):
+    terrain_map = read_map(map_file)
+    cost, path = find_shortest_path(start, goal, terrain_map, threshold, pruning=True)
+    assert cost == find_shortest_path(start, goal, terrain_map, threshold)[0]
+    assert getGpathCost(path, terrain_map) == cost
+
+
+def test_terraces_pruning():
+    terrain_map = makeTerraces(64, 2)
+    # (30, 30) is inside a rectangle
+    for start, goal in makeQueries(terrain_map, 400, 10, 2) + [((30, 30), (33, 31))]:
+        cost, path = find_shortest_path(start, goal, terrain_map, 400, pruning=True)
+        assert cost == find_shortest_path(start, goal, terrain_map, 400)[0]
+        if path is not None:
+            assert path[0] == start and path[-1] == goal and getGpathCost(path, terrain_map) == cost
+            assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:]))
+
+
+def test_pruning_is_unidirectional_only():
+    with pytest.raises(ValueError):
+        find_shortest_path((3, 2), (0, 3), read_map("resources/terrain01.txt"), 50, mode="bidirectional", pruning=True)
@@ -0,0 +1,65 @@
+import numpy as np
+from maps import read_map
+from pathfinding_task1 import find_shortest_path
+from resultcache import ResultCache
+from safe_pathfinding_task2 import find_shortest_safe_path
+
+
+def test_world_04_subpaths():
+    terrain_map = read_map("resources/terrain04.txt")
+    cache = ResultCache()
+    cost, path = cache.find_shortest_path((20, 80), (80, 40), terrain_map, 500)
+    assert (cost, path) == find_shortest_path((20, 80), (80, 40), terrain_map, 500)
+
+    for first, last in [(0, len(path) - 1), (10, 60), (60, 10), (30, 30)]:
+        start, goal = path[first], path[last]
+        subcost, subpath = cache.find_shortest_path(start, goal, terrain_map, 500)
+        assert subcost == find_shortest_path(start, goal, terrain_map, 500)[0]
+        assert subpath[0] == start and subpath[-1] == goal and len(subpath) == abs(last - first) + 1
+
+    assert cache.cache_info()["hits"] == 4 and cache.cache_info()["subpath_hits"] == 3
+    assert cache.find_shortest_path((20, 80), (80, 40), terrain_map, 499) is not None
+    assert cache.cache_info()["misses"] == 2
+
+
+def test_world_01_eviction_and_edits():
+    terrain_map = read_map("resources/terrain01.txt")
+    cache = ResultCache(capacity=1)
+    assert cache.find_shortest_path((3, 2), (0, 3), terrain_map, 50)[0] == 80
+    assert cache.find_shortest_path((2, 1), (0, 3), terrain_map, 50) == (None, None)
+    assert cache.onPath[next(iter(cache.onPath))] == {}
+    assert cache.find_shortest_path((3, 3), (0, 3), terrain_map, 50)[0] == 60
+    assert cache.cache_info()["misses"] == 3
+
+    terrain_map[(0, 3)] = 15
+    assert cache.find_shortest_path((3, 3), (0, 3), terrain_map, 10) == (None, None)
+    assert cache.cache_info()["misses"] == 4
+
+
+def test_world_04_safe_paths_on_disk(tmp_path):
+    terrain_map = read_map("resources/terrain04.txt")
+    enemy_map = read_map("resources/enemy04.txt")
+    expected = find_shortest_safe_path((20, 80), (80, 40), terrain_map, 200, enemy_map, 0.5)
+
+    cache = ResultCache(file_name=str(tmp_path / "results.db"))
+    assert cache.find_shortest_safe_path((20, 80), (80, 40), terrain_map, 200, enemy_map, 0.5) == expected
+    cache.close()
+
+    cache = ResultCache(file_name=str(tmp_path / "results.db"))
+    assert cache.find_shortest_safe_path((20, 80), (80, 40), terrain_map, 200, enemy_map, 0.5) == expected
+    assert cache.cache_info()["disk_hits"] == 1 and cache.cache_info()["misses"] == 0
+    cache.close()
+
+
+def test_numpy_integers(tmp_path):
+    terrain_map = read_map("resources/terrain03.txt")
+    success_map = read_map("resources/enemy03.txt")
+    cache = ResultCache(file_name= str(tmp_path / "results.db"))
+
+    expected = find_shortest_path((4, 1), (0, 3), terrain_map, 50)
+    assert cache.find_shortest_path(tuple(np.array([4, 1])), (0, 3), terrain_map, np.int64(50)) == expected
+    assert cache.find_shortest_path((4, 1), (0, 3), terrain_map, 50) == expected and cache.hits == 1
+
+    expected = find_shortest_safe_path((4, 1), (0, 3), terrain_map, 50, success_map, 0.5)
+    assert cache.find_shortest_safe_path(np.array([4, 1]), (0, 3), terrain_map, np.int64(50), success_map,
+                                         np.float64(0.5)) == expected
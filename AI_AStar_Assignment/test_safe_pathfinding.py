@@ -1,6 +1,8 @@
 import math
+import pytest
+import methods
 from maps import read_map
-from safe_pathfinding_task2 import find_shortest_safe_path
+from safe_pathfinding_task2 import find_pareto_front, find_shortest_safe_path
 
 def test_world_01_enemy_a():
     terrain_map = read_map("resources/terrain01.txt")
@@ -71,3 +73,26 @@ def test_world_04_enemy():
                     (51,39),(52,39),(53,39),(53,38),(54,38),(55,38),(56,38),(57,38),(58,38),(59,38),(60,38),(61,38),
                     (62,38),(63,38),(64,38),(65,38),(66,38),(67,38),(68,38),(69,38),(70,38),(70,39),(70,40),(71,40),
                     (72,40),(73,40),(74,40),(75,40),(76,40),(77,40),(78,40),(79,40),(80,40)]
+
+def test_world_03_enemy_checked_costs(monkeypatch):
+    monkeypatch.setattr(methods, "CHECK_INCREMENTAL_COSTS", True)
+    terrain_map = read_map("resources/terrain03.txt")
+    enemy_map = read_map("resources/enemy03.txt")
+    cost, prob_success, path = find_shortest_safe_path((4, 1), (0, 3), terrain_map, 50, enemy_map, 0.5)
+    assert cost == 128
+    assert math.isclose(prob_success,0.648,rel_tol=1e-5)
+
+
+@pytest.mark.parametrize("tie_break", methods.TIE_BREAKS)
+def test_tie_breaks_keep_cost(tie_break):
+    for world, start, goal, threshold in (("02", (3, 3), (0, 3), 0.6), ("03", (4, 1), (0, 3), 0.5),
+                                          ("04", (20, 80), (80, 40), 0.5)):
+        terrain_map = read_map(f"resources/terrain{world}.txt")
+        enemy_map = read_map(f"resources/enemy{world}.txt")
+        expected = find_shortest_safe_path(start, goal, terrain_map, 200, enemy_map, threshold)
+        cost, prob_success, path = find_shortest_safe_path(start, goal, terrain_map, 200, enemy_map, threshold,
+                                                           tie_break=tie_break)
+        assert cost == expected[0] and prob_success >= threshold
+        assert [label[:2] for label in find_pareto_front(start, goal, terrain_map, 200, enemy_map, threshold,
+                                                         tie_break=tie_break)] == \
+               [label[:2] for label in find_pareto_front(start, goal, terrain_map, 200, enemy_map, threshold)]
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from heuristics import HEURISTICS
+from maps import read_map
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+from server import PathService, send_request
+
+
+MAPS = {"world01": read_map("resources/terrain01.txt"), "world03": read_map("resources/terrain03.txt"),
+        "enemy03": read_map("resources/enemy03.txt"), "world04": read_map("resources/terrain04.txt")}
+
+
+# Starts a service on a free local port, runs the requests coroutine against it and shuts it down again.
+# The searches run in threads unless processes are asked for, which are slower to start.
+def runService(requests, processes=False, unix=False):
+
+    async def run():
+        service = PathService(MAPS, [("world04", 500)], workers=1,
+                              executor=None if processes else ThreadPoolExecutor(2))
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "astar.sock") if unix else None
+            server = await service.start(port=0, path=path)
+            address = {"path": path} if unix else {"port": server.sockets[0].getsockname()[1]}
+            try:
+                async with server:
+                    return await requests(service, address)
+            finally:
+                service.close()
+
+    return asyncio.run(run())
+
+
+def test_concurrent_queries_match_searches():
+    queries = [((20, 80), (80, 40)), ((0, 0), (99, 99)), ((50, 50), (10, 90)), ((99, 0), (0, 99))] * 2
+
+    async def requests(service, address):
+        task1 = [send_request("POST", "/task1", {"map": "world04", "start": start, "goal": goal, "threshold": 500,
+                                                 "heuristic": "alt"}, **address) for start, goal in queries]
+        task2 = send_request("POST", "/task2", {"map": "world03", "success_map": "enemy03", "success_threshold": 0.5,
+                                                "start": [4, 1], "goal": [0, 3], "threshold": 50}, **address)
+        return await asyncio.gather(*task1, task2), service.metrics()
+
+    responses, metrics = runService(requests)
+    for (start, goal), (status, payload) in zip(queries, responses):
+        cost, path = find_shortest_path(start, goal, MAPS["world04"], 500, HEURISTICS["alt"])
+        assert status == 200 and payload["cost"] == cost
+        assert payload["path"][0] == list(start) and payload["path"][-1] == list(goal)
+
+    cost, prob, _ = find_shortest_safe_path((4, 1), (0, 3), MAPS["world03"], 50, MAPS["enemy03"], 0.5)
+    assert responses[-1] == (200, {"cost": cost, "success": prob, "path": responses[-1][1]["path"]})
+
+    assert metrics["endpoints"]["/task1"]["requests"] == len(queries) and metrics["in_flight"] == 0
+    latency = metrics["endpoints"]["/task1"]["latency_ms"]
+    assert 0 < latency["p50"] <= latency["p90"] <= latency["p99"]
+
+
+def test_worker_processes_over_unix_socket():
+    async def requests(service, address):
+        first = await send_request("POST", "/task1", {"map": "world01", "start": [3, 2], "goal": [0, 3],
+                                                      "threshold": 50}, **address)
+        return first, await send_request("GET", "/health", **address)
+
+    (status, payload), (healthStatus, health) = runService(requests, processes=True, unix=True)
+    assert status == 200 and payload["cost"] == find_shortest_path((3, 2), (0, 3), MAPS["world01"], 50)[0]
+    assert healthStatus == 200 and health["status"] == "ok" and health["maps"]["world04"] == [100, 100]
+
+
+def test_bad_requests():
+    async def requests(service, address):
+        bad = [("POST", "/task1", {"map": "nowhere", "start": [0, 0], "goal": [1, 1], "threshold": 50}),
+               ("POST", "/task1", {"map": "world01", "start": [0, 9], "goal": [1, 1], "threshold": 50}),
+               ("POST", "/task1", {"map": "world01", "start": [0, 0], "goal": [1, 1]}),
+               ("POST", "/task1", {"map": "world01", "start": [0, 0], "goal": [1, 1], "threshold": 50,
+                                   "heuristic": "psychic"}),
+               ("POST", "/task2", {"map": "world01", "success_map": "enemy03", "success_threshold": 0.5,
+                                   "start": [0, 0], "goal": [1, 1], "threshold": 50}),
+               ("POST", "/task1", {"map": "world01", "start": [0, 0], "goal": [1, 1], "threshold": 50.7}),
+               ("POST", "/task1", {"map": "world01", "start": [0, 0.5], "goal": [1, 1], "threshold": 50}),
+               ("POST", "/task1", {"map": "world01", "start": [0, 0], "goal": [1, 1], "threshold": "50"}),
+               ("GET", "/task1", None),
+               ("POST", "/nowhere", {})]
+        return [await send_request(*request, **address) for request in bad], service.metrics()
+
+    responses, metrics = runService(requests)
+    assert [status for status, _ in responses] == [400, 400, 400, 400, 400, 400, 400, 400, 405, 404]
+    assert all("error" in payload for _, payload in responses)
+    assert "whole number" in responses[5][1]["error"]
+    assert metrics["endpoints"]["/task1"]["errors"] == 8
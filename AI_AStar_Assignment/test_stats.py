@@ -0,0 +1,35 @@
+from events import ListSink, VISITED, using_sink
+from maps import read_map
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_pareto_front, find_shortest_safe_path
+from stats import SearchStats
+
+
+def test_world_04_task1_stats():
+    terrain_map = read_map("resources/terrain04.txt")
+    stats = SearchStats()
+    with using_sink(ListSink()) as sink:
+        result = find_shortest_path((50, 90), (50, 20), terrain_map, 500, stats= stats)
+    assert result == find_shortest_path((50, 90), (50, 20), terrain_map, 500)
+
+    visited = sum(1 for event in sink.events if event[0] == VISITED)
+    assert stats.pops == visited and stats.expansions == visited - 1
+    assert stats.generated == stats.pushes - 1 + stats.ignored
+    assert stats.stalePops == 0 and stats.removed == 0
+    assert 0 < stats.maxFrontier <= stats.pushes and stats.bytesAllocated > 0
+    assert stats.totalTime >= stats.setupTime + stats.neighbourTime + stats.frontierTime
+
+
+def test_world_04_task2_stats():
+    terrain_map = read_map("resources/terrain04.txt")
+    enemy_map = read_map("resources/enemy04.txt")
+    stats = SearchStats()
+    assert find_shortest_safe_path((50, 90), (50, 20), terrain_map, 500, enemy_map, 0.5, stats= stats) == \
+           find_shortest_safe_path((50, 90), (50, 20), terrain_map, 500, enemy_map, 0.5)
+    assert stats.generated == stats.pushes - 1 + stats.ignored
+    assert stats.as_dict()["expansions"] == stats.expansions > 0
+
+    stats = SearchStats()
+    front = find_pareto_front((3, 2), (0, 3), read_map("resources/terrain01.txt"), 50,
+                              read_map("resources/enemy01.txt"), stats= stats)
+    assert len(front) == 3 and stats.pops == stats.expansions + stats.stalePops + len(front)
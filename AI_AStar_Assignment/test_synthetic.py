@@ -0,0 +1,30 @@
+import numpy as np
+from heuristics import getComponents
+from grid import getGrid
+from pathfinding_task1 import find_shortest_path
+from synthetic import IMPASSABLE, TERRAIN_GENERATORS, makeEnemyHotspots, makeMaze, makeQueries
+
+
+def test_generators_are_seeded():
+    for generate in list(TERRAIN_GENERATORS.values()) + [makeEnemyHotspots]:
+        terrain = generate(50, 3)
+        assert terrain.shape == (50, 50)
+        assert np.array_equal(terrain, generate(50, 3))
+        assert not np.array_equal(terrain, generate(50, 4))
+
+
+def test_value_ranges():
+    assert TERRAIN_GENERATORS["hills"](64).min() >= 1 and TERRAIN_GENERATORS["hills"](64).max() <= 500
+    assert set(np.unique(TERRAIN_GENERATORS["walls"](64))) - set(range(10, 31)) <= {IMPASSABLE}
+    assert set(np.unique(TERRAIN_GENERATORS["terraces"](64))) <= {1, 101, 201, 301, 401}
+    enemy = makeEnemyHotspots(200)
+    assert enemy.min() == 0 and 0 < enemy.max() <= 100
+
+
+def test_maze_is_connected():
+    terrain = makeMaze(41, 1)
+    components = getComponents(getGrid(terrain, 500))
+    assert len({components[cell] for cell in np.flatnonzero(terrain <= 500)}) == 1
+
+    for start, goal in makeQueries(terrain, 500, 5, 1):
+        assert find_shortest_path(start, goal, terrain, 500)[1] is not None
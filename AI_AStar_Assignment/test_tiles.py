@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from events import ListSink, using_sink
+from heuristics import HEURISTICS
+from maps import read_map
+from openset import CostTable
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_pareto_front, find_shortest_safe_path
+from tiles import TiledMap, write_tiled_map
+
+
+@pytest.mark.parametrize("tile_size", [1, 3, 64])
+def test_values_match(tmp_path, tile_size):
+    terrain_map = read_map("resources/terrain05.txt")
+    write_tiled_map(terrain_map, str(tmp_path / "terrain05.tiles"), tile_size)
+
+    for tiled_map in (TiledMap("resources/terrain05.txt", tile_size, 2), TiledMap(str(tmp_path / "terrain05.tiles"))):
+        assert tiled_map.shape == terrain_map.shape and tiled_map.tileSize == tile_size
+        assert [[tiled_map[row, col] for col in range(10)] for row in range(10)] == terrain_map.tolist()
+        assert sum(block.size for block in tiled_map.blocks()) == 100
+
+
+def test_tile_cache():
+    tiled_map = TiledMap("resources/terrain05.txt", tile_size= 5, cache_tiles= 2)
+    tiled_map[0, 0], tiled_map[0, 1], tiled_map[0, 5], tiled_map[5, 0], tiled_map[0, 2]
+    assert tiled_map.tileStats() == {"hits": 1, "misses": 4, "evictions": 2, "cached": 2,
+                                     "bytes_read": 4 * 25 * tiled_map.dtype.itemsize}
+
+    tiled_map.resetStats()
+    tiled_map[5, 5]
+    assert tiled_map.tileStats()["misses"] == 1 and list(tiled_map.tiles) == [0, 3]
+
+
+def test_world_04_matches(tmp_path):
+    terrain_map = read_map("resources/terrain04.txt")
+    write_tiled_map(terrain_map, str(tmp_path / "terrain04.tiles"), 16)
+
+    with using_sink(ListSink()) as expected:
+        path = find_shortest_path((20, 80), (80, 40), terrain_map, 500)
+    for tiled_map in (TiledMap(str(tmp_path / "terrain04.tiles"), cache_tiles= 4), TiledMap("resources/terrain04.txt")):
+        with using_sink(ListSink()) as events:
+            assert find_shortest_path((20, 80), (80, 40), tiled_map, 500) == path
+        assert events.events == expected.events
+        assert tiled_map.tileStats()["misses"] > 0 and tiled_map.tileStats()["bytes_read"] > 0
+
+    tiled_map = TiledMap(str(tmp_path / "terrain04.tiles"))
+    assert find_shortest_path((20, 80), (80, 40), tiled_map, 500, HEURISTICS["scaled"]) == \
+           find_shortest_path((20, 80), (80, 40), terrain_map, 500, HEURISTICS["scaled"])
+    assert find_shortest_path((20, 80), (80, 40), tiled_map, 500, weight= 2)[0] <= 2 * path[0]
+
+
+def test_safe_paths_match(tmp_path):
+    terrain_map = read_map("resources/terrain03.txt")
+    success_map = read_map("resources/enemy03.txt")
+    write_tiled_map(success_map, str(tmp_path / "enemy03.tiles"), 2)
+    tiled_maps = (TiledMap("resources/terrain03.txt", 2, 1), TiledMap(str(tmp_path / "enemy03.tiles"), cache_tiles= 1))
+
+    for threshold in (0.0, 0.5, 0.9):
+        assert find_shortest_safe_path((4, 1), (0, 3), tiled_maps[0], 50, tiled_maps[1], threshold) == \
+               find_shortest_safe_path((4, 1), (0, 3), terrain_map, 50, success_map, threshold)
+    assert find_pareto_front((4, 1), (0, 3), tiled_maps[0], 50, tiled_maps[1]) == \
+           find_pareto_front((4, 1), (0, 3), terrain_map, 50, success_map)
+
+
+def test_sparse_cost_table():
+    table = CostTable(TiledMap("resources/terrain04.txt"))
+    table[(50, 50)] = 7
+    assert table[(50, 50)] == 7 and table[(3, 4)] == float("inf") and len(table.values) == 1
+
+
+def test_unsupported():
+    tiled_map = TiledMap("resources/terrain01.txt")
+    for options in ({"mode": "bidirectional"}, {"pruning": True}):
+        with pytest.raises(ValueError):
+            find_shortest_path((3, 2), (0, 3), tiled_map, 50, **options)
+    with pytest.raises(ValueError):
+        find_shortest_path((3, 2), (0, 3), tiled_map, 50, HEURISTICS["alt"])
+    with pytest.raises(ValueError):
+        TiledMap("resources/terrain01.txt", cache_tiles= 0)
+    with pytest.raises(ValueError):
+        TiledMap("resources/terrain01.txt.npy", tile_size= 0)
+
+
+def test_not_a_tiled_file(tmp_path):
+    (tmp_path / "bad.tiles").write_bytes(b"not tiles")
+    with pytest.raises(ValueError):
+        TiledMap(str(tmp_path / "bad.tiles"))
+
+
+def test_wide_values(tmp_path):
+    values = np.arange(-6, 6, dtype=">i8").reshape(3, 4)
+    write_tiled_map(values, str(tmp_path / "wide.tiles"), 2)
+    tiled_map = TiledMap(str(tmp_path / "wide.tiles"))
+    assert [[tiled_map[row, col] for col in range(4)] for row in range(3)] == values.tolist()
@@ -0,0 +1,61 @@
+import pytest
+from events import ListSink, using_sink
+from grid import Grid
+from maps import read_map
+from pathfinding_task1 import find_shortest_path
+from safe_pathfinding_task2 import find_shortest_safe_path
+from tiny import TinyGrid, find_tiny_path, find_tiny_safe_path, read_tiny_map
+
+
+WORLDS = ["01", "02", "03", "05"]
+
+
+@pytest.mark.parametrize("world", WORLDS)
+def test_grid_tables_match(world):
+    rows = read_tiny_map(f"resources/terrain{world}.txt")
+    assert rows == read_map(f"resources/terrain{world}.txt").tolist()
+    for threshold in (1, 50, 1000):
+        grid = TinyGrid(rows, threshold)
+        expected = Grid(read_map(f"resources/terrain{world}.txt"), threshold)
+        assert grid.neighbour == expected.neighbour and grid.moveCost == expected.moveCost
+
+
+@pytest.mark.parametrize("world", WORLDS)
+def test_paths_and_events_match(world):
+    terrain_map = read_map(f"resources/terrain{world}.txt")
+    rows = read_tiny_map(f"resources/terrain{world}.txt")
+    locations = [(row, col) for row in range(terrain_map.shape[0]) for col in range(terrain_map.shape[1])][::3]
+
+    for start in locations:
+        for goal in locations[::2]:
+            with using_sink(ListSink()) as expected:
+                result = find_shortest_path(start, goal, terrain_map, 50)
+            with using_sink(ListSink()) as events:
+                assert find_tiny_path(start, goal, rows, 50) == result
+            assert events.events == expected.events
+
+
+@pytest.mark.parametrize("world, start, goal, threshold", [("01", (3, 2), (0, 3), 1.0), ("01", (3, 2), (0, 3), 0.2),
+                                                            ("02", (3, 3), (0, 3), 0.6), ("03", (4, 1), (0, 3), 0.5),
+                                                            ("03", (0, 0), (4, 4), 0.0), ("03", (4, 1), (0, 3), 0.99)])
+def test_safe_paths_and_events_match(world, start, goal, threshold):
+    arguments = (start, goal, read_map(f"resources/terrain{world}.txt"), 50, read_map(f"resources/enemy{world}.txt"),
+                 threshold)
+    with using_sink(ListSink()) as expected:
+        result = find_shortest_safe_path(*arguments)
+    with using_sink(ListSink()) as events:
+        assert find_tiny_safe_path(start, goal, read_tiny_map(f"resources/terrain{world}.txt"), 50,
+                                   read_tiny_map(f"resources/enemy{world}.txt"), threshold) == result
+    assert events.events == expected.events
+
+
+def test_read_tiny_map_leaves_others(tmp_path):
+    assert read_tiny_map("resources/terrain04.txt") is None
+    assert read_tiny_map("resources/terrain01.txt.npy") is None
+    assert read_tiny_map(str(tmp_path / "missing.txt")) is None
+
+    (tmp_path / "ragged.txt").write_text("1 2 3\n4 5\n")
+    (tmp_path / "text.txt").write_text("1 2\nthree 4\n")
+    (tmp_path / "comments.txt").write_text("# a map\n1 2 # first row\n\n3 4\n")
+    assert read_tiny_map(str(tmp_path / "ragged.txt")) is None and read_tiny_map(str(tmp_path / "text.txt")) is None
+    assert read_tiny_map(str(tmp_path / "comments.txt")) == [[1, 2], [3, 4]]
@@ -0,0 +1,374 @@
+import json
+import os
+from array import array, typecodes
+from collections import OrderedDict
+import click
+import numpy as np
+from events import log, set_sink, NullSink
+from maps import Location, Map, read_map
+from parsing import validate_location
+
+from grid import DIRECTIONS
+
+
+# Maps too large to hold in memory, read a tile at a time.
+# A TiledMap stands in for the map given to the searches. It reads fixed-size square tiles of values
+# on demand, from a memory-mapped map (a .npy file, or the sidecar read_map makes of a text map)
+# or from a tiled file written by write_tiled_map, in which every tile is stored in one piece so
+# reading it is a single contiguous read. The most recently used tiles are kept in a cache of a
+# fixed number of tiles, so however large the map only that many tiles are ever held in memory.
+#
+# The searches are given one like any other map:
+#
+#   terrain_map = TiledMap("world.tiles", cache_tiles= 64)
+#   find_shortest_path(start, goal, terrain_map, terrain_threshold)
+#   terrain_map.tileStats()               # tile hits, misses and evictions, and bytes read from the file
+#
+# Nothing is precomputed for the whole map: getGrid gives a TiledGrid, which works out the moves out of
+# a location when they are asked for, getSafetyTable gives a TiledSafetyTable, CostTable (as for any map) only stores the
+# locations given a value, and Task 2 leaves out the survival bound (see pareto.getSurvivalBound).
+# Only the unidirectional search without pruning supports tiled maps, with any heuristic but alt.
+
+# The default width and height of a tile, and number of tiles kept in memory.
+TILE_SIZE = 64
+CACHE_TILES = 64
+
+# Tiled files start with this, then the length of a JSON header (4 bytes, little-endian) and the header.
+# The tiles follow from the next multiple of TILE_ALIGNMENT bytes, a row of tiles after another,
+# each tile a row of values after another. Tiles on the bottom and right edges are padded with zeros.
+TILES_SUFFIX = ".tiles"
+TILES_MAGIC = b"ASTARTILES"
+TILE_ALIGNMENT = 64
+
+
+class TiledMap:
+
+    # Marks maps read a tile at a time, which getGrid and getSafetyTable handle differently.
+    tiled = True
+
+    def __init__(self, file_name: str, tile_size: int = TILE_SIZE, cache_tiles: int = CACHE_TILES):
+        if cache_tiles < 1:
+            raise ValueError(f"The cache must hold at least 1 tile, not {cache_tiles}")
+
+        # Tiled files have their own tile size, anything else is read by read_map and cut into tiles of tile_size
+        if file_name.endswith(TILES_SUFFIX):
+            self.source, self.shape, self.tileSize = _openTiledFile(file_name)
+            self.chunked = True
+        else:
+            if tile_size < 1:
+                raise ValueError(f"Tiles must be at least 1 location wide, not {tile_size}")
+            # The compact sidecar itself, memory-mapped, so the map is never read into memory as a whole
+            self.source = read_map(file_name, dtype=None)
+            self.shape, self.tileSize = tuple(self.source.shape), tile_size
+            self.chunked = False
+
+        self.fileName = file_name
+        self.dtype = self.source.dtype
+        self.tileRows = -(-self.shape[0] // self.tileSize)
+        self.tileCols = -(-self.shape[1] // self.tileSize)
+        self.cacheTiles = cache_tiles
+
+        # Tiles are Python arrays of the map's own type, as a value is read one at a time
+        self.typecode = _getTypecode(self.dtype)
+
+        # The cached tiles by tile number (tileRow * tileCols + tileCol), least recently used first,
+        # and the last tile read, which most reads are from.
+        self.tiles = OrderedDict()
+        self.lastIndex = -1
+        self.lastTile = None
+        self.grids = {}
+        self.resetStats()
+
+
+    def resetStats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytesRead = 0
+
+
+    # The tile counters, and how many bytes of tiles have been read from the file.
+    def tileStats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "bytes_read": self.bytesRead, "cached": len(self.tiles)}
+
+
+    def __getitem__(self, location: Location) -> int:
+        return self.value(location[0], location[1])
+
+
+    def value(self, row: int, col: int) -> int:
+        size = self.tileSize
+        index = (row // size) * self.tileCols + col // size
+
+        if index == self.lastIndex:
+            self.hits += 1
+            tile = self.lastTile
+        else:
+            tile = self.getTile(index)
+
+        return tile[(row % size) * size + col % size]
+
+
+    # Returns a tile from the cache, reading it from the file (and dropping the least recently used one) if needed.
+    def getTile(self, index: int) -> array:
+
+        tiles = self.tiles
+        tile = tiles.get(index)
+        if tile is not None:
+            tiles.move_to_end(index)
+            self.hits += 1
+        else:
+            tile = self.readTile(index)
+            self.misses += 1
+            tiles[index] = tile
+            if len(tiles) > self.cacheTiles:
+                tiles.popitem(last=False)
+                self.evictions += 1
+
+        self.lastIndex = index
+        self.lastTile = tile
+        return tile
+
+
+    # Reads a tile from the file as tileSize * tileSize values, padded with zeros past the edges of the map.
+    def readTile(self, index: int) -> array:
+
+        tileRow, tileCol = divmod(index, self.tileCols)
+        if self.chunked:
+            block = np.array(self.source[tileRow, tileCol])
+        else:
+            size = self.tileSize
+            window = self.source[tileRow * size:(tileRow + 1) * size, tileCol * size:(tileCol + 1) * size]
+            block = np.zeros((size, size), dtype=self.dtype)
+            block[:window.shape[0], :window.shape[1]] = window
+
+        self.bytesRead += block.nbytes
+        if self.typecode is None:
+            return array("q", block.astype(np.int64).tobytes())
+        return array(self.typecode, block.tobytes())
+
+
+    # Yields the values of every tile in turn as an ndarray, without the padding, for a single pass over
+    # the whole map. They are read straight from the file and never cached, so the cache is left as it was.
+    def blocks(self):
+
+        size = self.tileSize
+        for tileRow in range(self.tileRows):
+            for tileCol in range(self.tileCols):
+                rowSize = min(size, self.shape[0] - tileRow * size)
+                colSize = min(size, self.shape[1] - tileCol * size)
+                if self.chunked:
+                    block = np.array(self.source[tileRow, tileCol])[:rowSize, :colSize]
+                    self.bytesRead += size * size * self.dtype.itemsize
+                else:
+                    block = np.array(self.source[tileRow * size:tileRow * size + rowSize,
+                                                 tileCol * size:tileCol * size + colSize])
+                    self.bytesRead += block.nbytes
+                yield block
+
+
+    def makeGrid(self, threshold) -> "TiledGrid":
+        if threshold not in self.grids:
+            self.grids[threshold] = TiledGrid(self, threshold)
+        return self.grids[threshold]
+
+
+    def makeSafetyTable(self) -> "TiledSafetyTable":
+        return TiledSafetyTable(self)
+
+
+
+# The search graph of a tiled map for one terrain threshold, used like grid.Grid.
+# Instead of tables precomputed for every location, the moves out of a location are worked out from
+# the values of it and its neighbours each time they are asked for, in the same order as grid.Grid.
+class TiledGrid:
+
+    tiled = True
+
+    __slots__ = ("rowSize", "colSize", "threshold", "values", "derived")
+
+    def __init__(self, map: TiledMap, threshold):
+        self.values = map
+        self.rowSize, self.colSize = map.shape
+        self.threshold = threshold
+
+        # Further data worked out from the grid, as grid.Grid.derived.
+        self.derived = {}
+
+
+    def cell(self, location: Location) -> int:
+        return location[0] * self.colSize + location[1]
+
+
+    def location(self, cell: int) -> Location:
+        return divmod(cell, self.colSize)
+
+
+    # Returns (neighbour cell, move cost) for every possible move out of a cell.
+    def moves(self, cell: int):
+
+        row, col = divmod(cell, self.colSize)
+        value = self.values.value(row, col)
+        if value > self.threshold:
+            return []
+
+        moves = []
+        for rowStep, colStep in DIRECTIONS:
+            otherRow, otherCol = row + rowStep, col + colStep
+            if 0 <= otherRow < self.rowSize and 0 <= otherCol < self.colSize:
+                other = self.values.value(otherRow, otherCol)
+                if other <= self.threshold:
+                    moves.append((otherRow * self.colSize + otherCol, value + other))
+
+        return moves
+
+
+    # Twice the lowest passable value (see heuristics.getCheapestMove), found in a single pass over the map.
+    def cheapestMove(self) -> int:
+
+        if "cheapestMove" not in self.derived:
+            lowest = None
+            for block in self.values.blocks():
+                passable = block[block <= self.threshold]
+                if passable.size:
+                    lowest = int(passable.min()) if lowest is None else min(lowest, int(passable.min()))
+            self.derived["cheapestMove"] = 0 if lowest is None else 2 * max(lowest, 0)
+
+        return self.derived["cheapestMove"]
+
+
+
+# For question 2, the probability of passing through each cell safely, as grid.getSafetyTable
+# but read from the tiles of a success map when asked for.
+class TiledSafetyTable:
+
+    __slots__ = ("map", "colSize")
+
+    def __init__(self, map: TiledMap):
+        self.map = map
+        self.colSize = map.shape[1]
+
+
+    def __getitem__(self, cell: int) -> float:
+        row, col = divmod(cell, self.colSize)
+        return 1 - self.map.value(row, col) / 100
+
+
+
+# The type code of a Python array holding values of a NumPy type as they are, or None if there isn't one.
+def _getTypecode(dtype) -> "str | None":
+    if dtype.kind in "iu" and dtype.isnative and dtype.char in typecodes and array(dtype.char).itemsize == dtype.itemsize:
+        return dtype.char
+    return None
+
+
+# Opens a tiled file, returning its tiles memory-mapped as (tile rows, tile columns, size, size),
+# the shape of the map and the tile size.
+def _openTiledFile(file_name: str):
+
+    with open(file_name, "rb") as file:
+        if file.read(len(TILES_MAGIC)) != TILES_MAGIC:
+            raise ValueError(f"{file_name} is not a tiled map")
+        length = int.from_bytes(file.read(4), "little")
+        header = json.loads(file.read(length))
+
+    shape = tuple(header["shape"])
+    size = header["tile_size"]
+    offset = _getDataOffset(length)
+    tiles = np.memmap(file_name, dtype=np.dtype(header["dtype"]), mode="r", offset=offset,
+                      shape=(-(-shape[0] // size), -(-shape[1] // size), size, size))
+    return tiles, shape, size
+
+
+def _getDataOffset(headerLength: int) -> int:
+    return -(-(len(TILES_MAGIC) + 4 + headerLength) // TILE_ALIGNMENT) * TILE_ALIGNMENT
+
+
+
+def write_tiled_map(map: Map, file_name: str, tile_size: int = TILE_SIZE) -> None:
+    """Writes a map to a tiled file for TiledMap, with each tile of tile_size * tile_size values stored in one piece.
+       The map is read a row of tiles at a time, so a memory-mapped map (see read_map) never has to fit in memory."""
+
+    if tile_size < 1:
+        raise ValueError(f"Tiles must be at least 1 location wide, not {tile_size}")
+    rowSize, colSize = map.shape
+    dtype = np.dtype(map.dtype).newbyteorder("=")
+
+    header = json.dumps({"shape": [rowSize, colSize], "tile_size": tile_size, "dtype": dtype.str}).encode()
+    offset = _getDataOffset(len(header))
+
+    # Written under a temporary name and moved into place, as maps.py does for its sidecars
+    temporary_name = f"{file_name}.{os.getpid()}.tmp"
+    with open(temporary_name, "wb") as file:
+        file.write(TILES_MAGIC + len(header).to_bytes(4, "little") + header)
+        file.write(bytes(offset - file.tell()))
+
+        for top in range(0, rowSize, tile_size):
+            band = np.asarray(map[top:top + tile_size], dtype=dtype)
+            for left in range(0, colSize, tile_size):
+                block = np.zeros((tile_size, tile_size), dtype=dtype)
+                window = band[:, left:left + tile_size]
+                block[:window.shape[0], :window.shape[1]] = window
+                file.write(block.tobytes())
+
+    os.replace(temporary_name, file_name)
+
+
+
+@click.group()
+def main() -> None:
+    """Tiled maps, for maps too large to hold in memory."""
+
+
+@main.command()
+@click.argument("map_file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("tiled_file", type=click.Path(dir_okay=False, writable=True))
+@click.option("--tile-size", type=click.IntRange(min=1), default=TILE_SIZE, show_default=True)
+def convert(map_file: str, tiled_file: str, tile_size: int) -> None:
+    """Writes a map (text or .npy) to a tiled file.
+
+    \b
+    python tiles.py convert resources/terrain04.txt terrain04.tiles --tile-size 32
+    """
+    write_tiled_map(read_map(map_file, dtype=None), tiled_file, tile_size)
+
+
+@main.command(no_args_is_help=True)
+@click.argument('start', required=True, callback=validate_location)
+@click.argument('goal', required=True, callback=validate_location)
+@click.argument("terrain_map", required=True, type=click.Path(exists=True, dir_okay=False))
+@click.argument("terrain_threshold", required=True, type=click.IntRange(min=0,max=1000))
+@click.option("--success-map", type=click.Path(exists=True, dir_okay=False), help="Find a safe path (Task 2).")
+@click.option("--success-threshold", type=click.FloatRange(min=0.0,max=1.0), default=0.0, show_default=True)
+@click.option("--tile-size", type=click.IntRange(min=1), default=TILE_SIZE, show_default=True,
+              help="For maps that are not tiled files.")
+@click.option("--cache-tiles", type=click.IntRange(min=1), default=CACHE_TILES, show_default=True)
+def search(start: Location, goal: Location, terrain_map: str, terrain_threshold: int, success_map,
+           success_threshold: float, tile_size: int, cache_tiles: int) -> None:
+    """Finds a path on tiled maps and reports the tiles read for each map.
+
+    \b
+    python tiles.py search 20,80 80,40 terrain04.tiles 500 --cache-tiles 8
+    """
+    from pathfinding_task1 import find_shortest_path
+    from safe_pathfinding_task2 import find_shortest_safe_path
+    set_sink(NullSink())
+
+    maps = {"terrain": TiledMap(terrain_map, tile_size, cache_tiles)}
+    if success_map is None:
+        path = find_shortest_path(start, goal, maps["terrain"], terrain_threshold)
+        log(f"The path is {path[1]} with cost {path[0]}.")
+    else:
+        maps["success"] = TiledMap(success_map, tile_size, cache_tiles)
+        path = find_shortest_safe_path(start, goal, maps["terrain"], terrain_threshold, maps["success"],
+                                       success_threshold)
+        log(f"The path is {path[2]} with cost {path[0]} and success probability {path[1]}")
+
+    for name, map in maps.items():
+        stats = map.tileStats()
+        log(f"{name} map: {stats['hits']} tile hits, {stats['misses']} misses, {stats['evictions']} evictions, "
+            f"{stats['bytes_read']} bytes read.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+import os
+from array import array
+from typing import Optional
+from events import log_enqueue_state, log_ignore_state, log_visit_state, logging_enabled
+from maps import CACHE_SUFFIX, Location
+
+from methods import calculateManhattanDistance, getFtotalCost, getNeighbours, getParents, getQ2Neighbours
+from nodepool import NodePool
+from openset import OpenSet
+from pareto import ParetoSet, canSucceed, getSurvivalBound
+
+
+# Pure-Python searches for tiny maps, which never import NumPy (or click).
+# A single query on a tiny map takes far less time than importing NumPy, so when a CLI is run once per
+# query (see astar.py) it is startup that dominates. These searches read text maps with plain Python,
+# build the same neighbour and move cost tables as grid.Grid without NumPy, and then search exactly as
+# find_shortest_path and find_shortest_safe_path do by default (the manhattan heuristic, unidirectional,
+# no bounds), with the same node pool, frontier, Pareto sets and events, so results and events match.
+
+# Maps with more locations than this, or text files larger than this many bytes, are left to NumPy.
+TINY_MAP_CELLS = 1024
+TINY_MAP_BYTES = 32768
+
+# The four directions a move can take, in the order children are generated (as grid.DIRECTIONS).
+DIRECTIONS = ((-1, 0), (1, 0), (0, 1), (0, -1))
+
+
+# The search graph of a tiny map, laid out and used exactly like grid.Grid.
+class TinyGrid:
+
+    __slots__ = ("rowSize", "colSize", "threshold", "values", "neighbour", "moveCost")
+
+    def __init__(self, rows: list[list[int]], threshold):
+        self.rowSize, self.colSize = len(rows), len(rows[0]) if rows else 0
+        self.threshold = threshold
+        self.values = [value for row in rows for value in row]
+
+        self.neighbour = array("i", [-1]) * (self.rowSize * self.colSize * 4)
+        self.moveCost = array("q", [0]) * (self.rowSize * self.colSize * 4)
+
+        for cell, value in enumerate(self.values):
+            row, col = divmod(cell, self.colSize)
+            for direction, (rowStep, colStep) in enumerate(DIRECTIONS):
+                if not (0 <= row + rowStep < self.rowSize and 0 <= col + colStep < self.colSize):
+                    continue
+
+                target = cell + rowStep * self.colSize + colStep
+                if value <= threshold and self.values[target] <= threshold:
+                    self.neighbour[cell * 4 + direction] = target
+                self.moveCost[cell * 4 + direction] = value + self.values[target]
+
+
+    def cell(self, location: Location) -> int:
+        return location[0] * self.colSize + location[1]
+
+
+    def location(self, cell: int) -> Location:
+        return divmod(cell, self.colSize)
+
+
+    def moves(self, cell: int):
+        neighbour = self.neighbour
+        moveCost = self.moveCost
+        return [(neighbour[index], moveCost[index]) for index in range(cell * 4, cell * 4 + 4) if neighbour[index] >= 0]
+
+
+
+# Reads a text map if it is tiny, as read_map would but into lists of rows.
+# Returns None for anything else (a .npy file, a larger map, or a file read_map would reject),
+# which is then left to read_map.
+def read_tiny_map(file_name: str) -> Optional[list[list[int]]]:
+
+    if file_name.endswith(CACHE_SUFFIX):
+        return None
+    try:
+        if os.path.getsize(file_name) > TINY_MAP_BYTES:
+            return None
+        with open(file_name) as file:
+            rows = [[int(value) for value in line.split("#", 1)[0].split()] for line in file]
+    except (OSError, ValueError):
+        return None
+
+    rows = [row for row in rows if row]
+    if not rows or any(len(row) != len(rows[0]) for row in rows) or len(rows) * len(rows[0]) > TINY_MAP_CELLS:
+        return None
+
+    return rows
+
+
+
+def find_tiny_path(start: Location, goal: Location, terrain_map: list[list[int]], terrain_threshold: int) \
+                   -> tuple[Optional[int],Optional[list[Location]]]:
+    """Finds the path with lowest total cost (Task 1) on a map read by read_tiny_map, as find_shortest_path would.
+       Returns (cost,list(locations)) when a path is found, (None,None) if no path is found."""
+
+    logEvents = logging_enabled()
+    grid = TinyGrid(terrain_map, terrain_threshold)
+    estimate = lambda location: calculateManhattanDistance(location, goal)
+
+    pool = NodePool()
+    frontier = OpenSet()
+    bestCost = [float("inf")] * (grid.rowSize * grid.colSize)
+
+    startNode = pool.add(start, g= 0, h= estimate(start))
+    tieBreak = 0
+    frontier.push(start, (getFtotalCost(g= 0, h= pool.h[startNode]), tieBreak), startNode)
+    bestCost[grid.cell(start)] = 0
+    if logEvents:
+        log_enqueue_state(start, 0)
+
+    while len(frontier) > 0:
+
+        location, _, currentNode = frontier.pop()
+        if logEvents:
+            log_visit_state(location, pool.g[currentNode])
+
+        if location == goal:
+            pathList = getParents(pool, currentNode, [])
+            pathList.reverse()
+            return pool.g[currentNode], pathList
+
+        for childLocation, g, h in getNeighbours(pool, currentNode, estimate, grid):
+
+            childCell = grid.cell(childLocation)
+            if g >= bestCost[childCell]:
+                if logEvents:
+                    log_ignore_state(childLocation, g)
+                continue
+
+            child = pool.add(childLocation, g, h, parent= currentNode)
+            tieBreak += 1
+            frontier.push(childLocation, (getFtotalCost(g= g, h= h), tieBreak), child)
+            bestCost[childCell] = g
+            if logEvents:
+                log_enqueue_state(childLocation, g)
+
+    return None, None
+
+
+
+def find_tiny_safe_path(start: Location, goal: Location, terrain_map: list[list[int]], terrain_threshold: int,
+                        success_map: list[list[int]], success_threshold: float) \
+                        -> tuple[Optional[int],Optional[float],Optional[list[Location]]]:
+    """Finds the path with lowest total cost that also satisfies the minimum success probability threshold (Task 2)
+       on maps read by read_tiny_map, as find_shortest_safe_path would.
+       Returns (cost,prob_success,list(locations)) when a path is found, (None,None,None) if no path is found."""
+
+    logEvents = logging_enabled()
+    grid = TinyGrid(terrain_map, terrain_threshold)
+    safety = array("d", [1 - value / 100 for row in success_map for value in row])
+    estimate = lambda location: calculateManhattanDistance(location, goal)
+    survivalBound = getSurvivalBound(grid, safety, goal)
+
+    pool = NodePool()
+    frontier = OpenSet()
+    labels = {}
+
+    startCell = grid.cell(start)
+    startProb = safety[startCell]
+    if not canSucceed(startProb, survivalBound[startCell], success_threshold):
+        return None, None, None
+
+    startNode = pool.add(start, g= 0, h= estimate(start), prob= startProb)
+    labels[start] = ParetoSet()
+    labels[start].insert(0, startProb, startNode)
+    frontier.push(startNode, (getFtotalCost(g= 0, h= pool.h[startNode]), (1 - startProb), start, startNode), startNode)
+    if logEvents:
+        log_enqueue_state(start, 0, startProb)
+
+    while len(frontier) > 0:
+
+        currentNode, priority, _ = frontier.pop()
+        location = priority[2]
+        g = pool.g[currentNode]
+        prob = pool.prob[currentNode]
+
+        if location == goal:
+            pathList = getParents(pool, currentNode, [])
+            pathList.reverse()
+            return g, prob, pathList
+
+        if logEvents:
+            log_visit_state(location, g, prob)
+
+        for childLocation, childG, childH, childProb in getQ2Neighbours(pool, currentNode, estimate, grid, safety):
+
+            sameLocation = labels.get(childLocation)
+            if sameLocation is None:
+                sameLocation = labels[childLocation] = ParetoSet()
+
+            if not canSucceed(childProb, survivalBound[grid.cell(childLocation)], success_threshold) \
+               or sameLocation.dominates(childG, childProb):
+                if logEvents:
+                    log_ignore_state(childLocation, childG, childProb)
+                continue
+
+            child = pool.add(childLocation, childG, childH, childProb, parent= currentNode)
+            for superseded in sameLocation.insert(childG, childProb, child):
+                if superseded in frontier:
+                    frontier.remove(superseded)
+
+            frontier.push(child, (getFtotalCost(g= childG, h= childH), (1 - childProb), childLocation, child), child)
+            if logEvents:
+                log_enqueue_state(childLocation, childG, childProb)
+
+    return None, None, None